@@ -0,0 +1,10 @@
+create or replace procedure ledger.refresh_incremental()
+  returns integer
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/ledger.py')
+  handler='ledger.refresh_incremental'
+  comment='Folds new receipts, items and payments into the incrementally maintained ledger; returns the number of receipts refreshed.';
+
+grant usage on procedure ledger.refresh_incremental() to application role app_admin;
@@ -0,0 +1,10 @@
+create or replace procedure ledger.set_incremental(enabled boolean)
+  returns text
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python', 'snowflake-native-apps-permission')
+  imports=('/python/ledger.py')
+  handler='ledger.set_incremental'
+  comment='Switches the ledger between views over the full history and incrementally maintained tables; returns the schema to read it from.';
+
+grant usage on procedure ledger.set_incremental(boolean) to application role app_admin;
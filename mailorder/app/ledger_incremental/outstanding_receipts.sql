@@ -0,0 +1,12 @@
+create or replace view ledger_incremental.outstanding_receipts as
+    select
+        b.receipt_id,
+        b.customer_id,
+        b.paid_cents,
+        b.total_cents,
+        greatest(0, b.total_cents - b.paid_cents) as owing_cents,
+    from ledger_state.receipt_balances b
+    where owing_cents > 0
+    order by owing_cents desc;
+
+grant select on view ledger_incremental.outstanding_receipts to application role app_admin;
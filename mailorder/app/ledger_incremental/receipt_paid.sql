@@ -0,0 +1,8 @@
+create or replace view ledger_incremental.receipt_paid as
+    select
+        receipt_id,
+        paid_cents as amount_cents,
+        last_payment_at
+    from ledger_state.receipt_balances;
+
+grant select on view ledger_incremental.receipt_paid to application role app_admin;
@@ -0,0 +1,7 @@
+create or replace view ledger_incremental.receipt_total as
+    select
+        receipt_id,
+        total_cents as amount_cents
+    from ledger_state.receipt_balances;
+
+grant select on view ledger_incremental.receipt_total to application role app_admin;
@@ -0,0 +1,11 @@
+create or replace view ledger_incremental.tax_collected_per_receipt as
+    select
+        b.receipt_id,
+        reg.id as region_id,
+        least(b.paid_cents, b.total_cents) as collected_taxable_cents,
+        cast(round(collected_taxable_cents * reg.tax_amount_pct) as int) as collected_tax_cents
+    from ledger_state.receipt_balances b
+    inner join data.regions reg on reg.id = b.region_id
+    where collected_taxable_cents > 0;
+
+grant select on view ledger_incremental.tax_collected_per_receipt to application role app_admin;
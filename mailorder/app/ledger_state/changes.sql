@@ -0,0 +1,4 @@
+-- changes not yet folded into ledger_state.receipt_balances; recreated by ledger.set_incremental
+create stream if not exists ledger_state.receipts_changes on table data.receipts;
+create stream if not exists ledger_state.items_changes on table data.items;
+create stream if not exists ledger_state.payments_changes on table data.payments;
@@ -0,0 +1,11 @@
+-- whether the ledger is incrementally maintained (see ledger.set_incremental)
+create table if not exists
+    ledger_state.mode (
+        incremental boolean not null
+    );
+
+insert into ledger_state.mode (incremental)
+    select false where not exists (select 1 from ledger_state.mode);
+
+grant select on ledger_state.mode to application role app_csr;
+grant select on ledger_state.mode to application role app_admin;
@@ -0,0 +1,12 @@
+-- per-receipt totals maintained by ledger.refresh_incremental (see ledger_incremental.*)
+create table if not exists
+    ledger_state.receipt_balances (
+        receipt_id integer not null primary key,
+        customer_id text not null,
+        region_id text not null,
+        total_cents integer,
+        paid_cents integer,
+        last_payment_at timestamp
+    );
+
+grant select on ledger_state.receipt_balances to application role app_admin;
@@ -0,0 +1,6 @@
+-- changes not yet folded into the tax balance snapshot; recreated by regions.set_tax_snapshots
+create stream if not exists ledger_state.tax_receipts_changes on table data.receipts;
+create stream if not exists ledger_state.tax_items_changes on table data.items;
+create stream if not exists ledger_state.tax_payments_changes on table data.payments;
+create stream if not exists ledger_state.tax_regions_changes on table data.regions;
+create stream if not exists ledger_state.tax_transfers_changes on table data.tax_transfers;
@@ -0,0 +1,24 @@
+-- tax balances as of the offsets of the tax change streams, kept by regions.snapshot_tax_balances and read by
+-- regions.tax_balances; the watermark holds when the snapshot was last taken, and no row while snapshots are disabled
+create table if not exists
+    ledger_state.tax_snapshot_watermark (
+        taken_at timestamp not null
+    );
+
+create table if not exists
+    ledger_state.tax_snapshot_receipts (
+        receipt_id integer not null primary key,
+        region_id text not null,
+        collected_tax_cents integer not null
+    );
+
+create table if not exists
+    ledger_state.tax_snapshot_regions (
+        region_id text not null primary key,
+        owed_cents integer not null,
+        transferred_cents integer not null
+    );
+
+grant select on ledger_state.tax_snapshot_watermark to application role app_admin;
+grant select on ledger_state.tax_snapshot_receipts to application role app_admin;
+grant select on ledger_state.tax_snapshot_regions to application role app_admin;
@@ -0,0 +1,12 @@
+create or replace procedure receipts.add_items(items array)
+  returns array
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/receipts.py')
+  handler='receipts.add_items'
+  comment='Adds each {receipt_id, name, amount_cents, quantity} object as an item, returning {added, error} per item';
+
+-- 4. grant appropriate privileges over these objects to your application roles. 
+grant usage on procedure receipts.add_items(array) to application role app_csr;
+grant usage on procedure receipts.add_items(array) to application role app_admin;
@@ -0,0 +1,12 @@
+create or replace procedure receipts.create_many(receipts array)
+  returns array
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/receipts.py')
+  handler='receipts.create_many'
+  comment='Creates a receipt for each {customer_id, region_id} object, returning {id, error} per receipt';
+
+-- 4. grant appropriate privileges over these objects to your application roles. 
+grant usage on procedure receipts.create_many(array) to application role app_csr;
+grant usage on procedure receipts.create_many(array) to application role app_admin;
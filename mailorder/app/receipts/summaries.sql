@@ -0,0 +1,20 @@
+create or replace procedure receipts.summaries(receipt_ids array)
+  returns table (
+    receipt_id integer,
+    subtotal_cents integer,
+    tax_cents integer,
+    total_cents integer,
+    paid_cents integer,
+    owing_cents integer,
+    tip_pct float
+  )
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/receipts.py')
+  handler='receipts.summaries'
+  comment='Returns a table summarizing each of the given receipts (see receipts.summary).';
+
+-- 4. grant appropriate privileges over these objects to your application roles. 
+grant usage on procedure receipts.summaries(array) to application role app_csr;
+grant usage on procedure receipts.summaries(array) to application role app_admin;
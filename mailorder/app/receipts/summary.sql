@@ -0,0 +1,12 @@
+create or replace procedure receipts.summary(receipt_id integer)
+  returns object
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/receipts.py')
+  handler='receipts.summary'
+  comment='Subtotal, tax, total, paid and owing amounts (in cents) and tip percentage of a receipt.';
+
+-- 4. grant appropriate privileges over these objects to your application roles. 
+grant usage on procedure receipts.summary(integer) to application role app_csr;
+grant usage on procedure receipts.summary(integer) to application role app_admin;
@@ -0,0 +1,11 @@
+create or replace function receipts.total_cost_batch(unit_cost integer, quantity integer)
+    returns integer
+    language python
+    packages=('pandas')
+    runtime_version=3.8
+    imports=('/python/receipts_batch.py')
+    handler='receipts_batch.total_cost'
+    comment='Vectorized receipts.total_cost, for queries over many items';
+
+grant usage on function receipts.total_cost_batch(integer, integer) to application role app_admin;
+grant usage on function receipts.total_cost_batch(integer, integer) to application role app_csr;
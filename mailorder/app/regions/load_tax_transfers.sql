@@ -0,0 +1,15 @@
+create or replace file format regions.tax_transfers_csv
+  type = csv
+  skip_header = 1
+  comment = 'Staged tax transfer files: region_id,amount_cents rows with a header line';
+
+create or replace procedure regions.load_tax_transfers(stage_path text, audit_log boolean)
+  returns table (region_id text, transferred_cents integer, owing_cents integer)
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/regions.py')
+  handler='regions.load_tax_transfers'
+  comment='Records the tax transfers in a staged CSV file of region_id,amount_cents rows; returns the reconciled balance of each region.';
+
+grant usage on procedure regions.load_tax_transfers(text, boolean) to application role app_admin;
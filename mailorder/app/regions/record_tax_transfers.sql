@@ -0,0 +1,10 @@
+create or replace procedure regions.record_tax_transfers(transfers array, audit_log boolean)
+  returns table (region_id text, transferred_cents integer, owing_cents integer)
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/regions.py')
+  handler='regions.record_tax_transfers'
+  comment='Records a batch of {region_id, amount_cents} tax transfers (and their audit log) at once; returns the reconciled balance of each region.';
+
+grant usage on procedure regions.record_tax_transfers(array, boolean) to application role app_admin;
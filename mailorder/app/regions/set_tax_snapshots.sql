@@ -0,0 +1,10 @@
+create or replace procedure regions.set_tax_snapshots(enabled boolean)
+  returns text
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python', 'snowflake-native-apps-permission')
+  imports=('/python/regions.py')
+  handler='regions.set_tax_snapshots'
+  comment='Switches regions.tax_balances between the full history and a snapshot kept up to date from change streams; returns when the snapshot was taken, or why it could not be enabled.';
+
+grant usage on procedure regions.set_tax_snapshots(boolean) to application role app_admin;
@@ -0,0 +1,10 @@
+create or replace procedure regions.snapshot_tax_balances()
+  returns text
+  language python
+  runtime_version=3.8
+  packages=('snowflake-snowpark-python')
+  imports=('/python/regions.py')
+  handler='regions.snapshot_tax_balances'
+  comment='Folds the receipts and tax transfers changed since the last snapshot into it, so that regions.tax_balances has less to aggregate; returns when the snapshot was taken.';
+
+grant usage on procedure regions.snapshot_tax_balances() to application role app_admin;
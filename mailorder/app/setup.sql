@@ -18,16 +18,41 @@ create or alter versioned schema ledger;
     execute immediate from './ledger/tax_collected_per_receipt.sql';
     execute immediate from './ledger/outstanding_receipts.sql';
     execute immediate from './ledger/outstanding_customers.sql';
+    execute immediate from './ledger/refresh_incremental.sql';
+    execute immediate from './ledger/set_incremental.sql';
+
+-- state of the incrementally maintained ledger, kept across upgrades
+create schema if not exists ledger_state;
+    grant usage on schema ledger_state to application role app_csr;
+    grant usage on schema ledger_state to application role app_admin;
+    execute immediate from './ledger_state/receipt_balances.sql';
+    execute immediate from './ledger_state/mode.sql';
+    execute immediate from './ledger_state/changes.sql';
+    execute immediate from './ledger_state/tax_snapshots.sql';
+    execute immediate from './ledger_state/tax_changes.sql';
+
+create or alter versioned schema ledger_incremental;
+    grant usage on schema ledger_incremental to application role app_admin;
+    execute immediate from './ledger_incremental/receipt_paid.sql';
+    execute immediate from './ledger_incremental/receipt_total.sql';
+    execute immediate from './ledger_incremental/tax_collected_per_receipt.sql';
+    execute immediate from './ledger_incremental/outstanding_receipts.sql';
+    execute immediate from './ledger_incremental/outstanding_customers.sql';
 
 create or alter versioned schema receipts;
     grant usage on schema receipts to application role app_csr;
     grant usage on schema receipts to application role app_admin;
     execute immediate from './receipts/add_item.sql';
+    execute immediate from './receipts/add_items.sql';
     execute immediate from './receipts/create_new.sql';
+    execute immediate from './receipts/create_many.sql';
     execute immediate from './receipts/record_payment.sql';
     execute immediate from './receipts/subtotal.sql';
+    execute immediate from './receipts/summaries.sql';
+    execute immediate from './receipts/summary.sql';
     execute immediate from './receipts/tip_percentage.sql';
     execute immediate from './receipts/total_cost.sql';
+    execute immediate from './receipts/total_cost_batch.sql';
     execute immediate from './receipts/total.sql';
 
 
@@ -35,7 +60,11 @@ create or alter versioned schema regions;
     grant usage on schema regions to application role app_csr;
     grant usage on schema regions to application role app_admin;
     execute immediate from './regions/record_tax_transfer.sql';
+    execute immediate from './regions/record_tax_transfers.sql';
+    execute immediate from './regions/load_tax_transfers.sql';
     execute immediate from './regions/tax_balances.sql';
+    execute immediate from './regions/snapshot_tax_balances.sql';
+    execute immediate from './regions/set_tax_snapshots.sql';
 
 create or alter versioned schema ui;
     grant usage on schema ui to application role app_csr;
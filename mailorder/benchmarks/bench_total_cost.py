@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Compare the throughput of the scalar receipts.total_cost UDF with the
+vectorized receipts.total_cost_batch UDF.
+
+By default both UDFs of an installed application are run over a table of
+items in Snowflake: a temporary table of --rows random items, or an existing
+table such as the application's data.items with --table. Each query sums the
+UDF over every row, with the result cache disabled, and the fastest of
+--repeat runs is reported.
+
+With --local, no connection is needed: the two Python handlers are run
+in-process over --rows random items, the scalar one once per row and the
+vectorized one per batch of --batch-size rows, which isolates the per-call
+overhead the vectorized UDF saves.
+
+Usage:
+    python3 benchmarks/bench_total_cost.py --connection myconnection --app mailorder_app [--rows 5000000]
+    python3 benchmarks/bench_total_cost.py --connection myconnection --app mailorder_app --table mailorder_app.data.items
+    python3 benchmarks/bench_total_cost.py --local [--rows 5000000] [--batch-size 4096]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python', 'src'))
+
+import numpy
+import pandas
+import receipts
+import receipts_batch
+
+UDFS = ('total_cost', 'total_cost_batch')
+
+
+def best_of(repeat, run):
+    """Fastest wall time of repeat calls to run, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def bench_local(args):
+    rng = numpy.random.default_rng(0)
+    items = pandas.DataFrame({
+        0: rng.integers(1, 100000, args.rows),
+        1: rng.integers(1, 10, args.rows),
+    })
+    unit_costs, quantities = items[0].tolist(), items[1].tolist()
+
+    def scalar():
+        for unit_cost, quantity in zip(unit_costs, quantities):
+            receipts.total_cost(unit_cost, quantity)
+
+    def vectorized():
+        for start in range(0, args.rows, args.batch_size):
+            receipts_batch.total_cost(items.iloc[start:start + args.batch_size])
+
+    return {'total_cost': best_of(args.repeat, scalar), 'total_cost_batch': best_of(args.repeat, vectorized)}
+
+
+def bench_snowflake(args):
+    from snowflake.snowpark import Session
+
+    session = Session.builder.config('connection_name', args.connection).create()
+    try:
+        session.sql("alter session set use_cached_result = false").collect()
+        table = args.table
+        if table is None:
+            table = 'bench_total_cost_items'
+            session.sql(
+                f"create or replace temporary table {table} as "
+                "select uniform(1, 100000, random()) as amount_cents, uniform(1, 10, random()) as quantity "
+                f"from table(generator(rowcount => {args.rows}))"
+            ).collect()
+        rows = session.table(table).count()
+
+        seconds = {}
+        for udf in UDFS:
+            query = f"select sum({args.app}.receipts.{udf}(amount_cents, quantity)) from {table}"
+            seconds[udf] = best_of(args.repeat, lambda: session.sql(query).collect())
+        return rows, seconds
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connection',
+                        help='Snowflake connection name (from connections.toml)')
+    parser.add_argument('--app',
+                        help='Name of the installed application whose UDFs are compared')
+    parser.add_argument('--table',
+                        help='Table of items (amount_cents, quantity) to run over instead of a random one')
+    parser.add_argument('--rows', type=int, default=5000000,
+                        help='Random items to generate (default: 5M)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per UDF, the fastest one is reported (default: 3)')
+    parser.add_argument('--local', action='store_true',
+                        help='Run the Python handlers in-process instead of the UDFs in Snowflake')
+    parser.add_argument('--batch-size', type=int, default=4096,
+                        help='Rows per vectorized call with --local (default: 4096)')
+    args = parser.parse_args()
+
+    if args.local:
+        rows, seconds = args.rows, bench_local(args)
+    elif args.connection and args.app:
+        rows, seconds = bench_snowflake(args)
+    else:
+        parser.error('--connection and --app are required unless --local is given')
+
+    print(f"{'udf':<18}  {'rows':>10}  {'seconds':>9}  {'rows/s':>12}")
+    for udf in UDFS:
+        print(f"{udf:<18}  {rows:>10}  {seconds[udf]:>9.3f}  {rows / seconds[udf]:>12.0f}")
+    print(f"speed-up: {seconds['total_cost'] / seconds['total_cost_batch']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
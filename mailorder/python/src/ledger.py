@@ -0,0 +1,123 @@
+from snowflake import permissions
+from snowflake.snowpark.session import Session
+
+# the ledger views over the full history of receipts, items and payments
+FULL_SCHEMA = "ledger"
+# the same views over ledger_state.receipt_balances, maintained from streams
+INCREMENTAL_SCHEMA = "ledger_incremental"
+
+CHANGE_STREAMS = {
+    "ledger_state.receipts_changes": "data.receipts",
+    "ledger_state.items_changes": "data.items",
+    "ledger_state.payments_changes": "data.payments",
+}
+
+# recomputes the balances of the receipts that appear in the change streams
+# (consuming them), so its cost depends on the receipts changed and not on
+# the whole history; deleted receipts are removed
+REFRESH_BALANCES = """
+merge into ledger_state.receipt_balances b
+using (
+    with changed as (
+        select id as receipt_id from ledger_state.receipts_changes
+        union
+        select receipt_id from ledger_state.items_changes
+        union
+        select receipt_id from ledger_state.payments_changes
+    ),
+    items as (
+        select receipt_id, sum(amount_cents * quantity) as amount_cents
+        from data.items
+        where receipt_id in (select receipt_id from changed)
+        group by receipt_id
+    ),
+    payments as (
+        select receipt_id, sum(amount_cents) as amount_cents, max(created_at) as last_payment_at
+        from data.payments
+        where receipt_id in (select receipt_id from changed)
+        group by receipt_id
+    )
+    select
+        c.receipt_id,
+        r.id is null as deleted,
+        r.customer_id,
+        r.region_id,
+        i.amount_cents as total_cents,
+        p.amount_cents as paid_cents,
+        p.last_payment_at
+    from changed c
+    left join data.receipts r on r.id = c.receipt_id
+    left join items i on i.receipt_id = c.receipt_id
+    left join payments p on p.receipt_id = c.receipt_id
+) s on b.receipt_id = s.receipt_id
+when matched and s.deleted then delete
+when matched then update set
+    customer_id = s.customer_id,
+    region_id = s.region_id,
+    total_cents = s.total_cents,
+    paid_cents = s.paid_cents,
+    last_payment_at = s.last_payment_at
+when not matched and not s.deleted then insert
+    (receipt_id, customer_id, region_id, total_cents, paid_cents, last_payment_at)
+    values (s.receipt_id, s.customer_id, s.region_id, s.total_cents, s.paid_cents, s.last_payment_at)
+"""
+
+REBUILD_BALANCES = """
+insert overwrite into ledger_state.receipt_balances
+    (receipt_id, customer_id, region_id, total_cents, paid_cents, last_payment_at)
+select r.id, r.customer_id, r.region_id, rt.amount_cents, rp.amount_cents, rp.last_payment_at
+from data.receipts r
+inner join ledger.receipt_total rt on rt.receipt_id = r.id
+inner join ledger.receipt_paid rp on rp.receipt_id = r.id
+"""
+
+# serverless, so it needs EXECUTE MANAGED TASK; created on first use by
+# set_incremental rather than at install, where the privilege is not granted yet
+MANAGED_TASK_PRIVILEGE = "EXECUTE MANAGED TASK"
+CREATE_REFRESH_TASK = """
+create task if not exists ledger_state.refresh_task
+  schedule = '1 minute'
+  user_task_managed_initial_warehouse_size = 'XSMALL'
+  comment = 'Folds new receipts, items and payments into ledger_state.receipt_balances'
+  when
+    system$stream_has_data('ledger_state.receipts_changes')
+    or system$stream_has_data('ledger_state.items_changes')
+    or system$stream_has_data('ledger_state.payments_changes')
+  as
+    call ledger.refresh_incremental()
+"""
+
+
+def refresh_incremental(session: Session) -> int:
+    """
+    Folds the receipts, items and payments changed since the last refresh
+    into ledger_state.receipt_balances. Returns the number of receipts
+    inserted, updated or deleted.
+    """
+    result = session.sql(REFRESH_BALANCES).collect()
+    return sum(result[0]) if result else 0
+
+
+def set_incremental(session: Session, enabled: bool) -> str:
+    """
+    Switches the ledger between views over the full history (ledger) and
+    views over per-receipt balances kept up to date by a task as receipts,
+    items and payments change (ledger_incremental). Enabling rebuilds the
+    balances from scratch, and needs the EXECUTE MANAGED TASK privilege for
+    the task. Returns the schema to read the ledger from.
+    """
+    if enabled:
+        if not permissions.get_held_account_privileges([MANAGED_TASK_PRIVILEGE]):
+            raise ValueError(f"The incremental ledger needs the {MANAGED_TASK_PRIVILEGE} privilege, grant it to the application first")
+        # fresh streams first: changes made during the rebuild are refreshed again later
+        for stream, table in CHANGE_STREAMS.items():
+            session.sql(f"create or replace stream {stream} on table {table}").collect()
+        session.sql(REBUILD_BALANCES).collect()
+        session.sql(CREATE_REFRESH_TASK).collect()
+        session.sql("alter task ledger_state.refresh_task resume").collect()
+    else:
+        # the task only exists once the ledger was made incremental
+        session.sql("alter task if exists ledger_state.refresh_task suspend").collect()
+
+    session.sql("update ledger_state.mode set incremental = ?", params=[enabled]).collect()
+    return INCREMENTAL_SCHEMA if enabled else FULL_SCHEMA
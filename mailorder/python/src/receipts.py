@@ -1,24 +1,47 @@
-from typing import Optional
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from snowflake.snowpark import DataFrame, Row
 from snowflake.snowpark.session import Session
-from snowflake.snowpark.functions import col, sum
+from snowflake.snowpark.functions import coalesce, col, greatest, iff, lit, sum
+from snowflake.snowpark.functions import round as sql_round
+
+# Snowflake accepts at most this many rows in the VALUES clause of one insert
+MAX_INSERT_ROWS = 16384
 
 def total_cost(unit_cost: int, quantity: int) -> int:
     return unit_cost * quantity
 
-def create_new(session: Session, customer_id: str, region_id: str) -> int:
+def _missing_customer_or_region(session: Session, customer_id: str, region_id: str) -> ValueError:
     """
-    Creates a new receipt.
+    Explains why a receipt could not be created; only queried on failure.
     """
     if not session.table("data.customers").filter(col("ID") == customer_id).count():
-        raise ValueError(f"Customer with id={customer_id} does not exist")
+        return ValueError(f"Customer with id={customer_id} does not exist")
+    return ValueError(f"Region with id={region_id} does not exist")
 
-    if not session.table("data.regions").filter(col("ID") == region_id).count():
-        raise ValueError(f"Region with id={customer_id} does not exist")
 
-    return session.sql(
-        "insert into data.receipts (customer_id, region_id) values (?, ?) returning id",
+def _rows_inserted(result: list) -> int:
+    """
+    Number of rows inserted by an insert statement, from its result.
+    """
+    return result[0][0] if result else 0
+
+
+def create_new(session: Session, customer_id: str, region_id: str) -> int:
+    """
+    Creates a new receipt.
+    """
+    # the join only yields a row to insert if both the customer and region exist
+    created = session.sql(
+        "insert into data.receipts (customer_id, region_id) "
+        "select c.id, r.id from data.customers c, data.regions r where c.id = ? and r.id = ? "
+        "returning id",
         params=[customer_id, region_id]
-    ).collect()[0]["ID"]
+    ).collect()
+    if not created:
+        raise _missing_customer_or_region(session, customer_id, region_id)
+
+    return created[0]["ID"]
 
 
 def add_item(session: Session, receipt_id: int, name: str, amount_cents: int, quantity: int) -> None:
@@ -31,15 +54,168 @@ def add_item(session: Session, receipt_id: int, name: str, amount_cents: int, qu
     if quantity <= 0:
         raise ValueError(f"Invalid quantity: {quantity}")
 
-    if not session.table("data.receipts").filter(col("ID") == receipt_id).count():
+    inserted = session.sql(
+        "insert into data.items (receipt_id, name, amount_cents, quantity) "
+        "select id, ?, ?, ? from data.receipts where id = ?",
+        params=[name, amount_cents, quantity, receipt_id]
+    ).collect()
+    if not _rows_inserted(inserted):
         raise ValueError(f"Receipt with id={receipt_id} does not exist")
 
-    session.sql(
-        "insert into data.items (receipt_id, name, amount_cents, quantity) values (?, ?, ?, ?)",
-        params=[receipt_id, name, amount_cents, quantity]
+    return None
+
+
+def _row_values(row: Any, columns: Sequence[str], defaults: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Values of a bulk row given either as an object keyed by column name or as
+    an array in column order. Raises ValueError for arrays with more values
+    than columns.
+    """
+    defaults = defaults or {}
+    if isinstance(row, dict):
+        row = {key.lower(): value for key, value in row.items()}
+        return [row.get(column, defaults.get(column)) for column in columns]
+    row = list(row)
+    if len(row) > len(columns):
+        raise ValueError(f"Expected at most {len(columns)} values ({', '.join(columns)}), got {len(row)}")
+    return row + [defaults.get(column) for column in columns[len(row):]]
+
+
+def _rows_values(rows: list, columns: Sequence[str],
+                 defaults: Optional[Dict[str, Any]] = None) -> Tuple[List[Optional[List[Any]]], List[Optional[str]]]:
+    """
+    Values of each bulk row (see _row_values) and the error of each row;
+    rows with an error have no values.
+    """
+    values, errors = [], []
+    for row in rows:
+        try:
+            values.append(_row_values(row, columns, defaults))
+            errors.append(None)
+        except ValueError as e:
+            values.append(None)
+            errors.append(str(e))
+    return values, errors
+
+
+def _insert_many(session: Session, statement: str, rows: List[List[Any]]) -> list:
+    """
+    Inserts rows with one multi-row insert (per MAX_INSERT_ROWS rows), where
+    statement has a {values} placeholder for the VALUES clause.
+    """
+    results = []
+    for start in range(0, len(rows), MAX_INSERT_ROWS):
+        chunk = rows[start:start + MAX_INSERT_ROWS]
+        placeholders = "(" + ", ".join("?" * len(chunk[0])) + ")"
+        results.extend(session.sql(
+            statement.format(values=", ".join([placeholders] * len(chunk))),
+            params=[value for row in chunk for value in row]
+        ).collect())
+    return results
+
+
+def _next_receipt_ids(session: Session, count: int) -> List[int]:
+    """
+    Draws count new receipt ids from data.receipt_id_seq.
+    """
+    # the generator's row count must be a constant, so it cannot be bound
+    ids = session.sql(
+        f"select data.receipt_id_seq.nextval as id from table(generator(rowcount => {int(count)}))"
     ).collect()
+    return [row["ID"] for row in ids]
 
-    return None
+
+def create_many(session: Session, rows: list) -> List[Dict[str, Any]]:
+    """
+    Creates a receipt for each (customer_id, region_id) row. Customers and
+    regions are validated in one query and all valid receipts are created
+    with a single insert. Returns one {id, error} object per row, in order;
+    rows that failed validation have no id and are not created.
+    """
+    columns = ["customer_id", "region_id"]
+    values, errors = _rows_values(rows, columns)
+    results = [{"id": None, "error": error} for error in errors]
+    requested = [[index] + row for index, row in enumerate(values) if row is not None]
+    if not requested:
+        return results
+
+    requested_df = session.create_dataframe(requested, schema=["ROW_INDEX", "CUSTOMER_ID", "REGION_ID"])
+    customers_df = session.table("data.customers").select(col("ID").alias("KNOWN_CUSTOMER_ID"))
+    regions_df = session.table("data.regions").select(col("ID").alias("KNOWN_REGION_ID"))
+    missing = requested_df.join(
+        customers_df, col("CUSTOMER_ID") == col("KNOWN_CUSTOMER_ID"), how="left"
+    ).join(
+        regions_df, col("REGION_ID") == col("KNOWN_REGION_ID"), how="left"
+    ).filter(
+        col("KNOWN_CUSTOMER_ID").is_null() | col("KNOWN_REGION_ID").is_null()
+    ).select("ROW_INDEX", "KNOWN_CUSTOMER_ID").collect()
+
+    for row in missing:
+        customer_id, region_id = values[row["ROW_INDEX"]]
+        results[row["ROW_INDEX"]]["error"] = (
+            f"Customer with id={customer_id} does not exist" if row["KNOWN_CUSTOMER_ID"] is None
+            else f"Region with id={region_id} does not exist"
+        )
+
+    valid = [index for index, result in enumerate(results) if result["error"] is None]
+    if valid:
+        # ids are drawn up front, since multi-row inserts return them in no particular order
+        ids = _next_receipt_ids(session, len(valid))
+        _insert_many(
+            session,
+            "insert into data.receipts (id, customer_id, region_id) values {values}",
+            [[receipt_id] + values[index] for receipt_id, index in zip(ids, valid)]
+        )
+        for receipt_id, index in zip(ids, valid):
+            results[index]["id"] = receipt_id
+
+    return results
+
+
+def add_items(session: Session, rows: list) -> List[Dict[str, Any]]:
+    """
+    Adds each (receipt_id, name, amount_cents, quantity) row as an item to an
+    existing receipt; quantity defaults to 1. Receipts are validated in one
+    query and all valid items are added with a single insert. Returns one
+    {added, error} object per row, in order.
+    """
+    columns = ["receipt_id", "name", "amount_cents", "quantity"]
+    values, errors = _rows_values(rows, columns, {"quantity": 1})
+    results = [{"added": False, "error": error} for error in errors]
+    for result, row in zip(results, values):
+        if row is None:
+            continue
+        receipt_id, name, amount_cents, quantity = row
+        if amount_cents is None or amount_cents <= 0:
+            result["error"] = f"Invalid amount of cents: {amount_cents}"
+        elif quantity is None or quantity <= 0:
+            result["error"] = f"Invalid quantity: {quantity}"
+
+    requested = [[index, row[0]] for index, row in enumerate(values) if row is not None]
+    if not requested:
+        return results
+
+    requested_df = session.create_dataframe(requested, schema=["ROW_INDEX", "RECEIPT_ID"])
+    receipts_df = session.table("data.receipts")
+    missing = requested_df.join(
+        receipts_df, requested_df["RECEIPT_ID"] == receipts_df["ID"], how="left_anti"
+    ).select("ROW_INDEX").collect()
+
+    for row in missing:
+        result = results[row["ROW_INDEX"]]
+        result["error"] = result["error"] or f"Receipt with id={values[row['ROW_INDEX']][0]} does not exist"
+
+    valid = [index for index, result in enumerate(results) if result["error"] is None]
+    if valid:
+        _insert_many(
+            session,
+            "insert into data.items (receipt_id, name, amount_cents, quantity) values {values}",
+            [values[index] for index in valid]
+        )
+        for index in valid:
+            results[index]["added"] = True
+
+    return results
 
 
 def record_payment(session: Session, receipt_id: int, method: str, amount_cents: int) -> None:
@@ -55,13 +231,13 @@ def record_payment(session: Session, receipt_id: int, method: str, amount_cents:
     if method is None or method.strip() == '':
         raise ValueError(f"Invalid method: {method}")
 
-    if not session.table("data.receipts").filter(col("ID") == receipt_id).count():
-        raise ValueError(f"Receipt with id={receipt_id} does not exist")
-
-    session.sql(
-        "insert into data.payments (receipt_id, method, amount_cents) values (?, ?, ?)",
-        params=[receipt_id, method, amount_cents]
+    inserted = session.sql(
+        "insert into data.payments (receipt_id, method, amount_cents) "
+        "select id, ?, ? from data.receipts where id = ?",
+        params=[method, amount_cents, receipt_id]
     ).collect()
+    if not _rows_inserted(inserted):
+        raise ValueError(f"Receipt with id={receipt_id} does not exist")
 
     # return the amount the customer has left to pay
     outstanding = session.table("ledger.outstanding_receipts").filter(
@@ -71,33 +247,65 @@ def record_payment(session: Session, receipt_id: int, method: str, amount_cents:
     return 0 if len(outstanding) == 0 else outstanding[0]["OWING_CENTS"]
 
 
+def _receipt_amounts(session: Session, receipt_id: int, with_paid: bool = False) -> Row:
+    """
+    Subtotal (in cents) and tax rate of a receipt, and the amount paid (in
+    cents) if with_paid, fetched together in one query. Raises ValueError if
+    the receipt does not exist.
+    """
+    receipt_df = session.table("data.receipts").filter(col("ID") == receipt_id)
+    regions_df = session.table("data.regions")
+    items_df = session.table("data.items").filter(col("RECEIPT_ID") == receipt_id).agg(
+        sum(col("AMOUNT_CENTS") * col("QUANTITY")).as_("SUBTOTAL")
+    )
+
+    # the single-row aggregates only survive the joins if the receipt exists
+    amounts_df = receipt_df.join(
+        regions_df, receipt_df.region_id == regions_df.id
+    ).select(
+        regions_df.tax_amount_pct.alias("TAX_PCT")
+    ).cross_join(items_df)
+    columns = [coalesce(col("SUBTOTAL"), lit(0)).as_("SUBTOTAL"), col("TAX_PCT")]
+    if with_paid:
+        amounts_df = amounts_df.cross_join(
+            session.table("data.payments").filter(col("RECEIPT_ID") == receipt_id).agg(
+                sum(col("AMOUNT_CENTS")).as_("PAID")
+            )
+        )
+        columns.append(coalesce(col("PAID"), lit(0)).as_("PAID"))
+
+    amounts = amounts_df.select(*columns).collect()
+    if not amounts:
+        raise ValueError(f"Receipt with id={receipt_id} does not exist")
+
+    return amounts[0]
+
+
+def _tax(subtotal: int, tax_pct: Any) -> int:
+    """
+    Tax (in cents) on a subtotal, rounded half away from zero like ROUND in
+    the ledger views and summaries.
+    """
+    tax = Decimal(subtotal) * Decimal(str(tax_pct))
+    return int(tax.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _total(amounts: Row) -> int:
+    return amounts["SUBTOTAL"] + _tax(amounts["SUBTOTAL"], amounts["TAX_PCT"])
+
+
 def subtotal(session: Session, receipt_id: int) -> int:
     """
     Bill subtotal (all items x quantities totalled up), in cents.
     """
-    if not session.table("data.receipts").filter(col("ID") == receipt_id).count():
-        raise ValueError(f"Receipt with id={receipt_id} does not exist")
-    
-    return session.table('data.items').filter(
-        col('RECEIPT_ID') == receipt_id
-    ).agg(
-        sum(col('AMOUNT_CENTS') * col('QUANTITY')).as_('SUM_LINE_TOTAL')
-    ).collect()[0]['SUM_LINE_TOTAL']
+    return _receipt_amounts(session, receipt_id)["SUBTOTAL"]
 
 
 def total(session: Session, receipt_id: int) -> int:
     """
     Total amount, after regional tax, in cents.
     """
-    before_tax = subtotal(session, receipt_id)
-    regions_df = session.table("data.regions")
-    receipts_df = session.table("data.receipts")
-
-    df = regions_df.join(receipts_df, regions_df.id == receipts_df.region_id)
-    df = df.filter(receipts_df.id == receipt_id)
-    region_tax_pct = df.select(regions_df.tax_amount_pct.alias("TAX_PCT")).collect()[0]["TAX_PCT"]
-
-    return round(before_tax + before_tax * region_tax_pct)
+    return _total(_receipt_amounts(session, receipt_id))
 
 
 def tip_percentage(session: Session, receipt_id: int) -> Optional[float]:
@@ -106,12 +314,64 @@ def tip_percentage(session: Session, receipt_id: int) -> Optional[float]:
     by subtracting the owing amount from total payment)? Value
     returned in cents.
     """
-    total_owed = total(session, receipt_id)
+    amounts = _receipt_amounts(session, receipt_id, with_paid=True)
+    total_owed = _total(amounts)
     if total_owed == 0:
         return None  # cannot divide by 0
 
-    paid = session.table("data.payments").filter(
-        col("RECEIPT_ID") == receipt_id
-    ).agg(sum(col("AMOUNT_CENTS"))).collect()[0]["SUM(AMOUNT_CENTS)"]
+    return (amounts["PAID"] - total_owed) / total_owed
+
+
+def summaries(session: Session, receipt_ids: list) -> DataFrame:
+    """
+    Returns a table summarizing each of the given receipts, built on the
+    ledger.receipt_total and ledger.receipt_paid views. Amounts are in cents;
+    total includes regional tax and owing is what is left of it after
+    payments. tip_pct is (paid - total) / total, or null when the total is 0.
+
+    :returns rows of (receipt_id, subtotal_cents, tax_cents, total_cents,
+        paid_cents, owing_cents, tip_pct).
+    """
+    receipts_df = session.table("data.receipts").filter(col("ID").isin(list(receipt_ids))).select(
+        col("ID").alias("RECEIPT_ID"), col("REGION_ID")
+    )
+    regions_df = session.table("data.regions").select(
+        col("ID").alias("REGION_ID"), col("TAX_AMOUNT_PCT").alias("TAX_PCT")
+    )
+    totals_df = session.table("ledger.receipt_total").select(
+        col("RECEIPT_ID"), col("AMOUNT_CENTS").alias("SUBTOTAL_CENTS")
+    )
+    paid_df = session.table("ledger.receipt_paid").select(
+        col("RECEIPT_ID"), col("AMOUNT_CENTS").alias("PAID_CENTS")
+    )
+
+    df = receipts_df.join(regions_df, on="REGION_ID").join(totals_df, on="RECEIPT_ID").join(paid_df, on="RECEIPT_ID")
+    df = df.na.fill({"SUBTOTAL_CENTS": 0, "PAID_CENTS": 0})
+    df = df.with_column(
+        "TAX_CENTS", sql_round(col("SUBTOTAL_CENTS") * col("TAX_PCT")).cast("integer")
+    ).with_column(
+        "TOTAL_CENTS", col("SUBTOTAL_CENTS") + col("TAX_CENTS")
+    )
+    return df.select(
+        col("RECEIPT_ID"),
+        col("SUBTOTAL_CENTS"),
+        col("TAX_CENTS"),
+        col("TOTAL_CENTS"),
+        col("PAID_CENTS"),
+        greatest(lit(0), col("TOTAL_CENTS") - col("PAID_CENTS")).alias("OWING_CENTS"),
+        iff(
+            col("TOTAL_CENTS") == 0, lit(None), (col("PAID_CENTS") - col("TOTAL_CENTS")) / col("TOTAL_CENTS")
+        ).cast("double").alias("TIP_PCT"),
+    )
+
+
+def summary(session: Session, receipt_id: int) -> dict:
+    """
+    Subtotal, tax, total, paid and owing amounts (in cents) and tip
+    percentage of a receipt, in one query. See summaries.
+    """
+    rows = summaries(session, [receipt_id]).collect()
+    if not rows:
+        raise ValueError(f"Receipt with id={receipt_id} does not exist")
 
-    return (paid - total_owed) / total_owed
+    return {key.lower(): value for key, value in rows[0].as_dict().items()}
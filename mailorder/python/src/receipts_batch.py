@@ -0,0 +1,17 @@
+"""
+Vectorized (pandas batch) versions of the per-line computations in
+receipts.py. Snowflake calls them with a batch of rows at a time as a
+DataFrame whose columns are the arguments in order, rather than once per row.
+"""
+import pandas
+
+
+def total_cost(lines: pandas.DataFrame) -> pandas.Series:
+    """
+    receipts.total_cost for a batch of (unit_cost, quantity) rows.
+    """
+    return lines[0] * lines[1]
+
+
+# marks the handler as vectorized, like the _snowflake.vectorized decorator
+total_cost._sf_vectorized_input = pandas.DataFrame
@@ -1,6 +1,124 @@
+from typing import List, Optional
+from snowflake import permissions
 from snowflake.snowpark.session import Session
-from snowflake.snowpark.functions import col, sum
+from snowflake.snowpark.functions import col, iff, sum
 from snowflake.snowpark import DataFrame
+from snowflake.snowpark.types import IntegerType, StringType, StructField, StructType
+
+# the audit log of tax transfers, created by the tax management UI
+AUDIT_LOG_TABLE = "MAILORDER_DB.LOGS.TAX_TRANSFERS"
+
+# Snowflake accepts at most this many rows in the VALUES clause of one insert
+# (as in receipts, which the regions procedures do not import)
+MAX_INSERT_ROWS = 16384
+
+# what changed since the tax balance snapshot, per table; recreated by set_tax_snapshots
+TAX_CHANGE_STREAMS = {
+    "ledger_state.tax_receipts_changes": "data.receipts",
+    "ledger_state.tax_items_changes": "data.items",
+    "ledger_state.tax_payments_changes": "data.payments",
+    "ledger_state.tax_regions_changes": "data.regions",
+    "ledger_state.tax_transfers_changes": "data.tax_transfers",
+}
+
+REBUILD_SNAPSHOT_RECEIPTS = """
+insert overwrite into ledger_state.tax_snapshot_receipts (receipt_id, region_id, collected_tax_cents)
+select receipt_id, region_id, collected_tax_cents from ledger.tax_collected_per_receipt
+"""
+
+# the transfers as of the stream's offset, so that none is counted again from the stream
+REBUILD_SNAPSHOT_REGIONS = """
+insert overwrite into ledger_state.tax_snapshot_regions (region_id, owed_cents, transferred_cents)
+select reg.id, coalesce(c.owed_cents, 0), coalesce(t.transferred_cents, 0)
+from data.regions reg
+left join (
+    select region_id, sum(collected_tax_cents) as owed_cents
+    from ledger_state.tax_snapshot_receipts group by region_id
+) c on c.region_id = reg.id
+left join (
+    select region_id, sum(amount_cents) as transferred_cents
+    from data.tax_transfers at(stream => 'ledger_state.tax_transfers_changes') group by region_id
+) t on t.region_id = reg.id
+"""
+
+# recomputes the collected tax of the receipts that appear in the change
+# streams, or whose region changed (consuming them); receipts that no longer
+# collect tax are removed
+REFRESH_SNAPSHOT_RECEIPTS = """
+merge into ledger_state.tax_snapshot_receipts s
+using (
+    with changed as (
+        select id as receipt_id from ledger_state.tax_receipts_changes
+        union
+        select receipt_id from ledger_state.tax_items_changes
+        union
+        select receipt_id from ledger_state.tax_payments_changes
+        union
+        select id from data.receipts where region_id in (select id from ledger_state.tax_regions_changes)
+    )
+    select c.receipt_id, t.receipt_id is null as deleted, t.region_id, t.collected_tax_cents
+    from changed c
+    left join ledger.tax_collected_per_receipt t on t.receipt_id = c.receipt_id
+) t on s.receipt_id = t.receipt_id
+when matched and t.deleted then delete
+when matched then update set
+    region_id = t.region_id,
+    collected_tax_cents = t.collected_tax_cents
+when not matched and not t.deleted then insert
+    (receipt_id, region_id, collected_tax_cents)
+    values (t.receipt_id, t.region_id, t.collected_tax_cents)
+"""
+
+# re-aggregates the owed tax per region and adds the transfers inserted or
+# deleted since (consuming their stream; updates show up as both)
+REFRESH_SNAPSHOT_REGIONS = """
+merge into ledger_state.tax_snapshot_regions s
+using (
+    select reg.id as region_id, coalesce(c.owed_cents, 0) as owed_cents, coalesce(t.transferred_cents, 0) as transferred_cents
+    from data.regions reg
+    left join (
+        select region_id, sum(collected_tax_cents) as owed_cents
+        from ledger_state.tax_snapshot_receipts group by region_id
+    ) c on c.region_id = reg.id
+    left join (
+        select region_id, sum(iff(metadata$action = 'INSERT', amount_cents, -amount_cents)) as transferred_cents
+        from ledger_state.tax_transfers_changes group by region_id
+    ) t on t.region_id = reg.id
+) t on s.region_id = t.region_id
+when matched then update set
+    owed_cents = t.owed_cents,
+    transferred_cents = s.transferred_cents + t.transferred_cents
+when not matched then insert
+    (region_id, owed_cents, transferred_cents)
+    values (t.region_id, t.owed_cents, t.transferred_cents)
+"""
+
+# nightly, so tax_balances only aggregates the last day or so of changes; the
+# task is serverless and needs EXECUTE MANAGED TASK, so set_tax_snapshots
+# creates it on first use rather than setup, where the privilege is not granted yet
+MANAGED_TASK_PRIVILEGE = "EXECUTE MANAGED TASK"
+CREATE_SNAPSHOT_TASK = """
+create task if not exists ledger_state.tax_snapshot_task
+  schedule = 'USING CRON 0 3 * * * UTC'
+  user_task_managed_initial_warehouse_size = 'XSMALL'
+  comment = 'Folds changed receipts and tax transfers into the tax balance snapshot for regions.tax_balances'
+  when
+    system$stream_has_data('ledger_state.tax_receipts_changes')
+    or system$stream_has_data('ledger_state.tax_items_changes')
+    or system$stream_has_data('ledger_state.tax_payments_changes')
+    or system$stream_has_data('ledger_state.tax_regions_changes')
+    or system$stream_has_data('ledger_state.tax_transfers_changes')
+  as
+    call regions.snapshot_tax_balances()
+"""
+
+# the format of staged tax transfer files: region_id,amount_cents rows with a header line
+TRANSFERS_FILE_FORMAT = "regions.tax_transfers_csv"
+
+TRANSFERS_SCHEMA = StructType([
+    StructField("REGION_ID", StringType()),
+    StructField("AMOUNT_CENTS", IntegerType()),
+])
 
 def record_tax_transfer(session: Session, region_id: str, amount_cents: int) -> None:
     """
@@ -19,10 +137,60 @@ def tax_balances(session: Session) -> DataFrame:
     """
     Returns a table with our balances per-region. Positive values are
     where we owe collected tax, negative values means we have pre-/over-paid.
+
+    While snapshots are enabled (see set_tax_snapshots), the balances start
+    from the snapshot and only the receipts and transfers in the change
+    streams are aggregated: the collected tax of every receipt that was
+    added, edited or deleted since, or whose region changed, replaces its
+    snapshotted value, and transfers are added or subtracted.
     
     :returns rows of (region_id, owing_cents).
     """
+    if not session.table('ledger_state.tax_snapshot_watermark').collect():
+        return _full_tax_balances(session)
+
+    changed_regions_df = session.table('ledger_state.tax_regions_changes').select(col('ID').alias('CHANGED_REGION_ID'))
+    receipts_df = session.table('data.receipts')
+    changed_df = session.table('ledger_state.tax_receipts_changes').select(col('ID').alias('RECEIPT_ID')).union(
+        session.table('ledger_state.tax_items_changes').select(col('RECEIPT_ID'))
+    ).union(
+        session.table('ledger_state.tax_payments_changes').select(col('RECEIPT_ID'))
+    ).union(
+        receipts_df.join(
+            changed_regions_df, receipts_df['REGION_ID'] == changed_regions_df['CHANGED_REGION_ID']
+        ).select(receipts_df['ID'].alias('RECEIPT_ID'))
+    )
+    collected_now_df = session.table('ledger.tax_collected_per_receipt').join(changed_df, on='RECEIPT_ID').select(
+        col('REGION_ID'), col('COLLECTED_TAX_CENTS')
+    )
+    collected_before_df = session.table('ledger_state.tax_snapshot_receipts').join(changed_df, on='RECEIPT_ID').select(
+        col('REGION_ID'), -col('COLLECTED_TAX_CENTS')
+    )
+    owed_since_df = collected_now_df.union_all(collected_before_df).group_by('REGION_ID').agg(
+        sum('COLLECTED_TAX_CENTS').alias('OWED_SINCE')
+    )
+    # updated transfers show up as a deleted and an inserted row
+    transferred_since_df = session.table('ledger_state.tax_transfers_changes').with_column(
+        'SIGNED_AMOUNT_CENTS', iff(col('METADATA$ACTION') == 'INSERT', col('AMOUNT_CENTS'), -col('AMOUNT_CENTS'))
+    ).group_by('REGION_ID').agg(
+        sum('SIGNED_AMOUNT_CENTS').alias('TRANSFERRED_SINCE')
+    )
 
+    regions_df = session.table('data.regions').select(col('ID').alias('REGION_ID'))
+    snapshot_df = session.table('ledger_state.tax_snapshot_regions')
+    summary = regions_df.join(snapshot_df, on='REGION_ID', how='left').join(
+        owed_since_df, on='REGION_ID', how='left'
+    ).join(
+        transferred_since_df, on='REGION_ID', how='left'
+    )
+    summary_with_defaults = summary.na.fill({'OWED_CENTS': 0, 'TRANSFERRED_CENTS': 0, 'OWED_SINCE': 0, 'TRANSFERRED_SINCE': 0})
+    return summary_with_defaults.select(
+        col('REGION_ID'),
+        col('OWED_CENTS') + col('OWED_SINCE') - col('TRANSFERRED_CENTS') - col('TRANSFERRED_SINCE')
+    )
+
+
+def _full_tax_balances(session: Session) -> DataFrame:
     tax_transfers_per_region_df = session.table('data.tax_transfers').group_by('region_id').agg(sum('AMOUNT_CENTS').alias('transferred'))
     tax_collected_per_region_df = session.table('ledger.tax_collected_per_receipt').group_by('region_id').agg(sum('COLLECTED_TAX_CENTS').alias('owed'))
     regions_df = session.table('data.regions')
@@ -31,3 +199,173 @@ def tax_balances(session: Session) -> DataFrame:
     summary = regions_and_transfers.join(tax_collected_per_region_df, on='region_id', how='left').select(regions_and_transfers.region_id, col('owed'), col('transferred'))
     summary_with_defaults = summary.na.fill({'owed': 0, 'transferred': 0})  # sets defaults for missing values
     return summary_with_defaults.select(col('region_id'), col('owed') - col('transferred'))
+
+
+def _write_snapshot(session: Session, statements: List[str]) -> str:
+    """
+    Runs the statements writing the snapshot and records when it was taken,
+    in one transaction. Returns that time.
+    """
+    taken_at = session.sql("select current_timestamp()::timestamp_ntz as taken_at").collect()[0]["TAKEN_AT"]
+
+    session.sql("begin").collect()
+    try:
+        for statement in statements:
+            session.sql(statement).collect()
+        session.sql(
+            "insert overwrite into ledger_state.tax_snapshot_watermark (taken_at) values (?)",
+            params=[taken_at]
+        ).collect()
+        session.sql("commit").collect()
+    except Exception:
+        session.sql("rollback").collect()
+        raise
+
+    return str(taken_at)
+
+
+def snapshot_tax_balances(session: Session) -> str:
+    """
+    Folds the receipts and transfers in the change streams into the tax
+    balance snapshot, so tax_balances has less to aggregate. Returns when
+    the snapshot was taken.
+    """
+    if not session.table('ledger_state.tax_snapshot_watermark').collect():
+        raise ValueError("Tax balance snapshots are not enabled, see regions.set_tax_snapshots")
+
+    return _write_snapshot(session, [REFRESH_SNAPSHOT_RECEIPTS, REFRESH_SNAPSHOT_REGIONS])
+
+
+def set_tax_snapshots(session: Session, enabled: bool) -> Optional[str]:
+    """
+    Switches tax_balances between aggregating the full history and starting
+    from a snapshot, which a nightly task keeps up to date from streams of
+    the receipts, items, payments, regions and transfers that changed.
+    Enabling rebuilds the snapshot from scratch, and needs the EXECUTE
+    MANAGED TASK privilege for the task. Returns when the snapshot was taken,
+    why snapshots could not be enabled, or None once disabled.
+    """
+    if not enabled:
+        # the task only exists once snapshots were enabled
+        session.sql("alter task if exists ledger_state.tax_snapshot_task suspend").collect()
+        session.sql("delete from ledger_state.tax_snapshot_watermark").collect()
+        return None
+
+    if not permissions.get_held_account_privileges([MANAGED_TASK_PRIVILEGE]):
+        return f"Tax balance snapshots were not enabled: grant the {MANAGED_TASK_PRIVILEGE} privilege to the application first"
+
+    # fresh streams first: receipts changed during the rebuild are recomputed again later
+    for stream, table in TAX_CHANGE_STREAMS.items():
+        session.sql(f"create or replace stream {stream} on table {table}").collect()
+    taken_at = _write_snapshot(session, [REBUILD_SNAPSHOT_RECEIPTS, REBUILD_SNAPSHOT_REGIONS])
+    session.sql(CREATE_SNAPSHOT_TASK).collect()
+    session.sql("alter task ledger_state.tax_snapshot_task resume").collect()
+    return taken_at
+
+
+def _check_regions_exist(session: Session, transfers_df: DataFrame) -> None:
+    regions_df = session.table("data.regions")
+    missing = transfers_df.join(
+        regions_df, transfers_df["REGION_ID"] == regions_df["ID"], how="left_anti"
+    ).select("REGION_ID").distinct().collect()
+    if missing:
+        missing_ids = ", ".join(sorted(str(row["REGION_ID"]) for row in missing))
+        raise ValueError(f"Regions with ids={missing_ids} do not exist")
+
+
+def _transfer_row(transfer) -> Optional[list]:
+    """
+    The [region_id, amount_cents] row of a tax transfer, or None if it is not
+    exactly a region id and an integer amount.
+    """
+    if isinstance(transfer, dict):
+        values = {str(key).lower(): value for key, value in transfer.items()}
+        if values.keys() != {"region_id", "amount_cents"}:
+            return None
+        row = [values["region_id"], values["amount_cents"]]
+    elif isinstance(transfer, (list, tuple)) and len(transfer) == 2:
+        row = list(transfer)
+    else:
+        return None
+
+    region_id, amount_cents = row
+    if not isinstance(region_id, str) or not region_id or type(amount_cents) is not int:
+        return None
+    return row
+
+
+def _insert_targets(audit_log: bool) -> str:
+    """
+    The targets of a multi-table insert of (region_id, amount_cents) rows,
+    which writes the transfers and their audit log together.
+    """
+    targets = "into data.tax_transfers (region_id, amount_cents) values (region_id, amount_cents)"
+    if audit_log:
+        targets += f" into {AUDIT_LOG_TABLE} (region_id, amount_cents) values (region_id, amount_cents)"
+    return targets
+
+
+def _reconciled_balances(session: Session, transfers_df: DataFrame) -> DataFrame:
+    transferred_df = transfers_df.group_by("REGION_ID").agg(sum("AMOUNT_CENTS").alias("TRANSFERRED_CENTS"))
+    balances_df = tax_balances(session).to_df("REGION_ID", "OWING_CENTS")
+    return balances_df.join(transferred_df, on="REGION_ID", how="left").na.fill({"TRANSFERRED_CENTS": 0}).select(
+        col("REGION_ID"), col("TRANSFERRED_CENTS"), col("OWING_CENTS")
+    )
+
+
+def record_tax_transfers(session: Session, transfers: list, audit_log: bool = False) -> DataFrame:
+    """
+    Records a batch of tax transfers, given as {region_id, amount_cents}
+    objects or [region_id, amount_cents] arrays, in one transaction that also
+    writes them to the audit log if audit_log is set. Nothing is recorded if
+    any transfer is malformed or any region does not exist.
+
+    :returns rows of (region_id, transferred_cents, owing_cents): the amount
+        transferred per region by this batch and the balance after it.
+    """
+    rows = [_transfer_row(transfer) for transfer in transfers]
+    malformed = [index for index, row in enumerate(rows) if row is None]
+    if malformed:
+        malformed_indexes = ", ".join(str(index) for index in malformed)
+        raise ValueError(f"Tax transfers at indexes={malformed_indexes} are not a region id and an integer amount")
+    transfers_df = session.create_dataframe(rows, schema=TRANSFERS_SCHEMA)
+
+    if rows:
+        _check_regions_exist(session, transfers_df)
+
+        statement = f"insert all {_insert_targets(audit_log)} select column1 as region_id, column2 as amount_cents from values "
+        session.sql("begin").collect()
+        try:
+            for start in range(0, len(rows), MAX_INSERT_ROWS):
+                chunk = rows[start:start + MAX_INSERT_ROWS]
+                session.sql(
+                    statement + ", ".join(["(?, ?)"] * len(chunk)),
+                    params=[value for row in chunk for value in row]
+                ).collect()
+            session.sql("commit").collect()
+        except Exception:
+            session.sql("rollback").collect()
+            raise
+
+    return _reconciled_balances(session, transfers_df)
+
+
+def load_tax_transfers(session: Session, stage_path: str, audit_log: bool = False) -> DataFrame:
+    """
+    Records the tax transfers in a staged CSV file of (region_id,
+    amount_cents) rows with a header line, like record_tax_transfers. The
+    file is validated and inserted where it is staged, without fetching its
+    rows.
+    """
+    transfers_df = session.read.schema(TRANSFERS_SCHEMA).option("SKIP_HEADER", 1).csv(stage_path)
+    _check_regions_exist(session, transfers_df)
+
+    # a quoted stage location, since it cannot be bound
+    location = "'" + stage_path.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    session.sql(
+        f"insert all {_insert_targets(audit_log)} "
+        "select $1::text as region_id, $2::integer as amount_cents "
+        f"from {location} (file_format => '{TRANSFERS_FILE_FORMAT}')"
+    ).collect()
+
+    return _reconciled_balances(session, transfers_df)
@@ -1,6 +1,7 @@
 def run_streamlit():
     import streamlit as st
     from snowflake.snowpark import Session
+    from data_grid import data_grid
 
     session = Session.builder.getOrCreate()
     st.title("Manage Customers")
@@ -16,9 +17,10 @@ def run_streamlit():
                 params=[customer_id, customer_name]
             ).collect()
 
-        st.header("Customers")
-        customers_df = session.table("data.customers")
-        st.dataframe(customers_df.to_pandas(), use_container_width=True)
+    # outside the form, so that paging and filtering apply immediately
+    st.header("Customers")
+    customers_df = session.table("data.customers")
+    data_grid(customers_df, key='customers')
 
 
 
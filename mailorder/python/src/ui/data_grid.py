@@ -0,0 +1,65 @@
+"""
+A data grid that shows a Snowpark DataFrame one page at a time. Filtering,
+sorting and paging are pushed down to Snowflake, so each rerun only fetches
+the visible page and a row count instead of the whole table.
+"""
+import math
+from typing import Optional
+import pandas as pd
+import streamlit as st
+from snowflake.snowpark import DataFrame
+from snowflake.snowpark.functions import col, lit, upper
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def page_of(df: DataFrame, page: int, page_size: int, sort_by: str, descending: bool = False,
+            filter_column: Optional[str] = None, filter_text: str = '') -> DataFrame:
+    """
+    The rows of df on the given page (counting from 1), sorted by sort_by and
+    keeping only rows whose filter_column contains filter_text (ignoring case).
+    Rows with equal sort_by values are ordered by the other columns, so every
+    row shows up on exactly one page.
+    """
+    df = _filtered(df, filter_column, filter_text)
+    tiebreakers = [col(column).asc() for column in df.columns if column != sort_by]
+    df = df.sort(col(sort_by).desc() if descending else col(sort_by).asc(), *tiebreakers)
+    return df.limit(page_size, offset=(page - 1) * page_size)
+
+
+def _filtered(df: DataFrame, filter_column: Optional[str], filter_text: str) -> DataFrame:
+    if not filter_column or not filter_text:
+        return df
+    return df.filter(upper(col(filter_column).cast("string")).contains(lit(filter_text.upper())))
+
+
+def data_grid(df: DataFrame, key: str, page_size: int = DEFAULT_PAGE_SIZE,
+              sort_by: Optional[str] = None, descending: bool = False) -> pd.DataFrame:
+    """
+    Shows df as a paginated grid with a column filter and sorting; sort_by
+    and descending set the initial order (default: the first column,
+    ascending). Widget keys are prefixed with key. Returns the visible page.
+    """
+    columns = df.columns
+
+    filter_col, text_col, sort_col, order_col = st.columns(4)
+    filter_column = filter_col.selectbox("Filter column", columns, key=f"{key}FilterColumn")
+    filter_text = text_col.text_input("Contains", key=f"{key}FilterText")
+    sort_by = sort_col.selectbox("Sort by", columns, index=columns.index(sort_by) if sort_by else 0, key=f"{key}SortBy")
+    descending = order_col.checkbox("Descending", value=descending, key=f"{key}Descending")
+
+    row_count = _filtered(df, filter_column, filter_text).count()
+    page_count = max(1, math.ceil(row_count / page_size))
+    # the filter may have left fewer pages than the page last shown
+    page_key = f"{key}Page"
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+
+    page_df = page_of(df, st.session_state.get(page_key, 1), page_size, sort_by, descending,
+                      filter_column, filter_text).to_pandas()
+    st.dataframe(page_df, use_container_width=True)
+
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key=page_key)
+    first_row = (page - 1) * page_size + 1
+    st.caption(f"Rows {min(first_row, row_count)}-{min(first_row + page_size - 1, row_count)} of {row_count}")
+    return page_df
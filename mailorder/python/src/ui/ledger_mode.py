@@ -0,0 +1,19 @@
+"""
+Which schema the UIs read the ledger views from. Kept with the UIs, since
+they are deployed on their own and cannot import the ledger module.
+"""
+from snowflake.snowpark import Session
+
+# the ledger views over the full history of receipts, items and payments
+FULL_SCHEMA = "ledger"
+# the same views over balances maintained from streams (see ledger.set_incremental)
+INCREMENTAL_SCHEMA = "ledger_incremental"
+
+
+def ledger_schema(session: Session) -> str:
+    """
+    The schema to read the ledger views from: ledger, or ledger_incremental
+    while the ledger is incrementally maintained.
+    """
+    mode = session.table("ledger_state.mode").select("INCREMENTAL").collect()
+    return INCREMENTAL_SCHEMA if mode and mode[0]["INCREMENTAL"] else FULL_SCHEMA
@@ -2,28 +2,34 @@
 def run_streamlit():
     import streamlit as st
     from snowflake.snowpark import Session
+    from data_grid import data_grid
+    from ledger_mode import INCREMENTAL_SCHEMA, ledger_schema as current_ledger_schema
 
     session = Session.builder.getOrCreate()
 
+    ledger_schema = current_ledger_schema(session)
+    if ledger_schema == INCREMENTAL_SCHEMA:
+        st.caption("The ledger is incrementally maintained and may lag new receipts, items and payments by a minute.")
+
     st.header("Customers with outstanding money")
-    outstanding_customers_df = session.table("ledger.outstanding_customers")
-    st.dataframe(outstanding_customers_df.to_pandas(), use_container_width=True)
+    outstanding_customers_df = session.table(f"{ledger_schema}.outstanding_customers")
+    data_grid(outstanding_customers_df, key='outstandingCustomers', sort_by='OWING_CENTS', descending=True)
 
     st.header("Receipts with outstanding money")
-    outstanding_receipts_df = session.table("ledger.outstanding_receipts")
-    st.dataframe(outstanding_receipts_df.to_pandas(), use_container_width=True)
+    outstanding_receipts_df = session.table(f"{ledger_schema}.outstanding_receipts")
+    data_grid(outstanding_receipts_df, key='outstandingReceipts', sort_by='OWING_CENTS', descending=True)
 
     st.header("Receipts Paid")
-    receipts_paid_df = session.table("ledger.receipt_paid")
-    st.dataframe(receipts_paid_df.to_pandas(), use_container_width=True)
+    receipts_paid_df = session.table(f"{ledger_schema}.receipt_paid")
+    data_grid(receipts_paid_df, key='receiptsPaid')
 
     st.header("Receipts Total")
-    receipts_total_df = session.table("ledger.receipt_total")
-    st.dataframe(receipts_total_df.to_pandas(), use_container_width=True)
+    receipts_total_df = session.table(f"{ledger_schema}.receipt_total")
+    data_grid(receipts_total_df, key='receiptsTotal')
 
     st.header("Tax collected per receipt")
-    tax_collected_df = session.table("ledger.tax_collected_per_receipt")
-    st.dataframe(tax_collected_df.to_pandas(), use_container_width=True)
+    tax_collected_df = session.table(f"{ledger_schema}.tax_collected_per_receipt")
+    data_grid(tax_collected_df, key='taxCollected')
 
 if __name__ == '__main__':
     run_streamlit()
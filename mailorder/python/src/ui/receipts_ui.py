@@ -3,6 +3,7 @@ def run_streamlit():
     from snowflake.snowpark.functions import col, call_udf
     from snowflake import telemetry
     from snowflake.snowpark import Session
+    import reference_data
 
     session = Session.builder.getOrCreate()
 
@@ -12,7 +13,7 @@ def run_streamlit():
     receipt_id = st.selectbox("Receipt Id", all_receipt_ids)
 
     st.subheader("Current Items in Receipt")
-    items_df = session.table("data.items").filter(col("receipt_id") == receipt_id).with_column("total cost", call_udf("receipts.total_cost", col("amount_cents"), col("quantity")))
+    items_df = session.table("data.items").filter(col("receipt_id") == receipt_id).with_column("total cost", call_udf("receipts.total_cost_batch", col("amount_cents"), col("quantity")))
     st.dataframe(items_df.to_pandas(), use_container_width=True)
 
     st.subheader("Add Item")
@@ -42,16 +43,10 @@ def run_streamlit():
     st.header("Add New Receipt")
     new_receipt_id = st.number_input("Enter receipt_id", key='receiptId')
 
-    customers_df = session.table("data.customers").select("id", "name")
-    customer_id_to_name = {}
-    for record in customers_df.collect():
-        customer_id_to_name[list(record)[0]] = list(record)[1]
+    customer_id_to_name = reference_data.customer_names(session)
     customer_id = st.selectbox("Customer", customer_id_to_name.keys(), format_func=lambda x: customer_id_to_name[x], key='customerId')
 
-    regions_df = session.table("data.regions").select("id", "name")
-    region_id_to_name = {}
-    for record in regions_df.collect():
-        region_id_to_name[list(record)[0]] = list(record)[1]
+    region_id_to_name = reference_data.region_names(session)
     region_id = st.selectbox("Region", region_id_to_name.keys(), format_func=lambda x: region_id_to_name[x], key='regionId')
 
     def add_receipt_button():
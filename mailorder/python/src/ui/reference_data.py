@@ -0,0 +1,50 @@
+"""
+Id -> name lookups of the reference tables shared by the UIs, cached across
+Streamlit reruns and sessions so widget interactions do not query the
+warehouse for the whole table. Each UI runs as its own Streamlit app with its
+own cache, so instead of clearing entries after writes, every lookup first
+fetches a cheap change token (row count and latest created_at) and the cached
+names are keyed on it: rows added or removed by any app show up on the next
+rerun. In-place renames only change the names, not the token, and show up
+once the entry expires after TTL_SECONDS.
+"""
+import streamlit as st
+from snowflake.snowpark import Session
+from snowflake.snowpark.functions import count, lit, max as max_
+
+TTL_SECONDS = 300
+
+
+def _names(session: Session, table: str) -> dict:
+    return {row["ID"]: row["NAME"] for row in session.table(table).select("id", "name").collect()}
+
+
+def _change_token(session: Session, table: str) -> tuple:
+    row = session.table(table).select(count(lit(1)).alias("ROWS"), max_("created_at").alias("LAST_CREATED_AT")).collect()[0]
+    return row["ROWS"], row["LAST_CREATED_AT"]
+
+
+# the leading underscore keeps streamlit from hashing the session, while the
+# token is hashed into the cache key
+@st.cache_data(ttl=TTL_SECONDS, show_spinner=False)
+def _region_names(_session: Session, token: tuple) -> dict:
+    return _names(_session, "data.regions")
+
+
+@st.cache_data(ttl=TTL_SECONDS, show_spinner=False)
+def _customer_names(_session: Session, token: tuple) -> dict:
+    return _names(_session, "data.customers")
+
+
+def region_names(session: Session) -> dict:
+    """
+    Region names by region id.
+    """
+    return _region_names(session, _change_token(session, "data.regions"))
+
+
+def customer_names(session: Session) -> dict:
+    """
+    Customer names by customer id.
+    """
+    return _customer_names(session, _change_token(session, "data.customers"))
@@ -3,6 +3,7 @@ def run_streamlit():
     import pandas as pd
     from snowflake.snowpark import Session
     from snowflake import permissions
+    import reference_data
 
     session = Session.builder.getOrCreate()
 
@@ -17,10 +18,7 @@ def run_streamlit():
     st.title("Tax Management")
 
     st.header("Record tax transfer")
-    regions_df = session.table("data.regions").select("id", "name")
-    region_id_to_name = {}
-    for record in regions_df.collect():
-        region_id_to_name[list(record)[0]] = list(record)[1]
+    region_id_to_name = reference_data.region_names(session)
     region_id_selected = st.selectbox("Region", region_id_to_name.keys(), format_func=lambda x: region_id_to_name[x], key='regionId')
 
     amount_cents = st.number_input("Tax Transfer (in cents)", value=0, step=1, key="taxAmount")
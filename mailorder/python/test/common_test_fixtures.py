@@ -3,6 +3,18 @@ from unittest.mock import patch
 from snowflake.snowpark.session import Session
 from datetime import datetime
 from snowflake import telemetry
+from snowflake.snowpark.functions import round as sql_round
+from snowflake.snowpark.mock import ColumnEmulator, patch as patch_function
+from decimal import Decimal, ROUND_HALF_UP
+from snowflake.snowpark.types import IntegerType, StringType, StructType, StructField, TimestampType
+
+# local testing does not implement round(); Snowflake rounds half away from zero
+@patch_function(sql_round)
+def mock_round(column: ColumnEmulator, scale: ColumnEmulator) -> ColumnEmulator:
+    quantum = Decimal(1).scaleb(-int(scale.iloc[0]) if len(scale) else 0)
+    result = column.apply(lambda value: None if value is None else Decimal(value).quantize(quantum, ROUND_HALF_UP))
+    result.sf_type = column.sf_type
+    return result
 
 @fixture
 def session():
@@ -73,3 +85,16 @@ class data:
 
     tax_transfers_schema = ['region_id', 'amount_cents', 'created_at']
     tax_transfer_1 = [test_region_id, tax_transfer_amount, datetime.now()]
+
+    ledger_mode_schema = ['incremental']
+
+    tax_snapshot_watermark_schema = StructType([StructField('taken_at', TimestampType())])
+    tax_snapshot_regions_schema = ['region_id', 'owed_cents', 'transferred_cents']
+    tax_snapshot_receipts_schema = ['receipt_id', 'region_id', 'collected_tax_cents']
+
+    # the columns of the tax change streams that regions.tax_balances reads
+    tax_receipts_changes_schema = StructType([StructField('id', IntegerType()), StructField('METADATA$ACTION', StringType())])
+    tax_items_changes_schema = StructType([StructField('receipt_id', IntegerType()), StructField('METADATA$ACTION', StringType())])
+    tax_payments_changes_schema = tax_items_changes_schema
+    tax_regions_changes_schema = StructType([StructField('id', StringType()), StructField('METADATA$ACTION', StringType())])
+    tax_transfers_changes_schema = StructType([StructField('region_id', StringType()), StructField('amount_cents', IntegerType()), StructField('METADATA$ACTION', StringType())])
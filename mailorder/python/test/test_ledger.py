@@ -0,0 +1,52 @@
+import ledger as ledger
+from unittest.mock import MagicMock, call, patch
+import pytest as pytest
+from common_test_fixtures import session, data
+
+def test_refresh_incremental(session):
+    session.sql = MagicMock()
+    # rows inserted, updated and deleted by the merge
+    session.sql.return_value.collect.return_value = [(2, 3, 1)]
+
+    result = ledger.refresh_incremental(session)
+
+    assert result == 6
+    session.sql.assert_called_once_with(ledger.REFRESH_BALANCES)
+
+@patch('snowflake.permissions.get_held_account_privileges', return_value=['EXECUTE MANAGED TASK'])
+def test_set_incremental(get_held_account_privileges, session):
+    session.sql = MagicMock()
+
+    result = ledger.set_incremental(session, True)
+
+    assert result == 'ledger_incremental'
+    assert session.sql.call_args_list == [
+        call('create or replace stream ledger_state.receipts_changes on table data.receipts'),
+        call('create or replace stream ledger_state.items_changes on table data.items'),
+        call('create or replace stream ledger_state.payments_changes on table data.payments'),
+        call(ledger.REBUILD_BALANCES),
+        call(ledger.CREATE_REFRESH_TASK),
+        call('alter task ledger_state.refresh_task resume'),
+        call('update ledger_state.mode set incremental = ?', params=[True]),
+    ]
+
+@patch('snowflake.permissions.get_held_account_privileges', return_value=[])
+def test_set_incremental_without_managed_tasks(get_held_account_privileges, session):
+    session.sql = MagicMock()
+
+    with pytest.raises(ValueError, match='EXECUTE MANAGED TASK'):
+        ledger.set_incremental(session, True)
+
+    get_held_account_privileges.assert_called_once_with(['EXECUTE MANAGED TASK'])
+    session.sql.assert_not_called()
+
+def test_unset_incremental(session):
+    session.sql = MagicMock()
+
+    result = ledger.set_incremental(session, False)
+
+    assert result == 'ledger'
+    assert session.sql.call_args_list == [
+        call('alter task if exists ledger_state.refresh_task suspend'),
+        call('update ledger_state.mode set incremental = ?', params=[False]),
+    ]
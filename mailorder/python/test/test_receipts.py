@@ -1,4 +1,5 @@
 import receipts as receipts
+from snowflake.snowpark import DataFrame
 from snowflake.snowpark.session import Session
 from unittest.mock import MagicMock, patch
 from datetime import datetime
@@ -24,22 +25,101 @@ def test_create_new(session_sql, session):
     result = receipts.create_new(session, data.test_customer_id, data.test_region_id)
 
     assert result == new_receipt_id
-    session_sql.assert_called_once_with('insert into data.receipts (customer_id, region_id) values (?, ?) returning id', params=[data.test_customer_id, data.test_region_id])
+    session_sql.assert_called_once_with('insert into data.receipts (customer_id, region_id) select c.id, r.id from data.customers c, data.regions r where c.id = ? and r.id = ? returning id', params=[data.test_customer_id, data.test_region_id])
+
+@pytest.mark.parametrize('customer_id, region_id, error', [
+    ('missing', data.test_region_id, 'Customer with id=missing does not exist'),
+    (data.test_customer_id, 'missing', 'Region with id=missing does not exist'),
+])
+@patch('snowflake.snowpark.session.Session.sql')
+def test_create_new_missing_reference(session_sql, session, customer_id, region_id, error):
+    session_sql.return_value.collect.return_value = []
+
+    with pytest.raises(ValueError, match=error):
+        receipts.create_new(session, customer_id, region_id)
 
 @patch('snowflake.snowpark.session.Session.sql')
 def test_add_item(session_sql, session):
+    session_sql.return_value.collect.return_value = [[1]]
+
     receipts.add_item(session, data.test_receipt_id, data.test_item_name, data.test_item_amount_cents, data.test_item_quantity)
 
-    session_sql.assert_called_once_with('insert into data.items (receipt_id, name, amount_cents, quantity) values (?, ?, ?, ?)', params=[data.test_receipt_id, data.test_item_name, data.test_item_amount_cents, data.test_item_quantity])
+    session_sql.assert_called_once_with('insert into data.items (receipt_id, name, amount_cents, quantity) select id, ?, ?, ? from data.receipts where id = ?', params=[data.test_item_name, data.test_item_amount_cents, data.test_item_quantity, data.test_receipt_id])
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_add_item_missing_receipt(session_sql, session):
+    session_sql.return_value.collect.return_value = [[0]]
+
+    with pytest.raises(ValueError, match=f'Receipt with id={data.test_receipt_id + 1} does not exist'):
+        receipts.add_item(session, data.test_receipt_id + 1, data.test_item_name, data.test_item_amount_cents, data.test_item_quantity)
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_create_many(session_sql, session):
+    new_receipt_ids = [data.test_receipt_id + 6, data.test_receipt_id + 5]
+    session_sql.side_effect = [session.create_dataframe([[i] for i in new_receipt_ids], schema=['ID']), MagicMock()]
+
+    result = receipts.create_many(session, [
+        {'customer_id': data.test_customer_id, 'region_id': data.test_region_id},
+        {'customer_id': 'missing', 'region_id': data.test_region_id},
+        [data.test_customer_id, 'missing'],
+        [data.test_customer_id, data.test_region_id],
+        [data.test_customer_id, data.test_region_id, 'extra'],
+    ])
+
+    assert result == [
+        {'id': new_receipt_ids[0], 'error': None},
+        {'id': None, 'error': 'Customer with id=missing does not exist'},
+        {'id': None, 'error': 'Region with id=missing does not exist'},
+        {'id': new_receipt_ids[1], 'error': None},
+        {'id': None, 'error': 'Expected at most 2 values (customer_id, region_id), got 3'},
+    ]
+    assert session_sql.call_args_list[0].args == ('select data.receipt_id_seq.nextval as id from table(generator(rowcount => 2))',)
+    assert session_sql.call_args_list[1].args == ('insert into data.receipts (id, customer_id, region_id) values (?, ?, ?), (?, ?, ?)',)
+    assert session_sql.call_args_list[1].kwargs == {'params': [new_receipt_ids[0], data.test_customer_id, data.test_region_id, new_receipt_ids[1], data.test_customer_id, data.test_region_id]}
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_create_many_without_valid_rows(session_sql, session):
+    assert receipts.create_many(session, []) == []
+    assert receipts.create_many(session, [['missing', data.test_region_id]]) == [{'id': None, 'error': 'Customer with id=missing does not exist'}]
+    assert receipts.create_many(session, [[1, 2, 3]]) == [{'id': None, 'error': 'Expected at most 2 values (customer_id, region_id), got 3'}]
+    session_sql.assert_not_called()
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_add_items(session_sql, session):
+    result = receipts.add_items(session, [
+        {'receipt_id': data.test_receipt_id, 'name': data.test_item_name, 'amount_cents': data.test_item_amount_cents, 'quantity': data.test_item_quantity},
+        {'receipt_id': data.test_receipt_id + 1, 'name': data.test_item_name, 'amount_cents': data.test_item_amount_cents},
+        {'receipt_id': data.test_receipt_id, 'name': data.test_item_name, 'amount_cents': 0},
+        [data.test_receipt_id, 'item2', 200],
+        [data.test_receipt_id, 'item3', 300, 1, 'extra'],
+    ])
+
+    assert result == [
+        {'added': True, 'error': None},
+        {'added': False, 'error': f'Receipt with id={data.test_receipt_id + 1} does not exist'},
+        {'added': False, 'error': 'Invalid amount of cents: 0'},
+        {'added': True, 'error': None},
+        {'added': False, 'error': 'Expected at most 4 values (receipt_id, name, amount_cents, quantity), got 5'},
+    ]
+    session_sql.assert_called_once_with('insert into data.items (receipt_id, name, amount_cents, quantity) values (?, ?, ?, ?), (?, ?, ?, ?)', params=[data.test_receipt_id, data.test_item_name, data.test_item_amount_cents, data.test_item_quantity, data.test_receipt_id, 'item2', 200, 1])
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_add_items_chunks_large_inserts(session_sql, session):
+    with patch.object(receipts, 'MAX_INSERT_ROWS', 2):
+        result = receipts.add_items(session, [[data.test_receipt_id, f'item{i}', 100, 1] for i in range(5)])
+
+    assert all(row['added'] for row in result)
+    assert session_sql.call_count == 3
 
 @patch('snowflake.snowpark.session.Session.sql')
 def test_record_payment(session_sql, session):
     session.create_dataframe(data=[data.outstanding_receipt_1], schema=data.outstanding_receipts_schema).write.save_as_table('ledger.outstanding_receipts')
+    session_sql.return_value.collect.return_value = [[1]]
 
     result = receipts.record_payment(session, data.test_receipt_id, data.test_payment_method, data.test_payment_amount)
 
     assert result == data.test_owing_cents
-    session_sql.assert_called_once_with('insert into data.payments (receipt_id, method, amount_cents) values (?, ?, ?)', params=[data.test_receipt_id, data.test_payment_method, data.test_payment_amount])
+    session_sql.assert_called_once_with('insert into data.payments (receipt_id, method, amount_cents) select id, ?, ? from data.receipts where id = ?', params=[data.test_payment_method, data.test_payment_amount, data.test_receipt_id])
 
 def test_subtotal(session):
     session.create_dataframe(data=[data.test_item_1, data.test_item_2], schema=data.items_schema).write.save_as_table('data.items')
@@ -57,6 +137,22 @@ def test_total(session):
     subtotal_after_tax = round(subtotal + subtotal * data.test_tax_percent)
     assert result == subtotal_after_tax
 
+def _half_cent_tax_receipt(session):
+    # 5% of 50 cents is 2.5 cents of tax: rounding half to even would give 2
+    receipt_id = data.test_receipt_id + 1
+    session.create_dataframe(data=[['half', 'Half', 0.05, datetime.now()]], schema=data.regions_schema).write.save_as_table('data.regions', mode='append')
+    session.create_dataframe(data=[[receipt_id, data.test_customer_id, 'half', datetime.now()]], schema=data.receipts_schema).write.save_as_table('data.receipts', mode='append')
+    session.create_dataframe(data=[[receipt_id, 'item', 50, 1, datetime.now()]], schema=data.items_schema).write.save_as_table('data.items')
+    session.create_dataframe(data=[[receipt_id, 50]], schema=data.receipt_total_schema).write.save_as_table('ledger.receipt_total')
+    session.create_dataframe(data=[[receipt_id, 0, datetime.now()]], schema=data.receipt_paid_schema).write.save_as_table('ledger.receipt_paid')
+    return receipt_id
+
+def test_total_rounds_half_cents_like_summary(session):
+    receipt_id = _half_cent_tax_receipt(session)
+
+    assert receipts.total(session, receipt_id) == 53
+    assert receipts.summary(session, receipt_id)['total_cents'] == 53
+
 def test_tip_percentage(session):
     session.create_dataframe(data=[data.test_item_1, data.test_item_2], schema=data.items_schema).write.save_as_table('data.items')
     subtotal = data.test_item_1[2] * data.test_item_1[3] + data.test_item_2[2] * data.test_item_2[3]
@@ -69,3 +165,59 @@ def test_tip_percentage(session):
     result = receipts.tip_percentage(session, data.test_receipt_id)
 
     assert abs(result - test_tip_percentage) <= EPSILON
+
+@pytest.mark.parametrize('function', [receipts.subtotal, receipts.total, receipts.tip_percentage])
+def test_missing_receipt(session, function):
+    session.create_dataframe(data=[data.test_item_1], schema=data.items_schema).write.save_as_table('data.items')
+    session.create_dataframe(data=[data.test_payment], schema=data.payments_schema).write.save_as_table('data.payments')
+
+    with pytest.raises(ValueError, match=f'Receipt with id={data.test_receipt_id + 1} does not exist'):
+        function(session, data.test_receipt_id + 1)
+
+def test_tip_percentage_single_query(session):
+    session.create_dataframe(data=[data.test_item_1], schema=data.items_schema).write.save_as_table('data.items')
+    session.create_dataframe(data=[data.test_payment], schema=data.payments_schema).write.save_as_table('data.payments')
+
+    with patch.object(DataFrame, 'collect', autospec=True, side_effect=DataFrame.collect) as collect:
+        receipts.tip_percentage(session, data.test_receipt_id)
+
+    assert collect.call_count == 1
+
+def test_summary(session):
+    session.create_dataframe(data=[data.receipt_total_1], schema=data.receipt_total_schema).write.save_as_table('ledger.receipt_total')
+    session.create_dataframe(data=[data.receipt_paid_1], schema=data.receipt_paid_schema).write.save_as_table('ledger.receipt_paid')
+    subtotal = data.receipt_total_1[1]
+    tax = round(subtotal * data.test_tax_percent)
+    paid = data.receipt_paid_1[1]
+
+    result = receipts.summary(session, data.test_receipt_id)
+
+    assert abs(result.pop('tip_pct') - (paid - subtotal - tax) / (subtotal + tax)) <= 0.00001
+    assert result == {
+        'receipt_id': data.test_receipt_id,
+        'subtotal_cents': subtotal,
+        'tax_cents': tax,
+        'total_cents': subtotal + tax,
+        'paid_cents': paid,
+        'owing_cents': subtotal + tax - paid,
+    }
+
+def test_summary_missing_receipt(session):
+    session.create_dataframe(data=[data.receipt_total_1], schema=data.receipt_total_schema).write.save_as_table('ledger.receipt_total')
+    session.create_dataframe(data=[data.receipt_paid_1], schema=data.receipt_paid_schema).write.save_as_table('ledger.receipt_paid')
+
+    with pytest.raises(ValueError, match=f'Receipt with id={data.test_receipt_id + 1} does not exist'):
+        receipts.summary(session, data.test_receipt_id + 1)
+
+def test_summaries(session):
+    other_receipt_id = data.test_receipt_id + 1
+    session.create_dataframe(data=[[other_receipt_id, data.test_customer_id, data.test_region_id, datetime.now()]], schema=data.receipts_schema).write.save_as_table('data.receipts', mode='append')
+    # a receipt without items or payments has null ledger amounts
+    session.create_dataframe(data=[data.receipt_total_1, [other_receipt_id, None]], schema=data.receipt_total_schema).write.save_as_table('ledger.receipt_total')
+    session.create_dataframe(data=[data.receipt_paid_1, [other_receipt_id, None, None]], schema=data.receipt_paid_schema).write.save_as_table('ledger.receipt_paid')
+
+    result = receipts.summaries(session, [data.test_receipt_id, other_receipt_id, other_receipt_id + 1]).sort('RECEIPT_ID').collect()
+
+    assert [row['RECEIPT_ID'] for row in result] == [data.test_receipt_id, other_receipt_id]
+    assert result[0]['OWING_CENTS'] == data.receipt_total_1[1] + round(data.receipt_total_1[1] * data.test_tax_percent) - data.receipt_paid_1[1]
+    assert [result[1][column] for column in ['SUBTOTAL_CENTS', 'TAX_CENTS', 'TOTAL_CENTS', 'PAID_CENTS', 'OWING_CENTS']] == [0, 0, 0, 0, 0]
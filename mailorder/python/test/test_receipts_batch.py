@@ -0,0 +1,14 @@
+import receipts_batch as receipts_batch
+import receipts as receipts
+import pandas as pandas
+from common_test_fixtures import data
+
+def test_total_cost():
+    lines = pandas.DataFrame([[8, 3], [data.test_item_amount_cents, data.test_item_quantity]])
+
+    result = receipts_batch.total_cost(lines)
+
+    assert list(result) == [receipts.total_cost(8, 3), receipts.total_cost(data.test_item_amount_cents, data.test_item_quantity)]
+
+def test_total_cost_is_vectorized():
+    assert receipts_batch.total_cost._sf_vectorized_input is pandas.DataFrame
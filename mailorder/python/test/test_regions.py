@@ -1,7 +1,8 @@
 import regions as regions
 from snowflake.snowpark.session import Session
-from unittest.mock import MagicMock, patch
-from datetime import datetime
+from unittest.mock import MagicMock, call, patch
+from datetime import datetime, timedelta
+import pytest as pytest
 from common_test_fixtures import session, data
 
 def test_record_tax_transfer(session):
@@ -15,9 +16,285 @@ def test_record_tax_transfer(session):
     )
 
 def test_tax_balances(session):
+    session.create_dataframe(data=[], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
     session.create_dataframe(data=[data.tax_transfer_1], schema=data.tax_transfers_schema).write.save_as_table('data.tax_transfers')
     session.create_dataframe(data=[data.tax_collected_per_receipt_1], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
     session.create_dataframe(data=[data.region_1], schema=data.regions_schema).write.save_as_table('data.regions')
 
     result = regions.tax_balances(session).collect()
     assert result == session.create_dataframe([[data.test_region_id, data.collected_tax_cents - data.tax_transfer_amount]]).collect()
+
+def set_up_tax_changes(session, receipts=[], items=[], payments=[], regions=[], transfers=[]):
+    session.create_dataframe(data=[[datetime(2024, 1, 31)]], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
+    session.create_dataframe(data=receipts, schema=data.tax_receipts_changes_schema).write.save_as_table('ledger_state.tax_receipts_changes')
+    session.create_dataframe(data=items, schema=data.tax_items_changes_schema).write.save_as_table('ledger_state.tax_items_changes')
+    session.create_dataframe(data=payments, schema=data.tax_payments_changes_schema).write.save_as_table('ledger_state.tax_payments_changes')
+    session.create_dataframe(data=regions, schema=data.tax_regions_changes_schema).write.save_as_table('ledger_state.tax_regions_changes')
+    session.create_dataframe(data=transfers, schema=data.tax_transfers_changes_schema).write.save_as_table('ledger_state.tax_transfers_changes')
+
+def test_tax_balances_from_snapshot(session):
+    # qc was added after the snapshot
+    session.create_dataframe(data=[data.region_1, ['qc', 'Quebec', 0.15, datetime.now()]], schema=data.regions_schema).write.save_as_table('data.regions')
+    session.create_dataframe(data=[[data.test_region_id, 1200, 400]], schema=data.tax_snapshot_regions_schema).write.save_as_table('ledger_state.tax_snapshot_regions')
+    session.create_dataframe(data=[[1, data.test_region_id, 600], [2, data.test_region_id, 400], [4, data.test_region_id, 200]], schema=data.tax_snapshot_receipts_schema).write.save_as_table('ledger_state.tax_snapshot_receipts')
+    session.create_dataframe(data=[
+        [1, data.test_customer_id, data.test_region_id, datetime.now()],
+        [2, data.test_customer_id, data.test_region_id, datetime.now()],
+        [3, data.test_customer_id, 'qc', datetime.now()],
+    ], schema=data.receipts_schema).write.save_as_table('data.receipts')
+    set_up_tax_changes(
+        session,
+        # receipt 3 was created and receipt 4 deleted
+        receipts=[[3, 'INSERT'], [4, 'DELETE']],
+        # receipt 2 got an item that committed after the snapshot, however early its created_at
+        items=[[2, 'INSERT']],
+        # a payment of receipt 1 was edited
+        payments=[[1, 'DELETE'], [1, 'INSERT']],
+        # a transfer of 400 was deleted and new ones made
+        transfers=[[data.test_region_id, 400, 'DELETE'], [data.test_region_id, 100, 'INSERT'], ['qc', 20, 'INSERT']],
+    )
+    session.create_dataframe(data=[
+        [1, data.test_region_id, 4231, 550],
+        [2, data.test_region_id, 3462, 450],
+        [3, 'qc', 500, 75],
+    ], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
+
+    result = regions.tax_balances(session).sort('REGION_ID').collect()
+
+    # the same as over the full history: 550 + 450 - 100 and 75 - 20
+    assert [list(row) for row in result] == [[data.test_region_id, 900], ['qc', 55]]
+
+def test_tax_balances_after_tax_rate_change(session):
+    session.create_dataframe(data=[data.region_1, ['qc', 'Quebec', 0.15, datetime.now()]], schema=data.regions_schema).write.save_as_table('data.regions')
+    session.create_dataframe(data=[[data.test_region_id, 600, 100], ['qc', 75, 0]], schema=data.tax_snapshot_regions_schema).write.save_as_table('ledger_state.tax_snapshot_regions')
+    session.create_dataframe(data=[[1, data.test_region_id, 600], [2, 'qc', 75]], schema=data.tax_snapshot_receipts_schema).write.save_as_table('ledger_state.tax_snapshot_receipts')
+    session.create_dataframe(data=[
+        [1, data.test_customer_id, data.test_region_id, datetime.now()],
+        [2, data.test_customer_id, 'qc', datetime.now()],
+    ], schema=data.receipts_schema).write.save_as_table('data.receipts')
+    # the tax rate of ont was updated
+    set_up_tax_changes(session, regions=[[data.test_region_id, 'DELETE'], [data.test_region_id, 'INSERT']])
+    session.create_dataframe(data=[
+        [1, data.test_region_id, 4615, 700],
+        [2, 'qc', 500, 75],
+    ], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
+
+    result = regions.tax_balances(session).sort('REGION_ID').collect()
+
+    assert [list(row) for row in result] == [[data.test_region_id, 600], ['qc', 75]]
+
+def test_snapshot_tax_balances(session):
+    taken_at = datetime(2024, 1, 31)
+    session.create_dataframe(data=[[taken_at]], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
+    session.sql = MagicMock()
+    session.sql.return_value.collect.return_value = [{'TAKEN_AT': taken_at}]
+
+    result = regions.snapshot_tax_balances(session)
+
+    assert result == str(taken_at)
+    assert session.sql.call_args_list[1:] == [
+        call('begin'),
+        call(regions.REFRESH_SNAPSHOT_RECEIPTS),
+        call(regions.REFRESH_SNAPSHOT_REGIONS),
+        call('insert overwrite into ledger_state.tax_snapshot_watermark (taken_at) values (?)', params=[taken_at]),
+        call('commit'),
+    ]
+
+def test_snapshot_tax_balances_not_enabled(session):
+    session.create_dataframe(data=[], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
+    session.sql = MagicMock()
+
+    with pytest.raises(ValueError, match='Tax balance snapshots are not enabled'):
+        regions.snapshot_tax_balances(session)
+
+    session.sql.assert_not_called()
+
+def test_snapshot_tax_balances_rolls_back(session):
+    session.create_dataframe(data=[[datetime(2024, 1, 31)]], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
+    session.sql = MagicMock()
+    session.sql.return_value.collect.side_effect = [[{'TAKEN_AT': datetime(2024, 1, 31)}], None, Exception('failed'), None]
+
+    with pytest.raises(Exception, match='failed'):
+        regions.snapshot_tax_balances(session)
+
+    assert session.sql.call_args_list[-1] == call('rollback')
+
+@patch('snowflake.permissions.get_held_account_privileges', return_value=['EXECUTE MANAGED TASK'])
+def test_set_tax_snapshots(get_held_account_privileges, session):
+    taken_at = datetime(2024, 1, 31)
+    session.sql = MagicMock()
+    session.sql.return_value.collect.return_value = [{'TAKEN_AT': taken_at}]
+
+    result = regions.set_tax_snapshots(session, True)
+
+    assert result == str(taken_at)
+    assert session.sql.call_args_list == [
+        call('create or replace stream ledger_state.tax_receipts_changes on table data.receipts'),
+        call('create or replace stream ledger_state.tax_items_changes on table data.items'),
+        call('create or replace stream ledger_state.tax_payments_changes on table data.payments'),
+        call('create or replace stream ledger_state.tax_regions_changes on table data.regions'),
+        call('create or replace stream ledger_state.tax_transfers_changes on table data.tax_transfers'),
+        call('select current_timestamp()::timestamp_ntz as taken_at'),
+        call('begin'),
+        call(regions.REBUILD_SNAPSHOT_RECEIPTS),
+        call(regions.REBUILD_SNAPSHOT_REGIONS),
+        call('insert overwrite into ledger_state.tax_snapshot_watermark (taken_at) values (?)', params=[taken_at]),
+        call('commit'),
+        call(regions.CREATE_SNAPSHOT_TASK),
+        call('alter task ledger_state.tax_snapshot_task resume'),
+    ]
+
+@patch('snowflake.permissions.get_held_account_privileges', return_value=[])
+def test_set_tax_snapshots_without_managed_tasks(get_held_account_privileges, session):
+    session.sql = MagicMock()
+
+    result = regions.set_tax_snapshots(session, True)
+
+    assert 'EXECUTE MANAGED TASK' in result
+    get_held_account_privileges.assert_called_once_with(['EXECUTE MANAGED TASK'])
+    session.sql.assert_not_called()
+
+def test_unset_tax_snapshots(session):
+    session.sql = MagicMock()
+
+    result = regions.set_tax_snapshots(session, False)
+
+    assert result is None
+    assert session.sql.call_args_list == [
+        call('alter task if exists ledger_state.tax_snapshot_task suspend'),
+        call('delete from ledger_state.tax_snapshot_watermark'),
+    ]
+
+def set_up_balances(session):
+    session.create_dataframe(data=[], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
+    session.create_dataframe(data=[data.tax_transfer_1], schema=data.tax_transfers_schema).write.save_as_table('data.tax_transfers')
+    session.create_dataframe(data=[data.tax_collected_per_receipt_1], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
+    session.create_dataframe(data=[data.region_1, ['qc', 'Quebec', 0.15, datetime.now()]], schema=data.regions_schema).write.save_as_table('data.regions')
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers(session_sql, session):
+    set_up_balances(session)
+
+    result = regions.record_tax_transfers(session, [
+        {'region_id': data.test_region_id, 'amount_cents': 100},
+        [data.test_region_id, 200],
+    ]).sort('REGION_ID').collect()
+
+    assert session_sql.call_args_list == [
+        call('begin'),
+        call(
+            'insert all into data.tax_transfers (region_id, amount_cents) values (region_id, amount_cents) '
+            'select column1 as region_id, column2 as amount_cents from values (?, ?), (?, ?)',
+            params=[data.test_region_id, 100, data.test_region_id, 200]
+        ),
+        call('commit'),
+    ]
+    # the insert is mocked, so the balances are those before the batch
+    assert [list(row) for row in result] == [
+        [data.test_region_id, 300, data.collected_tax_cents - data.tax_transfer_amount],
+        ['qc', 0, 0],
+    ]
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers_with_audit_log(session_sql, session):
+    set_up_balances(session)
+
+    regions.record_tax_transfers(session, [[data.test_region_id, 100]], audit_log=True)
+
+    assert session_sql.call_args_list[1] == call(
+        'insert all into data.tax_transfers (region_id, amount_cents) values (region_id, amount_cents) '
+        'into MAILORDER_DB.LOGS.TAX_TRANSFERS (region_id, amount_cents) values (region_id, amount_cents) '
+        'select column1 as region_id, column2 as amount_cents from values (?, ?)',
+        params=[data.test_region_id, 100]
+    )
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers_chunks_large_inserts(session_sql, session):
+    set_up_balances(session)
+
+    with patch.object(regions, 'MAX_INSERT_ROWS', 2):
+        regions.record_tax_transfers(session, [[data.test_region_id, i] for i in range(1, 6)])
+
+    inserts = session_sql.call_args_list[1:-1]
+    assert [len(insert.kwargs['params']) for insert in inserts] == [4, 4, 2]
+    assert session_sql.call_args_list[-1] == call('commit')
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers_rolls_back(session_sql, session):
+    set_up_balances(session)
+    session_sql.return_value.collect.side_effect = [None, Exception('failed'), None]
+
+    with pytest.raises(Exception, match='failed'):
+        regions.record_tax_transfers(session, [[data.test_region_id, 100]])
+
+    assert session_sql.call_args_list[-1] == call('rollback')
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers_missing_regions(session_sql, session):
+    set_up_balances(session)
+
+    with pytest.raises(ValueError, match='Regions with ids=bc, mb do not exist'):
+        regions.record_tax_transfers(session, [['mb', 100], [data.test_region_id, 100], ['bc', 5], ['mb', 1]])
+
+    session_sql.assert_not_called()
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_tax_transfers_malformed(session_sql, session):
+    set_up_balances(session)
+    transfers = [
+        [data.test_region_id, 100],
+        [data.test_region_id],
+        {'region_id': data.test_region_id, 'amount': 100},
+        [data.test_region_id, '100'],
+        {'REGION_ID': data.test_region_id, 'AMOUNT_CENTS': 5},
+        [None, 100],
+        [data.test_region_id, 1.5, 'extra'],
+    ]
+
+    with pytest.raises(ValueError, match='Tax transfers at indexes=1, 2, 3, 5, 6 are not a region id and an integer amount'):
+        regions.record_tax_transfers(session, transfers)
+
+    session_sql.assert_not_called()
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_record_no_tax_transfers(session_sql, session):
+    set_up_balances(session)
+
+    result = regions.record_tax_transfers(session, []).collect()
+
+    session_sql.assert_not_called()
+    assert len(result) == 2
+
+def stage_transfers(session, tmp_path, rows):
+    csv_path = tmp_path / 'transfers.csv'
+    csv_path.write_text('region_id,amount_cents\n' + ''.join(f'{region_id},{amount_cents}\n' for region_id, amount_cents in rows))
+    session.file.put(str(csv_path), '@transfers', auto_compress=False)
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_load_tax_transfers(session_sql, session, tmp_path):
+    set_up_balances(session)
+    stage_transfers(session, tmp_path, [[data.test_region_id, 100], ['qc', 50], [data.test_region_id, 20]])
+
+    result = regions.load_tax_transfers(session, '@transfers/transfers.csv', audit_log=True).sort('REGION_ID').collect()
+
+    session_sql.assert_called_once_with(
+        'insert all into data.tax_transfers (region_id, amount_cents) values (region_id, amount_cents) '
+        'into MAILORDER_DB.LOGS.TAX_TRANSFERS (region_id, amount_cents) values (region_id, amount_cents) '
+        'select $1::text as region_id, $2::integer as amount_cents '
+        "from '@transfers/transfers.csv' (file_format => 'regions.tax_transfers_csv')"
+    )
+    # the insert is mocked, so the balances are those before the file
+    assert [list(row) for row in result] == [
+        [data.test_region_id, 120, data.collected_tax_cents - data.tax_transfer_amount],
+        ['qc', 50, 0],
+    ]
+
+@patch('snowflake.snowpark.session.Session.sql')
+def test_load_tax_transfers_missing_regions(session_sql, session, tmp_path):
+    set_up_balances(session)
+    stage_transfers(session, tmp_path, [['mb', 100], [data.test_region_id, 100]])
+
+    with pytest.raises(ValueError, match='Regions with ids=mb do not exist'):
+        regions.load_tax_transfers(session, '@transfers/transfers.csv')
+
+    session_sql.assert_not_called()
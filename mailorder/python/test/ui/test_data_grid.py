@@ -0,0 +1,53 @@
+import data_grid
+from streamlit.testing.v1 import AppTest
+import pytest as pytest
+from common_test_fixtures import session, data
+from snowflake.snowpark import Session
+
+@pytest.fixture(autouse=True)
+def set_up_tables(session: Session):
+    items = [[data.test_receipt_id, f'item{i}', 100 + i, 1, data.test_item_1[4]] for i in range(120)]
+    session.create_dataframe(data=items, schema=data.items_schema).write.save_as_table('data.items')
+
+def items_grid():
+    from snowflake.snowpark import Session
+    from data_grid import data_grid
+
+    data_grid(Session.builder.getOrCreate().table('data.items'), key='items', page_size=50, sort_by='AMOUNT_CENTS')
+
+def test_page_of(session):
+    page = data_grid.page_of(session.table('data.items'), 2, 10, 'AMOUNT_CENTS', descending=True, filter_column='NAME', filter_text='ITEM1').collect()
+
+    # item1, item10-item19 and item100-item119, from the most expensive
+    assert [row['NAME'] for row in page] == ['item109', 'item108', 'item107', 'item106', 'item105', 'item104', 'item103', 'item102', 'item101', 'item100']
+
+def test_page_of_breaks_ties(session):
+    df = session.table('data.items')
+
+    pages = [data_grid.page_of(df, page, 7, 'QUANTITY').collect() for page in range(1, 19)]
+
+    # every item has quantity 1 and the same receipt, so their names decide the order
+    names = [row['NAME'] for page in pages for row in page]
+    assert names == sorted(f'item{i}' for i in range(120))
+
+def test_data_grid_streamlit():
+    at = AppTest.from_function(items_grid)
+    at.run()
+    assert not at.exception
+
+    assert list(at.dataframe[0].value['NAME']) == [f'item{i}' for i in range(50)]
+    assert at.caption[0].value == 'Rows 1-50 of 120'
+
+    at.number_input('itemsPage').set_value(3).run()
+    assert list(at.dataframe[0].value['NAME']) == [f'item{i}' for i in range(100, 120)]
+    assert at.caption[0].value == 'Rows 101-120 of 120'
+
+    # filtering leaves a single page, so the grid goes back to it
+    at.selectbox('itemsFilterColumn').select('NAME').run()
+    at.text_input('itemsFilterText').set_value('ITEM11').run()
+    assert list(at.dataframe[0].value['NAME']) == ['item11'] + [f'item{i}' for i in range(110, 120)]
+    assert at.caption[0].value == 'Rows 1-11 of 11'
+
+    at.checkbox('itemsDescending').check().run()
+    assert at.dataframe[0].value['NAME'].iloc[0] == 'item119'
+    assert not at.exception
@@ -0,0 +1,9 @@
+import ledger_mode
+import pytest as pytest
+from common_test_fixtures import session, data
+
+@pytest.mark.parametrize('incremental, schema', [(False, 'ledger'), (True, 'ledger_incremental')])
+def test_ledger_schema(session, incremental, schema):
+    session.create_dataframe(data=[[incremental]], schema=data.ledger_mode_schema).write.save_as_table('ledger_state.mode')
+
+    assert ledger_mode.ledger_schema(session) == schema
@@ -5,18 +5,22 @@ import pytest as pytest
 from common_test_fixtures import session, data
 from snowflake.snowpark import Session
 
-@pytest.fixture(autouse=True)
-def set_up_tables(session: Session):
-    session.create_dataframe(data=[data.outstanding_customer_1], schema=data.outstanding_customers_schema).write.save_as_table('ledger.outstanding_customers')
-    session.create_dataframe(data=[data.outstanding_receipt_1], schema=data.outstanding_receipts_schema).write.save_as_table('ledger.outstanding_receipts')
-    session.create_dataframe(data=[data.receipt_paid_1], schema=data.receipt_paid_schema).write.save_as_table('ledger.receipt_paid')
-    session.create_dataframe(data=[data.receipt_total_1], schema=data.receipt_total_schema).write.save_as_table('ledger.receipt_total')
-    session.create_dataframe(data=[data.tax_collected_per_receipt_1], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
-
-def test_ledger_ui_streamlit():
+def set_up_ledger(session: Session, schema: str):
+    session.create_dataframe(data=[data.outstanding_customer_1], schema=data.outstanding_customers_schema).write.save_as_table(f'{schema}.outstanding_customers')
+    session.create_dataframe(data=[data.outstanding_receipt_1], schema=data.outstanding_receipts_schema).write.save_as_table(f'{schema}.outstanding_receipts')
+    session.create_dataframe(data=[data.receipt_paid_1], schema=data.receipt_paid_schema).write.save_as_table(f'{schema}.receipt_paid')
+    session.create_dataframe(data=[data.receipt_total_1], schema=data.receipt_total_schema).write.save_as_table(f'{schema}.receipt_total')
+    session.create_dataframe(data=[data.tax_collected_per_receipt_1], schema=data.tax_collected_per_receipt_schema).write.save_as_table(f'{schema}.tax_collected_per_receipt')
+
+@pytest.mark.parametrize('incremental, schema', [(False, 'ledger'), (True, 'ledger_incremental')])
+def test_ledger_ui_streamlit(session: Session, incremental, schema):
+    session.create_dataframe(data=[[incremental]], schema=data.ledger_mode_schema).write.save_as_table('ledger_state.mode')
+    set_up_ledger(session, schema)
+
     at = AppTest.from_function(ledger_ui.run_streamlit)
     at.run()
     assert not at.exception
+    assert any('incrementally maintained' in caption.value for caption in at.caption) == incremental
 
     # check dataframe for customers with outstanding money
     assert (at.dataframe[0].value[:].values == n.array([data.outstanding_customer_1], dtype=object)).all()
@@ -3,17 +3,27 @@ from streamlit.testing.v1 import AppTest
 import pytest as pytest
 from common_test_fixtures import session, session_sql, telemetry, data
 import receipts
+import receipts_batch
+import pandas
 from snowflake.snowpark import Session
+from snowflake.snowpark.types import IntegerType
+import streamlit as st
+
+def total_cost_batch(unit_cost: int, quantity: int) -> int:
+    return int(receipts_batch.total_cost(pandas.DataFrame([[unit_cost, quantity]]))[0])
 
 @pytest.fixture(autouse=True)
 def set_up_tables(session: Session):
+    st.cache_data.clear()
     session.create_dataframe(data=[data.customer_1], schema=data.customers_schema).write.save_as_table('data.customers')
     session.create_dataframe(data=[data.region_1], schema=data.regions_schema).write.save_as_table('data.regions')
     session.create_dataframe(data=[data.test_receipt], schema=data.receipts_schema).write.save_as_table('data.receipts')
     session.create_dataframe(data=[data.test_item_1, data.test_item_2], schema=data.items_schema).write.save_as_table('data.items')
     session.create_dataframe(data=[data.test_payment], schema=data.payments_schema).write.save_as_table('data.payments')
     session.create_dataframe(data=[data.outstanding_receipt_1], schema=data.outstanding_receipts_schema).write.save_as_table('ledger.outstanding_receipts')
-    session.udf.register(receipts.total_cost, name='receipts.total_cost')
+    # local testing calls UDFs row by row and cannot register vectorized ones, so
+    # the batch handler of total_cost_batch.sql is called with one-row batches
+    session.udf.register(total_cost_batch, name='receipts.total_cost_batch', input_types=[IntegerType(), IntegerType()], return_type=IntegerType(), packages=['pandas'])
     session.sproc.register(receipts.add_item, name='receipts.add_item')
     session.sproc.register(receipts.record_payment, name='receipts.record_payment')
     
@@ -40,7 +50,7 @@ def test_receipts_ui_streamlit(session_sql, telemetry):
     at.number_input('itemQuantity').set_value(new_qty).run()
 
     at.button('addItem').click().run()
-    session_sql.assert_called_once_with('insert into data.items (receipt_id, name, amount_cents, quantity) values (?, ?, ?, ?)', params=[data.test_receipt_id, new_item_name, new_amount, new_qty])
+    session_sql.assert_called_once_with('insert into data.items (receipt_id, name, amount_cents, quantity) select id, ?, ?, ? from data.receipts where id = ?', params=[new_item_name, new_amount, new_qty, data.test_receipt_id])
     session_sql.reset_mock()
     telemetry.add_event.assert_called_once_with('item-added', {'receipt_id': data.test_receipt_id, 'item_name': new_item_name, 'amount_cents': new_amount, 'item_quantity': new_qty})
 
@@ -51,7 +61,7 @@ def test_receipts_ui_streamlit(session_sql, telemetry):
     at.number_input('paymentAmount').set_value(payment_amount).run()
 
     at.button('addPayment').click().run()
-    session_sql.assert_called_once_with('insert into data.payments (receipt_id, method, amount_cents) values (?, ?, ?)', params=[data.test_receipt_id, payment_method, payment_amount])
+    session_sql.assert_called_once_with('insert into data.payments (receipt_id, method, amount_cents) select id, ?, ? from data.receipts where id = ?', params=[payment_method, payment_amount, data.test_receipt_id])
     session_sql.reset_mock()
 
     # test adding a new receipt
@@ -0,0 +1,37 @@
+import reference_data
+import streamlit as st
+import pytest as pytest
+from unittest.mock import patch
+from common_test_fixtures import session, data
+from snowflake.snowpark import Session
+
+@pytest.fixture(autouse=True)
+def set_up_tables(session: Session):
+    st.cache_data.clear()
+    session.create_dataframe(data=[data.customer_1], schema=data.customers_schema).write.save_as_table('data.customers')
+    session.create_dataframe(data=[data.region_1], schema=data.regions_schema).write.save_as_table('data.regions')
+
+def test_names(session):
+    assert reference_data.region_names(session) == {data.test_region_id: data.test_region_name}
+    assert reference_data.customer_names(session) == {data.test_customer_id: data.test_customer_name}
+
+def test_names_are_cached(session):
+    with patch.object(reference_data, '_names', wraps=reference_data._names) as names:
+        reference_data.region_names(session)
+        reference_data.region_names(session)
+        reference_data.customer_names(session)
+
+    assert names.call_count == 2
+
+def test_writes_from_other_apps_are_picked_up(session):
+    reference_data.region_names(session)
+    reference_data.customer_names(session)
+    # another UI inserts through its own session and cache, nothing is cleared here
+    session.create_dataframe(data=[['qc', 'Quebec', 0.15, data.region_1[3]]], schema=data.regions_schema).write.save_as_table('data.regions', mode='append')
+
+    with patch.object(reference_data, '_names', wraps=reference_data._names) as names:
+        assert reference_data.region_names(session)['qc'] == 'Quebec'
+        reference_data.customer_names(session)
+
+    # only the changed regions were reloaded
+    assert names.call_count == 1
@@ -1,6 +1,7 @@
 import tax_management_ui
 import regions as regions
 from snowflake.snowpark import Session
+import streamlit as st
 from streamlit.testing.v1 import AppTest
 import numpy as n
 import pytest as pytest
@@ -10,9 +11,11 @@ test_tax_amount = 33300
 
 @pytest.fixture(autouse=True)
 def set_up_tables(session: Session):
+    st.cache_data.clear()
     session.create_dataframe(data=[data.region_1], schema=data.regions_schema).write.save_as_table('data.regions')
     session.create_dataframe(data=[data.tax_transfer_1], schema=data.tax_transfers_schema).write.save_as_table('data.tax_transfers')
     session.create_dataframe(data=[data.tax_collected_per_receipt_1], schema=data.tax_collected_per_receipt_schema).write.save_as_table('ledger.tax_collected_per_receipt')
+    session.create_dataframe(data=[], schema=data.tax_snapshot_watermark_schema).write.save_as_table('ledger_state.tax_snapshot_watermark')
     session.sproc.register(regions.tax_balances, name='regions.tax_balances')
     session.sproc.register(regions.record_tax_transfer, name='regions.record_tax_transfer')
 
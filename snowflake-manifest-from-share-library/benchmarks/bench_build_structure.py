@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark ShareManifestGenerator._build_shared_content_structure.
+
+Usage:
+    python3 benchmarks/bench_build_structure.py [--sizes 1000 100000 1000000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from snowflake_manifest_from_share import ShareManifestGenerator
+from synthetic import synthetic_grants
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='Number of table/view grants per run (default: 1k, 100k, 1M)')
+    parser.add_argument('--roles', type=int, default=8,
+                        help='Number of database roles (default: 8)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per size, the best one is reported (default: 3)')
+    args = parser.parse_args()
+    
+    generator = ShareManifestGenerator(connection=None)
+    
+    print(f"{'grants':>10}  {'best (s)':>10}  {'grants/s':>12}")
+    for size in args.sizes:
+        grants = synthetic_grants(size, role_count=args.roles)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            generator._build_shared_content_structure(grants)
+            best = min(best, time.perf_counter() - start)
+        print(f"{len(grants):>10}  {best:>10.4f}  {len(grants) / best:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cold start of the CLI.
+
+Imports snowflake_manifest_from_share.cli in fresh interpreters with
+`python -X importtime` and reports the median cumulative import time, the
+slowest modules it pulled in and the wall time of `--help`. Exits with 1 if
+the median import time exceeds --budget-ms or if snowflake.connector was
+imported (it must only load once a connection is opened).
+
+Usage:
+    python3 benchmarks/bench_import_time.py [--runs 10] [--budget-ms 300]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULE = 'snowflake_manifest_from_share.cli'
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter; return {module: cumulative microseconds}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def help_seconds():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', MODULE, '--help'], stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10,
+                        help='Fresh interpreters to measure (default: 10)')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Fail if the median import time exceeds this many milliseconds')
+    parser.add_argument('--top', type=int, default=8,
+                        help='Number of slowest imported modules to list (default: 8)')
+    args = parser.parse_args()
+
+    runs = [import_times(MODULE) for _ in range(args.runs)]
+    median_ms = statistics.median(run[MODULE] for run in runs) / 1000
+    help_ms = statistics.median(help_seconds() for _ in range(args.runs)) * 1000
+
+    print(f"{MODULE}: {median_ms:.1f} ms median import time over {args.runs} runs")
+    print(f"--help: {help_ms:.1f} ms median wall time")
+    print("Slowest imports (cumulative ms, last run):")
+    for name, micros in sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{micros / 1000:>10.1f}  {name}")
+
+    failed = False
+    if any('snowflake.connector' in run for run in runs):
+        print("FAIL: snowflake.connector is imported at start-up", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"FAIL: import time {median_ms:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms",
+              file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of collecting SHOW GRANTS TO SHARE results.
+
+Compares reducing a fully fetched result set (execute_query_dict, i.e.
+fetchall) with streaming it (iter_query_dict, i.e. fetchmany) as done by
+ShareManifestGenerator. The connector is replaced by a fake cursor that
+produces SHOW GRANTS rows on demand, like the connector's result chunks.
+
+Usage:
+    python3 benchmarks/bench_query_memory.py [--sizes 10000 100000 1000000] [--batch-size 1000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from snowflake_manifest_from_share import ShareManifestGenerator, SnowflakeConnection
+
+
+class FakeCursor:
+    """Cursor yielding row_count synthetic SHOW GRANTS rows."""
+    
+    def __init__(self, row_count):
+        self._rows = self._generate(row_count)
+    
+    @staticmethod
+    def _generate(row_count):
+        for i in range(row_count):
+            yield {
+                'created_on': '2024-01-01 00:00:00.000 -0800',
+                'privilege': 'SELECT',
+                'granted_on': 'TABLE',
+                'name': f'DB_{i % 4}.SCHEMA_{i % 32}.TABLE_{i}',
+                'granted_to': 'SHARE',
+                'grantee_name': 'MYORG.MYACCOUNT.BENCH_SHARE',
+                'grant_option': 'false',
+                'granted_by': 'ACCOUNTADMIN',
+            }
+    
+    def execute(self, query):
+        pass
+    
+    def fetchall(self):
+        return list(self._rows)
+    
+    def fetchmany(self, size):
+        return [row for _, row in zip(range(size), self._rows)]
+    
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, row_count):
+        self.row_count = row_count
+    
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self.row_count)
+
+
+def collect_fetchall(connection):
+    """The previous grant collection: fetch everything, then reduce."""
+    results = connection.execute_query_dict("SHOW GRANTS TO SHARE BENCH_SHARE")
+    return [
+        {'privilege': r.get('privilege'), 'granted_on': r.get('granted_on'), 'name': r.get('name')}
+        for r in results
+    ]
+
+
+def collect_streaming(connection):
+    """The grant collection of ShareManifestGenerator (iter_query_dict)."""
+    return ShareManifestGenerator(connection)._get_share_grants('BENCH_SHARE')
+
+
+def measure(collect, row_count, batch_size):
+    connection = SnowflakeConnection(account='bench', user='bench', password='benchmark')
+    connection._connection = FakeConnection(row_count)
+    if batch_size:
+        iter_query_dict = connection.iter_query_dict
+        connection.iter_query_dict = lambda query, **kwargs: iter_query_dict(query, batch_size=batch_size)
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    grants = collect(connection)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(grants) == row_count
+    return peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Number of SHOW GRANTS rows per run (default: 10k, 100k, 1M)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Rows per fetchmany call (default: 1000)')
+    args = parser.parse_args()
+    
+    print(f"{'rows':>10}  {'fetchall peak':>14}  {'streaming peak':>15}  {'ratio':>6}  "
+          f"{'fetchall (s)':>12}  {'streaming (s)':>13}")
+    for size in args.sizes:
+        fetchall_peak, fetchall_seconds = measure(collect_fetchall, size, None)
+        streaming_peak, streaming_seconds = measure(collect_streaming, size, args.batch_size)
+        print(f"{size:>10}  {fetchall_peak / 2**20:>11.1f} MB  {streaming_peak / 2**20:>12.1f} MB  "
+              f"{fetchall_peak / streaming_peak:>5.2f}x  {fetchall_seconds:>12.3f}  {streaming_seconds:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
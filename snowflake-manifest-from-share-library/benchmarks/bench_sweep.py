@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Sweep analyze_share over synthetic share topologies.
+
+Every combination of --object-counts, --role-counts and --grants-per-role is
+served by a ReplayConnection (optionally with simulated per-query latency)
+and run in a fresh worker process, so the peak RSS of one point does not
+leak into the next. Each point reports the throughput of analyze_share, the
+peak RSS of its process (including the synthetic query results) and the
+time spent per generation phase and in YAML serialization, as a table and
+optionally as JSON and CSV.
+
+Points run --jobs at a time; keep the default of 1 for stable timings.
+
+Usage:
+    python3 benchmarks/bench_sweep.py [--object-counts 1000 10000] [--role-counts 10 100]
+        [--grants-per-role 100] [--latency 0.01] [--max-workers 8] [--jobs 4]
+        [--json sweep.json] [--csv sweep.csv]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from snowflake_manifest_from_share import Instrumentation, ReplayConnection, ShareManifestGenerator, YAMLFormatter
+from snowflake_manifest_from_share.instrumentation import PHASE, YAML
+from snowflake_manifest_from_share.share_manifest_generator import DEFAULT_BATCH_THRESHOLD
+from synthetic import synthetic_share_results
+
+SHARE_NAME = 'BENCH_SHARE'
+
+# Generation phases reported per point, in pipeline order
+PHASES = ('share_grants', 'database_role_grants', 'build_structure')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def run_point(point):
+    """Benchmark one sweep point; runs in its own worker process."""
+    results = synthetic_share_results(SHARE_NAME, point['objects'], role_count=point['roles'],
+                                      grants_per_role=point['grants_per_role'])
+    grant_count = sum(len(rows) for query, rows in results.items() if query.startswith('SHOW GRANTS'))
+
+    best = None
+    for _ in range(point['repeat']):
+        instrumentation = Instrumentation()
+        connection = ReplayConnection.from_results(results, latency=point['latency'],
+                                                   instrumentation=instrumentation)
+        generator = ShareManifestGenerator(connection, max_workers=point['max_workers'],
+                                           batch_threshold=point['batch_threshold'],
+                                           instrumentation=instrumentation)
+        formatter = YAMLFormatter(engine=point['yaml_engine'], instrumentation=instrumentation)
+
+        start = time.perf_counter()
+        manifest = generator.analyze_share(SHARE_NAME)
+        seconds = time.perf_counter() - start
+        with open(os.devnull, 'w', encoding='utf-8') as devnull:
+            formatter.write_manifest(manifest, devnull)
+
+        if best is None or seconds < best[0]:
+            best = (seconds, instrumentation, connection.queries_served)
+
+    seconds, instrumentation, queries = best
+    totals = {(group['category'], group['name']): group['total'] for group in instrumentation.summary()}
+    row = dict(point)
+    del row['repeat']
+    row.update({
+        'grants': grant_count,
+        'queries': queries,
+        'analyze_s': round(seconds, 6),
+        'grants_per_s': round(grant_count / seconds) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+    for phase in PHASES:
+        row[f'{phase}_s'] = round(totals.get((PHASE, phase), 0.0), 6)
+    row['yaml_s'] = round(totals.get((YAML, 'write_manifest'), 0.0), 6)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--object-counts', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Tables/views granted to the share directly (default: 1k, 10k, 100k)')
+    parser.add_argument('--role-counts', type=int, nargs='+', default=[10, 100],
+                        help='Database roles granted to the share (default: 10, 100)')
+    parser.add_argument('--grants-per-role', type=int, nargs='+', default=[100],
+                        help='Tables/views granted by each database role (default: 100)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated seconds per query (default: 0)')
+    parser.add_argument('--max-workers', type=int, default=1,
+                        help='ShareManifestGenerator max_workers (default: 1)')
+    parser.add_argument('--batch-threshold', type=int, default=DEFAULT_BATCH_THRESHOLD,
+                        help=f'ShareManifestGenerator batch_threshold (default: {DEFAULT_BATCH_THRESHOLD})')
+    parser.add_argument('--yaml-engine', choices=('pyyaml', 'fast'), default='pyyaml',
+                        help='YAML engine used to write the manifest (default: pyyaml)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per point, the fastest one is reported (default: 1)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Points benchmarked concurrently (default: 1)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='Write the results as JSON to FILE')
+    parser.add_argument('--csv', metavar='FILE',
+                        help='Write the results as CSV to FILE')
+    args = parser.parse_args()
+
+    points = [
+        {'objects': objects, 'roles': roles, 'grants_per_role': grants_per_role,
+         'latency': args.latency, 'max_workers': args.max_workers, 'batch_threshold': args.batch_threshold,
+         'yaml_engine': args.yaml_engine, 'repeat': args.repeat}
+        for objects, roles, grants_per_role in itertools.product(
+            args.object_counts, args.role_counts, args.grants_per_role)
+    ]
+
+    print(f"{'objects':>8}  {'roles':>6}  {'per role':>8}  {'grants':>9}  {'queries':>7}  {'analyze (s)':>11}  "
+          f"{'grants/s':>10}  {'RSS (MB)':>8}  {'share (s)':>9}  {'roles (s)':>9}  {'build (s)':>9}  "
+          f"{'yaml (s)':>8}")
+    rows = []
+    # One process per point (maxtasksperchild=1) keeps the RSS peaks apart
+    with multiprocessing.Pool(processes=args.jobs, maxtasksperchild=1) as pool:
+        for row in pool.imap(run_point, points):
+            rows.append(row)
+            print(f"{row['objects']:>8}  {row['roles']:>6}  {row['grants_per_role']:>8}  {row['grants']:>9}  "
+                  f"{row['queries']:>7}  {row['analyze_s']:>11.3f}  {row['grants_per_s']:>10}  "
+                  f"{row['peak_rss_mb']:>8.1f}  {row['share_grants_s']:>9.3f}  "
+                  f"{row['database_role_grants_s']:>9.3f}  {row['build_structure_s']:>9.3f}  "
+                  f"{row['yaml_s']:>8.3f}", flush=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': rows}, f, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark identifier validation against the previous implementation.
+
+The previous _validate_identifier compiled-and-ran six patterns plus a
+character-class pattern on every call; it is kept below as legacy_validate.
+The identifiers repeat like role and database names do in a real share.
+
+Usage:
+    python3 benchmarks/bench_validate_identifier.py [--count 1000000] [--distinct 2000]
+"""
+
+import argparse
+import re
+import time
+
+from snowflake_manifest_from_share.share_manifest_generator import (
+    _identifier_error,
+    _validate_identifier,
+    validate_identifiers,
+)
+
+
+def legacy_validate(identifier, context="identifier"):
+    """The previous _validate_identifier, unchanged."""
+    if not identifier or not isinstance(identifier, str):
+        raise ValueError(f"Invalid {context}: must be a non-empty string")
+    identifier = identifier.strip()
+    dangerous_patterns = [
+        r'[;\'"\\]',
+        r'\b(DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE)\b',
+        r'--',
+        r'/\*',
+        r'\bOR\b.*\b1\s*=\s*1\b',
+        r'\bUNION\b',
+    ]
+    for pattern in dangerous_patterns:
+        if re.search(pattern, identifier, re.IGNORECASE):
+            raise ValueError(f"Invalid {context}: contains dangerous characters or keywords")
+    if not re.match(r'^[A-Za-z0-9_.$-]+$', identifier):
+        raise ValueError(f"Invalid {context}: contains invalid characters")
+    if len(identifier) > 255:
+        raise ValueError(f"Invalid {context}: too long (max 255 characters)")
+    return identifier
+
+
+def identifiers(count, distinct):
+    names = [f'DB_{i % 16}.DATABASE_ROLE_{i}' for i in range(distinct)]
+    return [names[i % distinct] for i in range(count)]
+
+
+def timed(label, fn, baseline=None):
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    speedup = f"{baseline / seconds:>8.1f}x" if baseline else f"{'':>9}"
+    print(f"{label:<32}  {seconds:>9.3f}  {speedup}")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000,
+                        help='Number of identifiers to validate (default: 1M)')
+    parser.add_argument('--distinct', type=int, default=2000,
+                        help='Number of distinct identifiers among them (default: 2000)')
+    args = parser.parse_args()
+    
+    names = identifiers(args.count, args.distinct)
+    unique = identifiers(args.count, args.count)
+    
+    print(f"{'validator':<32}  {'seconds':>9}  {'speedup':>9}")
+    baseline = timed('legacy', lambda: [legacy_validate(n) for n in names])
+    _identifier_error.cache_clear()
+    timed('_validate_identifier', lambda: [_validate_identifier(n) for n in names], baseline)
+    _identifier_error.cache_clear()
+    timed('validate_identifiers (bulk)', lambda: validate_identifiers(names), baseline)
+    
+    print(f"\nAll {args.count} identifiers distinct (no cache hits):")
+    baseline = timed('legacy', lambda: [legacy_validate(n) for n in unique])
+    _identifier_error.cache_clear()
+    timed('validate_identifiers (bulk)', lambda: validate_identifiers(unique), baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing a manifest: format_manifest + write vs. streaming save_to_file.
+
+Peak memory is measured with tracemalloc in a separate run from the timings,
+since tracing slows allocation-heavy code down.
+
+Usage:
+    python3 benchmarks/bench_write_manifest.py [--sizes 10000 100000 500000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from snowflake_manifest_from_share import YAMLFormatter
+from synthetic import synthetic_manifest
+
+
+def write_formatted(formatter, manifest, filename):
+    """The previous save_to_file: render the whole document, then write it."""
+    content = formatter.format_manifest(manifest)
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def write_streaming(formatter, manifest, filename):
+    formatter.save_to_file(manifest, filename)
+
+
+def measure(write, formatter, manifest, filename):
+    start = time.perf_counter()
+    write(formatter, manifest, filename)
+    seconds = time.perf_counter() - start
+    
+    tracemalloc.start()
+    write(formatter, manifest, filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000],
+                        help='Number of tables/views in the manifest (default: 10k, 100k, 500k)')
+    args = parser.parse_args()
+    
+    formatter = YAMLFormatter()
+    print(f"libyaml: {'yes' if yaml.__with_libyaml__ else 'no'}")
+    print(f"{'objects':>10}  {'size':>9}  {'format+write peak':>17}  {'streaming peak':>14}  "
+          f"{'format+write (s)':>16}  {'streaming (s)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'manifest.yml')
+        for size in args.sizes:
+            manifest = synthetic_manifest(size)
+            formatted_peak, formatted_seconds = measure(write_formatted, formatter, manifest, filename)
+            streaming_peak, streaming_seconds = measure(write_streaming, formatter, manifest, filename)
+            file_size = os.path.getsize(filename)
+            print(f"{size:>10}  {file_size / 2**20:>6.1f} MB  {formatted_peak / 2**20:>14.1f} MB  "
+                  f"{streaming_peak / 2**20:>11.1f} MB  {formatted_seconds:>16.3f}  {streaming_seconds:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
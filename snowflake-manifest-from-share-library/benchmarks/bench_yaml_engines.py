@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark YAML serialization throughput of the formatter engines.
+
+Compares format_manifest with the default PyYAML engine, streaming with
+write_manifest, and the fast engine, on synthetic manifests. The outputs are
+checked to be identical.
+
+Usage:
+    python3 benchmarks/bench_yaml_engines.py [--sizes 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import io
+import time
+
+import yaml
+
+from snowflake_manifest_from_share import YAMLFormatter
+from synthetic import synthetic_manifest
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def streamed(formatter, manifest):
+    stream = io.StringIO()
+    formatter.write_manifest(manifest, stream)
+    return stream.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='Number of tables/views in the manifest (default: 10k, 100k)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per engine, the best one is reported (default: 3)')
+    args = parser.parse_args()
+    
+    pyyaml = YAMLFormatter()
+    fast = YAMLFormatter(engine='fast')
+    engines = [
+        ('pyyaml format_manifest', lambda m: pyyaml.format_manifest(m)),
+        ('pyyaml write_manifest', lambda m: streamed(pyyaml, m)),
+        ('fast format_manifest', lambda m: fast.format_manifest(m)),
+        ('fast write_manifest', lambda m: streamed(fast, m)),
+    ]
+    
+    print(f"libyaml: {'yes' if yaml.__with_libyaml__ else 'no'}")
+    print(f"{'objects':>10}  {'engine':<24}  {'best (s)':>9}  {'MB/s':>8}  {'objects/s':>12}  {'speedup':>8}")
+    for size in args.sizes:
+        manifest = synthetic_manifest(size)
+        baseline = None
+        expected = None
+        for name, render in engines:
+            seconds, output = best_of(args.repeat, lambda: render(manifest))
+            if expected is None:
+                baseline, expected = seconds, output
+            assert output == expected, f"{name} output differs from PyYAML"
+            print(f"{size:>10}  {name:<24}  {seconds:>9.3f}  {len(output) / 2**20 / seconds:>8.1f}  "
+                  f"{size / seconds:>12,.0f}  {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Synthetic grant data for the benchmarks.
+
+Grants are generated deterministically so that runs are comparable.
+"""
+
+from typing import Any, Dict, List
+
+
+def synthetic_grants(object_count: int,
+                     role_count: int = 8,
+                     databases: int = 4,
+                     schemas_per_database: int = 8) -> List[Dict[str, Any]]:
+    """
+    Build a combined grant list as consumed by _build_shared_content_structure.
+    
+    Args:
+        object_count: Number of table/view SELECT grants to generate
+        role_count: Number of database roles the objects are spread over
+        databases: Number of databases
+        schemas_per_database: Number of schemas in each database
+        
+    Returns:
+        List of {'grant': ..., 'role': ...} dictionaries
+    """
+    roles = [f'ROLE_{i}' for i in range(role_count)]
+    grants = []
+    
+    for d in range(databases):
+        db_name = f'DB_{d}'
+        grants.append(_grant('USAGE', 'DATABASE', db_name, None))
+        for role in roles:
+            grants.append(_grant('USAGE', 'DATABASE_ROLE', f'{db_name}.{role}', None))
+        for s in range(schemas_per_database):
+            for role in roles:
+                grants.append(_grant('USAGE', 'SCHEMA', f'{db_name}.SCHEMA_{s}', role))
+    
+    schema_count = databases * schemas_per_database
+    for i in range(object_count):
+        schema = i % schema_count
+        db_name = f'DB_{schema // schemas_per_database}'
+        schema_name = f'SCHEMA_{schema % schemas_per_database}'
+        granted_on = 'VIEW' if i % 5 == 0 else 'TABLE'
+        role = roles[i % role_count] if role_count and i % 7 else None
+        grants.append(_grant('SELECT', granted_on, f'{db_name}.{schema_name}.OBJECT_{i}', role))
+    
+    return grants
+
+
+def synthetic_manifest(object_count: int, role_count: int = 8) -> Dict[str, Any]:
+    """
+    Build a complete manifest (as returned by analyze_share) over synthetic grants.
+    
+    Args:
+        object_count: Number of tables/views in the manifest
+        role_count: Number of database roles
+        
+    Returns:
+        Manifest dictionary
+    """
+    from snowflake_manifest_from_share import ShareManifestGenerator
+    
+    generator = ShareManifestGenerator(connection=None)
+    shared_content, _ = generator._build_shared_content_structure(
+        synthetic_grants(object_count, role_count=role_count)
+    )
+    role_info = {f'ROLE_{i}': {'comment': f'Role {i}' if i % 2 else ''} for i in range(role_count)}
+    return {
+        'manifest_version': 2,
+        'roles': generator._build_roles_section(role_info),
+        'shared_content': shared_content
+    }
+
+
+def synthetic_share_results(share_name: str,
+                            object_count: int,
+                            role_count: int = 8,
+                            grants_per_role: int = 100,
+                            databases: int = 4,
+                            schemas_per_database: int = 8) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Build the SHOW results of a synthetic share, for ReplayConnection.from_results.
+    
+    The share is granted object_count tables/views and role_count database
+    roles (spread over the databases), each of which grants grants_per_role
+    objects of its database.
+    
+    Args:
+        share_name: Name of the share
+        object_count: Number of table/view SELECT grants to the share itself
+        role_count: Number of database roles granted to the share
+        grants_per_role: Number of table/view SELECT grants of each role
+        databases: Number of databases
+        schemas_per_database: Number of schemas in each database
+        
+    Returns:
+        Dictionary mapping each query to its result rows
+    """
+    share_grants = []
+    results = {f'SHOW GRANTS TO SHARE {share_name}': share_grants}
+    
+    for d in range(databases):
+        db_name = f'DB_{d}'
+        share_grants.append(_row('USAGE', 'DATABASE', db_name))
+        for s in range(schemas_per_database):
+            share_grants.append(_row('USAGE', 'SCHEMA', f'{db_name}.SCHEMA_{s}'))
+        results[f'SHOW DATABASE ROLES IN DATABASE {db_name}'] = [
+            {'name': f'ROLE_{r}', 'comment': f'Role {r}' if r % 2 else ''}
+            for r in range(d, role_count, databases)
+        ]
+    
+    schema_count = databases * schemas_per_database
+    for i in range(object_count):
+        schema = i % schema_count
+        granted_on = 'VIEW' if i % 5 == 0 else 'TABLE'
+        share_grants.append(_row('SELECT', granted_on, f'DB_{schema // schemas_per_database}.'
+                                                       f'SCHEMA_{schema % schemas_per_database}.OBJECT_{i}'))
+    
+    for r in range(role_count):
+        db_name = f'DB_{r % databases}'
+        share_grants.append(_row('USAGE', 'DATABASE_ROLE', f'{db_name}.ROLE_{r}'))
+        role_grants = [_row('USAGE', 'DATABASE', db_name)]
+        for g in range(grants_per_role):
+            # Roles overlap on half of their objects, like real roles do
+            i = g if g % 2 else r * grants_per_role + g
+            granted_on = 'VIEW' if i % 5 == 0 else 'TABLE'
+            role_grants.append(_row('SELECT', granted_on,
+                                    f'{db_name}.SCHEMA_{i % schemas_per_database}.ROLE_OBJECT_{i}'))
+        results[f'SHOW GRANTS TO DATABASE ROLE {db_name}.ROLE_{r}'] = role_grants
+    
+    return results
+
+
+def _row(privilege: str, granted_on: str, name: str) -> Dict[str, Any]:
+    return {'privilege': privilege, 'granted_on': granted_on, 'name': name}
+
+
+def _grant(privilege: str, granted_on: str, name: str, role) -> Dict[str, Any]:
+    return {
+        'grant': {'privilege': privilege, 'granted_on': granted_on, 'name': name},
+        'role': role
+    }
@@ -4,11 +4,43 @@ Snowflake Manifest from Share
 A Python library to create declarative application manifests from secure data shares.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.1.0"
 __author__ = "Mohammed Shamil"
 
-from .share_manifest_generator import ShareManifestGenerator
-from .connection import SnowflakeConnection
-from .yaml_formatter import YAMLFormatter
+# Public names and the modules defining them. They are imported on first
+# access (PEP 562), so importing one submodule does not load all the others.
+_EXPORTS = {
+    "ShareManifestGenerator": ".share_manifest_generator",
+    "SnowflakeConnection": ".connection",
+    "YAMLFormatter": ".yaml_formatter",
+    "GrantSnapshotCache": ".snapshot_cache",
+    "RecordingConnection": ".replay",
+    "ReplayConnection": ".replay",
+    "Instrumentation": ".instrumentation",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .share_manifest_generator import ShareManifestGenerator
+    from .connection import SnowflakeConnection
+    from .yaml_formatter import YAMLFormatter
+    from .snapshot_cache import GrantSnapshotCache
+    from .replay import RecordingConnection, ReplayConnection
+    from .instrumentation import Instrumentation
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["ShareManifestGenerator", "SnowflakeConnection", "YAMLFormatter"]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
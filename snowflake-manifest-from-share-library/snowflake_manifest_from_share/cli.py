@@ -7,10 +7,23 @@ import argparse
 import logging
 import sys
 import os
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 from .connection import SnowflakeConnection, _secure_read_private_key
-from .share_manifest_generator import ShareManifestGenerator
-from .yaml_formatter import YAMLFormatter
+from .instrumentation import Instrumentation
+from .manifest_diff import diff_manifests, diff_to_json, format_diff, load_manifest
+from .share_manifest_generator import DEFAULT_BATCH_THRESHOLD, ShareManifestGenerator
+from .snapshot_cache import DEFAULT_CACHE_TTL, GrantSnapshotCache
+from .replay import RecordingConnection, ReplayConnection
+from .yaml_formatter import ENGINES as YAML_ENGINES, YAMLFormatter
+
+
+MAX_DEFAULT_POOL_SIZE = 8
+
+# Exit codes of the diff subcommand (0: no drift)
+DIFF_EXIT_DRIFT = 1
+DIFF_EXIT_ERROR = 2
 
 
 def setup_logging(verbose: bool = False):
@@ -23,7 +36,8 @@ def setup_logging(verbose: bool = False):
     )
 
 
-def get_connection_from_args(args) -> SnowflakeConnection:
+def get_connection_from_args(args, pool_size: int = 1,
+                             instrumentation: Optional[Instrumentation] = None) -> SnowflakeConnection:
     """Create SnowflakeConnection from command line arguments."""
     # Validate that either account or host is provided
     if not args.account and not args.host:
@@ -68,11 +82,341 @@ def get_connection_from_args(args) -> SnowflakeConnection:
     if args.role:
         connection_params['role'] = args.role
     
-    return SnowflakeConnection(**connection_params)
+    return SnowflakeConnection(**connection_params, pool_size=pool_size, instrumentation=instrumentation)
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the Snowflake connection and offline record/replay options to a parser."""
+    # Connection parameters
+    parser.add_argument('--account',
+                       help='Snowflake account identifier or full URL (e.g., https://myaccount.snowflakecomputing.com)')
+    parser.add_argument('--host',
+                       help='Snowflake host (e.g., myaccount.region.cloud.snowflakecomputing.com)')
+    parser.add_argument('--user',
+                       help='Snowflake username (required unless --replay is used)')
+    parser.add_argument('--password',
+                       help='Snowflake password (if using password auth)')
+    parser.add_argument('--private-key-path',
+                       help='Path to private key file (if using key-pair auth)')
+    parser.add_argument('--private-key-passphrase',
+                       help='Passphrase for private key')
+    parser.add_argument('--authenticator', default='snowflake',
+                       help='Authentication method (default: snowflake)')
+    parser.add_argument('--warehouse',
+                       help='Snowflake warehouse to use')
+    parser.add_argument('--database',
+                       help='Default database')
+    parser.add_argument('--schema',
+                       help='Default schema')
+    parser.add_argument('--role',
+                       help='Snowflake role to use')
+    
+    # Offline record/replay options
+    parser.add_argument('--record', metavar='FILE',
+                       help='Record every query and its result to FILE (.gz for compression)')
+    parser.add_argument('--replay', metavar='FILE',
+                       help='Serve queries from a recording instead of connecting to Snowflake')
+    parser.add_argument('--replay-latency', type=float, default=0.0, metavar='SECONDS',
+                       help='Simulated latency per replayed query (default: 0)')
+
+
+def add_snapshot_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the grant snapshot cache options to a parser."""
+    parser.add_argument('--cache-dir',
+                       help='Directory for grant snapshots (enables the snapshot cache; '
+                            'default: ~/.cache/snowflake-manifest-from-share)')
+    parser.add_argument('--cache-ttl', type=float,
+                       help=f'Seconds a cached snapshot is reused without querying Snowflake '
+                            f'(enables the snapshot cache; default: {DEFAULT_CACHE_TTL})')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Ignore cached grants, re-read everything and rewrite the snapshot '
+                            '(enables the snapshot cache)')
+
+
+def validate_connection_args(args, exit_code: int = 1) -> None:
+    """Exit with exit_code if the connection options are incomplete or conflicting."""
+    logger = logging.getLogger(__name__)
+    
+    if args.record and args.replay:
+        logger.error("--record and --replay cannot be used together")
+        sys.exit(exit_code)
+    
+    if args.replay_latency < 0:
+        logger.error("--replay-latency must not be negative")
+        sys.exit(exit_code)
+    
+    if args.replay:
+        return
+    
+    if not args.account and not args.host:
+        logger.error("Either --account or --host must be provided")
+        sys.exit(exit_code)
+    
+    # Validate authentication parameters
+    if not args.user:
+        logger.error("Must provide --user")
+        sys.exit(exit_code)
+    
+    if not args.password and not args.private_key_path:
+        logger.error("Must provide either --password or --private-key-path")
+        sys.exit(exit_code)
+
+
+def open_connection_from_args(args, pool_size: int = 1,
+                              instrumentation: Optional[Instrumentation] = None) -> Any:
+    """Create the query connection: a replay of --replay, or Snowflake (recorded with --record)."""
+    logger = logging.getLogger(__name__)
+    
+    if args.replay:
+        logger.info(f"Replaying recorded queries from: {args.replay}")
+        return ReplayConnection(args.replay, latency=args.replay_latency, instrumentation=instrumentation)
+    
+    logger.info("Establishing connection to Snowflake...")
+    connection = get_connection_from_args(args, pool_size=pool_size, instrumentation=instrumentation)
+    if args.record:
+        connection = RecordingConnection(connection, args.record)
+    return connection
+
+
+def get_pool_size_from_args(args) -> int:
+    """
+    Return the connection pool size: --pool-size, or else the number of
+    queries that can run concurrently, capped at MAX_DEFAULT_POOL_SIZE.
+    """
+    if args.pool_size is not None:
+        return args.pool_size
+    
+    several_shares = bool(args.output_dir or args.shares_file or args.all_shares or len(args.share or []) > 1)
+    concurrency = args.max_workers * (args.share_workers if several_shares else 1)
+    return min(concurrency, MAX_DEFAULT_POOL_SIZE)
+
+
+def get_cache_scope_from_args(args) -> str:
+    """
+    Identify where the grants are read from: the replayed recording, or the
+    account, user and role (the user's default role if --role is not given).
+    """
+    if args.replay:
+        return f"replay:{os.path.abspath(args.replay)}"
+    
+    account = (args.host or args.account or '').lower()
+    for prefix in ('https://', 'http://'):
+        if account.startswith(prefix):
+            account = account[len(prefix):]
+    return f"account:{account.rstrip('/')};user:{(args.user or '').lower()};role:{(args.role or '').upper()}"
+
+
+def get_snapshot_cache_from_args(args) -> Optional[GrantSnapshotCache]:
+    """Create the grant snapshot cache if any of the cache options was given."""
+    if args.cache_dir is None and args.cache_ttl is None and not args.refresh:
+        return None
+    
+    return GrantSnapshotCache(
+        cache_dir=args.cache_dir,
+        ttl=args.cache_ttl if args.cache_ttl is not None else DEFAULT_CACHE_TTL,
+        refresh=args.refresh,
+        scope=get_cache_scope_from_args(args)
+    )
+
+
+def get_listed_share_names_from_args(args) -> List[str]:
+    """
+    Collect the share names listed on the command line with --share and
+    --shares-file, in that order; duplicates are dropped.
+    """
+    share_names = list(args.share or [])
+    
+    if args.shares_file:
+        with open(args.shares_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    share_names.append(line)
+    
+    return list(dict.fromkeys(share_names))
+
+
+def get_share_names_from_args(args, connection: SnowflakeConnection,
+                              listed_share_names: Optional[List[str]] = None) -> List[str]:
+    """
+    Collect the share names requested on the command line.
+    
+    Shares from --share, --shares-file and --all-shares are combined in that
+    order; duplicates are dropped. listed_share_names saves re-reading the
+    shares file when get_listed_share_names_from_args was already called.
+    """
+    if listed_share_names is None:
+        listed_share_names = get_listed_share_names_from_args(args)
+    share_names = list(listed_share_names)
+    
+    if args.all_shares:
+        share_names.extend(ShareManifestGenerator(connection).list_outbound_shares())
+    
+    share_names = list(dict.fromkeys(share_names))
+    if not share_names:
+        raise ValueError("No shares to generate manifests for")
+    return share_names
+
+
+def generate_manifests(connection: SnowflakeConnection,
+                       share_names: List[str],
+                       output_dir: str,
+                       formatter: YAMLFormatter,
+                       share_workers: int = 4,
+                       **generator_options) -> List[Dict[str, Any]]:
+    """
+    Generate and save the manifests of several shares over one connection.
+    
+    Args:
+        connection: Connection shared by all shares
+        share_names: Names of the data shares
+        output_dir: Directory receiving one <SHARE>.yml file per share
+        formatter: Formatter used to save the manifests
+        share_workers: Maximum number of shares processed concurrently
+        **generator_options: Extra ShareManifestGenerator arguments
+        
+    Returns:
+        One summary entry per share (in share_names order) with 'share',
+        'status', 'seconds' and either 'output' or 'error'
+    """
+    logger = logging.getLogger(__name__)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    def generate(share_name: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            # Generators keep per-run state, so every share gets its own
+            generator = ShareManifestGenerator(connection, **generator_options)
+            manifest_result = generator.analyze_share(share_name)
+            output = os.path.join(output_dir, f"{share_name}.yml")
+            formatter.save_to_file(manifest_result, output)
+            return {'share': share_name, 'status': 'ok',
+                    'seconds': time.perf_counter() - start, 'output': output}
+        except Exception as e:
+            logger.error(f"Manifest generation failed for share {share_name}: {e}")
+            return {'share': share_name, 'status': 'failed',
+                    'seconds': time.perf_counter() - start, 'error': str(e)}
+    
+    workers = min(share_workers, len(share_names))
+    logger.info(f"Generating manifests for {len(share_names)} shares with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(generate, share_names))
+
+
+def print_summary(summary: List[Dict[str, Any]]) -> None:
+    """Print the per-share timing summary of a batch run to stderr."""
+    width = max([len('Share')] + [len(item['share']) for item in summary])
+    print(f"{'Share':<{width}}  {'Status':<6}  {'Seconds':>8}  Output", file=sys.stderr)
+    for item in summary:
+        detail = item.get('output') or item.get('error', '')
+        print(f"{item['share']:<{width}}  {item['status']:<6}  {item['seconds']:>8.2f}  {detail}",
+              file=sys.stderr)
+    total = sum(item['seconds'] for item in summary)
+    failed = sum(1 for item in summary if item['status'] != 'ok')
+    print(f"{len(summary)} shares, {failed} failed, {total:.2f}s total share time", file=sys.stderr)
+
+
+def report_profile(instrumentation: Instrumentation, args) -> None:
+    """Print the timing table (--profile) and write the Chrome trace (--profile-trace)."""
+    if args.profile:
+        print(instrumentation.format_summary(), file=sys.stderr)
+    if args.profile_trace:
+        instrumentation.write_chrome_trace(args.profile_trace)
+
+
+def diff_main(argv: Optional[List[str]] = None) -> None:
+    """
+    Entry point of the diff subcommand.
+    
+    Collects the current grants of a share (or reuses its cached snapshot)
+    and compares them with an existing manifest, without rendering YAML.
+    Exits with 0 if nothing changed, DIFF_EXIT_DRIFT on drift and
+    DIFF_EXIT_ERROR on errors.
+    """
+    parser = argparse.ArgumentParser(
+        prog='snowflake-manifest-from-share diff',
+        description='Report grant drift between a data share and an existing manifest',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exit status: 0 without drift, 1 on drift, 2 on errors.
+
+Examples:
+  # Check a share against its committed manifest
+  snowflake-manifest-from-share diff --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --manifest manifest.yml
+
+  # Check against the grants cached by a previous run, if they are less than an hour old
+  snowflake-manifest-from-share diff --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --manifest manifest.yml --cache-ttl 3600
+        """
+    )
+    
+    add_connection_arguments(parser)
+    parser.add_argument('--share', required=True,
+                       help='Name of the data share to check')
+    parser.add_argument('--manifest', required=True,
+                       help='Existing manifest YAML file to compare the share with')
+    parser.add_argument('--format', choices=('text', 'json'), default='text',
+                       help='Report format (default: text)')
+    parser.add_argument('--max-workers', type=int, default=1,
+                       help='Number of database roles to fetch concurrently (default: 1)')
+    parser.add_argument('--batch-threshold', type=int, default=DEFAULT_BATCH_THRESHOLD,
+                       help='Number of database roles from which their grants are collected in '
+                            f'multi-statement requests (0 disables batching; default: {DEFAULT_BATCH_THRESHOLD})')
+    add_snapshot_cache_arguments(parser)
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Enable verbose logging')
+    
+    args = parser.parse_args(argv)
+    
+    setup_logging(args.verbose)
+    logger = logging.getLogger(__name__)
+    
+    validate_connection_args(args, exit_code=DIFF_EXIT_ERROR)
+    
+    if args.max_workers < 1 or args.batch_threshold < 0 or (args.cache_ttl is not None and args.cache_ttl < 0):
+        logger.error("--max-workers must be at least 1; --batch-threshold and --cache-ttl must not be negative")
+        sys.exit(DIFF_EXIT_ERROR)
+    
+    try:
+        existing = load_manifest(args.manifest)
+        
+        connection = open_connection_from_args(args, pool_size=min(args.max_workers, MAX_DEFAULT_POOL_SIZE))
+        try:
+            generator = ShareManifestGenerator(
+                connection,
+                max_workers=args.max_workers,
+                snapshot_cache=get_snapshot_cache_from_args(args),
+                batch_threshold=args.batch_threshold
+            )
+            current = generator.analyze_share(args.share)
+        finally:
+            connection.close()
+        
+        # Unreadable grants would otherwise be reported as removed objects
+        if not generator.complete:
+            raise RuntimeError(f"Could not read all grants of share {args.share}")
+        
+        diff = diff_manifests(existing, current)
+    except KeyboardInterrupt:
+        logger.info("Manifest diff interrupted by user")
+        sys.exit(DIFF_EXIT_ERROR)
+    except Exception as e:
+        logger.error(f"Manifest diff failed: {e}")
+        if args.verbose:
+            logger.exception("Full traceback:")
+        sys.exit(DIFF_EXIT_ERROR)
+    
+    print(diff_to_json(diff) if args.format == 'json' else format_diff(diff))
+    
+    if diff.has_drift:
+        sys.exit(DIFF_EXIT_DRIFT)
 
 
 def main():
     """Main CLI entry point."""
+    if sys.argv[1:2] == ['diff']:
+        diff_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description='Create declarative application manifest from secure data share',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -92,44 +436,69 @@ Examples:
 
   # With custom output file and warehouse
   snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --output manifest.yml --warehouse COMPUTE_WH
+
+  # Several shares in one run, one manifest per share in ./manifests
+  snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share SHARE_A --share SHARE_B --output-dir manifests
+  snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --all-shares --output-dir manifests --share-workers 8
+
+  # Record the queries of a run, then generate the manifest again offline
+  snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --record myshare.json.gz
+  snowflake-manifest-from-share --replay myshare.json.gz --replay-latency 0.05 --share MYSHARE
+
+  # Print per-phase and per-query timings and save a Chrome trace
+  snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --profile --profile-trace trace.json
+
+  # Reuse grants cached by a previous run for up to an hour
+  snowflake-manifest-from-share --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --cache-ttl 3600
+
+  # Report grant drift against an existing manifest (see: snowflake-manifest-from-share diff --help)
+  snowflake-manifest-from-share diff --host myaccount.region.cloud.snowflakecomputing.com --user myuser --password mypass --share MYSHARE --manifest manifest.yml
         """
     )
     
-    # Connection parameters
-    parser.add_argument('--account',
-                       help='Snowflake account identifier or full URL (e.g., https://myaccount.snowflakecomputing.com)')
-    parser.add_argument('--host',
-                       help='Snowflake host (e.g., myaccount.region.cloud.snowflakecomputing.com)')
-    parser.add_argument('--user', required=True,
-                       help='Snowflake username')
-    parser.add_argument('--password',
-                       help='Snowflake password (if using password auth)')
-    parser.add_argument('--private-key-path',
-                       help='Path to private key file (if using key-pair auth)')
-    parser.add_argument('--private-key-passphrase',
-                       help='Passphrase for private key')
-    parser.add_argument('--authenticator', default='snowflake',
-                       help='Authentication method (default: snowflake)')
-    parser.add_argument('--warehouse',
-                       help='Snowflake warehouse to use')
-    parser.add_argument('--database',
-                       help='Default database')
-    parser.add_argument('--schema',
-                       help='Default schema')
-    parser.add_argument('--role',
-                       help='Snowflake role to use')
+    add_connection_arguments(parser)
     
     # Manifest generation parameters
-    parser.add_argument('--share', required=True,
-                       help='Name of the data share to generate manifest from')
+    parser.add_argument('--share', action='append',
+                       help='Name of the data share to generate manifest from (repeatable)')
+    parser.add_argument('--shares-file',
+                       help='File with one share name per line (blank lines and # comments are ignored)')
+    parser.add_argument('--all-shares', action='store_true',
+                       help='Generate manifests for all outbound shares of the account (SHOW SHARES)')
     parser.add_argument('--output', '-o',
                        help='Output YAML file (default: print to stdout)')
+    parser.add_argument('--output-dir',
+                       help='Directory to write one <SHARE>.yml manifest per share into '
+                            '(required for several shares)')
+    parser.add_argument('--share-workers', type=int, default=4,
+                       help='Number of shares to process concurrently (default: 4)')
+    parser.add_argument('--max-workers', type=int, default=1,
+                       help='Number of database roles to fetch concurrently (default: 1)')
+    parser.add_argument('--batch-threshold', type=int, default=DEFAULT_BATCH_THRESHOLD,
+                       help='Number of database roles from which their grants are collected in '
+                            'multi-statement requests instead of one query per role '
+                            f'(0 disables batching; default: {DEFAULT_BATCH_THRESHOLD})')
+    parser.add_argument('--pool-size', type=int,
+                       help='Number of Snowflake connections kept open for concurrent queries '
+                            f'(default: the number of concurrent queries, at most {MAX_DEFAULT_POOL_SIZE})')
+    
+    add_snapshot_cache_arguments(parser)
     
     # Formatting options
     parser.add_argument('--indent', type=int, default=2,
                        help='YAML indentation (default: 2)')
     parser.add_argument('--no-sort-keys', action='store_true',
                        help='Do not sort dictionary keys in output')
+    parser.add_argument('--yaml-engine', choices=YAML_ENGINES, default='pyyaml',
+                       help='YAML serializer: pyyaml, or fast to write manifests directly with '
+                            'byte-identical output (default: pyyaml)')
+    
+    # Profiling options
+    parser.add_argument('--profile', action='store_true',
+                       help='Print a table of per-phase and per-query timings to stderr')
+    parser.add_argument('--profile-trace', metavar='FILE',
+                       help='Write the timings as Chrome trace JSON to FILE '
+                            '(open in chrome://tracing or Perfetto)')
     
     # Other options
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -141,40 +510,107 @@ Examples:
     setup_logging(args.verbose)
     logger = logging.getLogger(__name__)
     
-    # Validate authentication parameters
-    if not args.password and not args.private_key_path:
-        logger.error("Must provide either --password or --private-key-path")
+    validate_connection_args(args)
+    
+    if not args.share and not args.shares_file and not args.all_shares:
+        logger.error("Must provide --share, --shares-file or --all-shares")
+        sys.exit(1)
+    
+    if args.output and (args.output_dir or args.shares_file or args.all_shares or len(args.share) > 1):
+        logger.error("--output can only be used with a single --share; use --output-dir instead")
+        sys.exit(1)
+    
+    if args.max_workers < 1 or args.share_workers < 1 or (args.pool_size is not None and args.pool_size < 1):
+        logger.error("--max-workers, --share-workers and --pool-size must be at least 1")
+        sys.exit(1)
+    
+    if args.batch_threshold < 0:
+        logger.error("--batch-threshold must not be negative")
+        sys.exit(1)
+    
+    if args.cache_ttl is not None and args.cache_ttl < 0:
+        logger.error("--cache-ttl must not be negative")
         sys.exit(1)
     
+    instrumentation = Instrumentation() if args.profile or args.profile_trace else None
+    
     try:
-        # Create connection
-        logger.info("Establishing connection to Snowflake...")
-        connection = get_connection_from_args(args)
-        
-        # Create manifest generator
-        generator = ShareManifestGenerator(connection)
-        
-        # Generate manifest
-        logger.info(f"Generating manifest for share: {args.share}")
-        manifest_result = generator.analyze_share(args.share)
+        # --all-shares is only resolved once connected; the listed shares are checked up front
+        listed_share_names = get_listed_share_names_from_args(args)
+        if len(listed_share_names) > 1 and not args.output_dir:
+            logger.error("--output-dir is required when generating manifests for several shares")
+            sys.exit(1)
         
-        # Format results
-        formatter = YAMLFormatter(
-            indent=args.indent,
-            sort_keys=not args.no_sort_keys
-        )
+        # Create connection
+        connection = open_connection_from_args(args, pool_size=get_pool_size_from_args(args),
+                                               instrumentation=instrumentation)
+        try:
+            snapshot_cache = get_snapshot_cache_from_args(args)
+            
+            # Format results
+            formatter = YAMLFormatter(
+                indent=args.indent,
+                sort_keys=not args.no_sort_keys,
+                engine=args.yaml_engine,
+                instrumentation=instrumentation
+            )
+            
+            share_names = get_share_names_from_args(args, connection, listed_share_names)
+            
+            if len(share_names) == 1 and not args.output_dir:
+                share_name = share_names[0]
+                
+                # Create manifest generator
+                generator = ShareManifestGenerator(
+                    connection,
+                    max_workers=args.max_workers,
+                    snapshot_cache=snapshot_cache,
+                    instrumentation=instrumentation,
+                    batch_threshold=args.batch_threshold
+                )
+                
+                # Generate manifest
+                logger.info(f"Generating manifest for share: {share_name}")
+                manifest_result = generator.analyze_share(share_name)
+                
+                if args.output:
+                    # Save to file
+                    formatter.save_to_file(manifest_result, args.output)
+                    logger.info(f"Manifest generation complete. Results saved to: {args.output}")
+                else:
+                    # Print to stdout
+                    yaml_output = formatter.format_manifest(manifest_result)
+                    print(yaml_output)
+                
+                failed = False
+            else:
+                if not args.output_dir:
+                    # --all-shares found several shares
+                    logger.error("--output-dir is required when generating manifests for several shares")
+                    sys.exit(1)
+                
+                summary = generate_manifests(
+                    connection,
+                    share_names,
+                    args.output_dir,
+                    formatter,
+                    share_workers=args.share_workers,
+                    max_workers=args.max_workers,
+                    snapshot_cache=snapshot_cache,
+                    instrumentation=instrumentation,
+                    batch_threshold=args.batch_threshold
+                )
+                print_summary(summary)
+                failed = any(item['status'] != 'ok' for item in summary)
+        finally:
+            # Close connection
+            connection.close()
         
-        if args.output:
-            # Save to file
-            formatter.save_to_file(manifest_result, args.output)
-            logger.info(f"Manifest generation complete. Results saved to: {args.output}")
-        else:
-            # Print to stdout
-            yaml_output = formatter.format_manifest(manifest_result)
-            print(yaml_output)
+        if instrumentation is not None:
+            report_profile(instrumentation, args)
         
-        # Close connection
-        connection.close()
+        if failed:
+            sys.exit(1)
         
     except KeyboardInterrupt:
         logger.info("Manifest generation interrupted by user")
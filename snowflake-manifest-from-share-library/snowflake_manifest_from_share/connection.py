@@ -2,15 +2,41 @@
 Snowflake connection handler.
 """
 
-import snowflake.connector
-from typing import Optional, Dict, Any, Union
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Dict, Any, Union
+import importlib
 import logging
 import os
+import sys
+import threading
+import time
 from urllib.parse import urlparse
 
+from .instrumentation import QUERY, Instrumentation, instrumented, query_span
+
 logger = logging.getLogger(__name__)
 
 
+class _LazySnowflake:
+    """
+    Stands in for the snowflake package until it is used.
+    
+    Importing snowflake.connector takes most of the CLI start-up time, so it
+    is only imported on the first attribute access (snowflake.connector...),
+    i.e. when a connection is opened. Runs that never connect (--help,
+    argument errors, --replay) do not pay for it.
+    """
+    
+    def __getattr__(self, name: str) -> Any:
+        importlib.import_module('snowflake.connector')
+        return getattr(sys.modules['snowflake'], name)
+
+
+snowflake = _LazySnowflake()
+
+DEFAULT_FETCH_BATCH_SIZE = 1000
+
+
 def _secure_read_private_key(private_key_path: str) -> bytes:
     """
     Securely read private key file as bytes.
@@ -68,6 +94,169 @@ def _validate_credential_security(password: Optional[str], private_key: Optional
         logger.warning("Password is shorter than 8 characters, consider using a stronger password")
 
 
+class _PooledSession:
+    """A pooled Snowflake connection together with the cursors it reuses."""
+    
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.cursors = {}
+        self.last_used = time.monotonic()
+    
+    def cursor(self, cursor_class: Optional[type] = None) -> Any:
+        """Return the session's cursor of the given class, creating it on first use."""
+        cursor = self.cursors.get(cursor_class)
+        if cursor is None:
+            if cursor_class is None:
+                cursor = self.connection.cursor()
+            else:
+                cursor = self.connection.cursor(cursor_class)
+            self.cursors[cursor_class] = cursor
+        return cursor
+    
+    def drop_cursor(self, cursor_class: Optional[type] = None) -> None:
+        """Close and forget a cursor, e.g. after it failed."""
+        cursor = self.cursors.pop(cursor_class, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception as e:
+                logger.debug(f"Ignoring error while closing cursor: {e}")
+    
+    def is_closed(self) -> bool:
+        """Return whether the underlying connection is closed."""
+        try:
+            return bool(self.connection.is_closed())
+        except Exception:
+            return True
+    
+    def close(self) -> None:
+        """Close the session's cursors and connection."""
+        for cursor_class in list(self.cursors):
+            self.drop_cursor(cursor_class)
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing pooled connection: {e}")
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Snowflake connections.
+    
+    At most ``size`` connections are handed out at a time; further callers
+    block until one is released. Idle connections are evicted after
+    ``idle_timeout`` seconds, closed connections are replaced, and
+    connections idle for longer than ``health_check_interval`` are validated
+    before being handed out again.
+    """
+    
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 size: int,
+                 idle_timeout: float = 300.0,
+                 health_check_interval: float = 60.0):
+        """
+        Initialize the connection pool.
+        
+        Args:
+            connect: Callable opening a new Snowflake connection
+            size: Maximum number of open connections
+            idle_timeout: Seconds after which an idle connection is closed
+            health_check_interval: Idle seconds after which a connection is
+                validated with a server round-trip before reuse
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        
+        self._connect = connect
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+    
+    def _evict_expired(self) -> None:
+        """Close idle sessions that exceeded the idle timeout."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [s for s in self._idle if now - s.last_used > self.idle_timeout]
+            self._idle = [s for s in self._idle if now - s.last_used <= self.idle_timeout]
+        for session in expired:
+            logger.debug("Evicting idle pooled Snowflake connection")
+            session.close()
+    
+    def _is_healthy(self, session: _PooledSession) -> bool:
+        if session.is_closed():
+            return False
+        if time.monotonic() - session.last_used > self.health_check_interval:
+            is_valid = getattr(session.connection, 'is_valid', None)
+            if is_valid is not None:
+                try:
+                    return bool(is_valid())
+                except Exception:
+                    return False
+        return True
+    
+    def acquire(self) -> _PooledSession:
+        """Check out a healthy session, opening a new connection if needed."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        
+        self._slots.acquire()
+        try:
+            self._evict_expired()
+            while True:
+                with self._lock:
+                    # Most recently used first, so surplus sessions go idle and expire
+                    session = self._idle.pop() if self._idle else None
+                if session is None:
+                    return _PooledSession(self._connect())
+                if self._is_healthy(session):
+                    return session
+                logger.debug("Discarding unhealthy pooled Snowflake connection")
+                session.close()
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def release(self, session: _PooledSession, discard: bool = False) -> None:
+        """Return a session to the pool (or close it if discarded)."""
+        try:
+            if discard or self._closed:
+                session.close()
+            else:
+                session.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(session)
+        finally:
+            self._slots.release()
+        self._evict_expired()
+    
+    @contextmanager
+    def session(self) -> Iterator[_PooledSession]:
+        """Context manager checking a session out and back in."""
+        session = self.acquire()
+        try:
+            yield session
+        finally:
+            self.release(session, discard=session.is_closed())
+    
+    def idle_count(self) -> int:
+        """Number of idle connections currently held by the pool."""
+        with self._lock:
+            return len(self._idle)
+    
+    def close(self) -> None:
+        """Close all idle connections; checked out ones close on release."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+
 class SnowflakeConnection:
     """Handles Snowflake database connections and query execution."""
     
@@ -109,7 +298,10 @@ class SnowflakeConnection:
                  warehouse: Optional[str] = None,
                  database: Optional[str] = None,
                  schema: Optional[str] = None,
-                 role: Optional[str] = None):
+                 role: Optional[str] = None,
+                 pool_size: int = 1,
+                 pool_idle_timeout: float = 300.0,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         Initialize Snowflake connection parameters.
         
@@ -124,6 +316,10 @@ class SnowflakeConnection:
             database: Default database
             schema: Default schema
             role: Default role
+            pool_size: Number of pooled connections for concurrent callers
+                (1 uses a single connection and a new cursor per query)
+            pool_idle_timeout: Seconds after which an idle pooled connection is closed
+            instrumentation: Optional instrumentation timing every query
         """
         # Validate credential security
         _validate_credential_security(password, private_key)
@@ -163,17 +359,43 @@ class SnowflakeConnection:
             self.connection_params['role'] = role
             
         self._connection = None
+        self._connect_lock = threading.Lock()
+        self.instrumentation = instrumentation
+        
+        self._pool = None
+        if pool_size > 1:
+            self._pool = ConnectionPool(self._open_connection, pool_size, idle_timeout=pool_idle_timeout)
+        elif pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
     
-    def connect(self) -> snowflake.connector.SnowflakeConnection:
-        """Establish connection to Snowflake."""
+    def _open_connection(self) -> 'snowflake.connector.SnowflakeConnection':
+        """Open a new connection to Snowflake."""
         try:
-            self._connection = snowflake.connector.connect(**self.connection_params)
+            connection = snowflake.connector.connect(**self.connection_params)
             logger.info("Successfully connected to Snowflake")
-            return self._connection
+            return connection
         except Exception as e:
             logger.error(f"Failed to connect to Snowflake: {e}")
             raise
     
+    def connect(self) -> 'snowflake.connector.SnowflakeConnection':
+        """Establish connection to Snowflake."""
+        if self._pool:
+            # Warm up the pool so connection errors surface immediately
+            with self._pool.session() as session:
+                return session.connection
+        
+        self._connection = self._open_connection()
+        return self._connection
+    
+    def _ensure_connected(self) -> None:
+        """Connect lazily, making sure concurrent callers share one connection."""
+        if self._connection:
+            return
+        with self._connect_lock:
+            if not self._connection:
+                self.connect()
+    
     def execute_query(self, query: str) -> list:
         """
         Execute a query and return results.
@@ -184,8 +406,14 @@ class SnowflakeConnection:
         Returns:
             List of query results
         """
-        if not self._connection:
-            self.connect()
+        with query_span(self.instrumentation, query):
+            return self._execute_query(query)
+    
+    def _execute_query(self, query: str) -> list:
+        if self._pool:
+            return self._execute_pooled(query)
+        
+        self._ensure_connected()
             
         try:
             cursor = self._connection.cursor()
@@ -207,8 +435,14 @@ class SnowflakeConnection:
         Returns:
             List of dictionaries with column names as keys
         """
-        if not self._connection:
-            self.connect()
+        with query_span(self.instrumentation, query):
+            return self._execute_query_dict(query)
+    
+    def _execute_query_dict(self, query: str) -> list:
+        if self._pool:
+            return self._execute_pooled(query, snowflake.connector.DictCursor)
+        
+        self._ensure_connected()
             
         try:
             cursor = self._connection.cursor(snowflake.connector.DictCursor)
@@ -220,8 +454,146 @@ class SnowflakeConnection:
             logger.error(f"Query execution failed: {e}")
             raise
     
+    def iter_query_dict(self, query: str,
+                        batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a query and yield its rows as dictionaries.
+        
+        Rows are fetched batch_size at a time, so only one batch of the result
+        set is held in memory. The query runs when iteration starts; the
+        cursor (or pooled session) is released once the iterator is exhausted
+        or closed.
+        
+        Args:
+            query: SQL query to execute
+            batch_size: Number of rows fetched per round-trip
+            
+        Yields:
+            Dictionaries with column names as keys
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        # The span also covers the time the caller spends between rows
+        with query_span(self.instrumentation, query):
+            yield from self._iter_query_dict(query, batch_size)
+    
+    def _iter_query_dict(self, query: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+        if self._pool:
+            session = self._pool.acquire()
+            discard = False
+            try:
+                cursor = session.cursor(snowflake.connector.DictCursor)
+                cursor.execute(query)
+                yield from self._fetch_batches(cursor, batch_size)
+            except Exception as e:
+                logger.error(f"Query execution failed: {e}")
+                session.drop_cursor(snowflake.connector.DictCursor)
+                discard = session.is_closed()
+                raise
+            finally:
+                self._pool.release(session, discard=discard)
+            return
+        
+        self._ensure_connected()
+        
+        cursor = self._connection.cursor(snowflake.connector.DictCursor)
+        try:
+            cursor.execute(query)
+            yield from self._fetch_batches(cursor, batch_size)
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    def execute_batch_dict(self, queries: List[str]) -> List[list]:
+        """
+        Execute several statements in one multi-statement request.
+        
+        The statements run in order in a single round-trip. If any of them
+        fails, the request fails as a whole.
+        
+        Args:
+            queries: SQL statements to execute (without trailing semicolons)
+            
+        Returns:
+            One list of result dictionaries per statement, in query order
+        """
+        if not queries:
+            return []
+        
+        with instrumented(self.instrumentation, 'MULTI-STATEMENT BATCH', QUERY, statements=len(queries)):
+            return self._execute_batch_dict(queries)
+    
+    def _execute_batch_dict(self, queries: List[str]) -> List[list]:
+        sql = ';\n'.join(query.strip() for query in queries)
+        
+        if self._pool:
+            session = self._pool.acquire()
+            discard = False
+            try:
+                cursor = session.cursor(snowflake.connector.DictCursor)
+                return self._fetch_statement_results(cursor, sql, len(queries))
+            except Exception as e:
+                logger.error(f"Multi-statement request failed: {e}")
+                session.drop_cursor(snowflake.connector.DictCursor)
+                discard = session.is_closed()
+                raise
+            finally:
+                self._pool.release(session, discard=discard)
+        
+        self._ensure_connected()
+        
+        cursor = self._connection.cursor(snowflake.connector.DictCursor)
+        try:
+            return self._fetch_statement_results(cursor, sql, len(queries))
+        except Exception as e:
+            logger.error(f"Multi-statement request failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _fetch_statement_results(cursor: Any, sql: str, statement_count: int) -> List[list]:
+        cursor.execute(sql, num_statements=statement_count)
+        results = [cursor.fetchall()]
+        while len(results) < statement_count:
+            if not cursor.nextset():
+                raise RuntimeError(f"Multi-statement request returned {len(results)} of "
+                                   f"{statement_count} results")
+            results.append(cursor.fetchall())
+        return results
+    
+    @staticmethod
+    def _fetch_batches(cursor: Any, batch_size: int) -> Iterator[Any]:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    
+    def _execute_pooled(self, query: str, cursor_class: Optional[type] = None) -> list:
+        """Execute a query on a pooled session, reusing the session's cursor."""
+        session = self._pool.acquire()
+        discard = False
+        try:
+            cursor = session.cursor(cursor_class)
+            cursor.execute(query)
+            return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            session.drop_cursor(cursor_class)
+            discard = session.is_closed()
+            raise
+        finally:
+            self._pool.release(session, discard=discard)
+    
     def close(self):
         """Close the Snowflake connection."""
+        if self._pool:
+            self._pool.close()
+            logger.info("Snowflake connection pool closed")
         if self._connection:
             self._connection.close()
             self._connection = None
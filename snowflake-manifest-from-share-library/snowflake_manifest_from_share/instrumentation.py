@@ -0,0 +1,213 @@
+"""
+Timing instrumentation for the manifest pipeline.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Span categories used by the library
+QUERY = 'query'
+PHASE = 'phase'
+YAML = 'yaml'
+
+# Object keywords after which a SHOW command names the object it is about
+_OBJECT_KEYWORDS = frozenset(['SHARE', 'ROLE', 'DATABASE', 'SCHEMA', 'ACCOUNT', 'APPLICATION'])
+
+
+class Span(NamedTuple):
+    """A timed operation."""
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+    args: Dict[str, Any]
+    error: Optional[str]
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so that formatting differences do not matter."""
+    return ' '.join(query.split())
+
+
+def query_label(query: str) -> str:
+    """
+    Return the command of a query without the object it is about.
+
+    Examples:
+        SHOW GRANTS TO DATABASE ROLE DB.R1 -> SHOW GRANTS TO DATABASE ROLE
+        SHOW SHARES -> SHOW SHARES
+    """
+    words = normalize_query(query).split(' ')
+    if len(words) > 2 and words[-2].upper() in _OBJECT_KEYWORDS:
+        words = words[:-1]
+    label = ' '.join(words)
+    return label if len(label) <= 60 else label[:57] + '...'
+
+
+class Instrumentation:
+    """
+    Collects timed spans of queries, generator phases and YAML formatting.
+
+    Hooks registered with add_hook are called with every finished Span, from
+    the thread that ran it. Collected spans can be summarized as a table or
+    exported in the Chrome trace event format (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, keep_spans: bool = True):
+        """
+        Initialize the instrumentation.
+
+        Args:
+            keep_spans: Keep finished spans for summary() and chrome_trace();
+                disable when only hooks are needed
+        """
+        self.keep_spans = keep_spans
+        self.spans = []
+        self._hooks = []
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        """Register a callback that receives every finished span."""
+        with self._lock:
+            self._hooks = self._hooks + [hook]
+
+    def remove_hook(self, hook: Callable[[Span], None]) -> None:
+        """Unregister a callback."""
+        with self._lock:
+            self._hooks = [h for h in self._hooks if h != hook]
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        """Time the enclosed block as a span."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(Span(name, category, start - self._epoch, time.perf_counter() - start,
+                             threading.get_ident(), args, error))
+
+    def record(self, span: Span) -> None:
+        """Store a finished span and pass it to the hooks."""
+        if self.keep_spans:
+            with self._lock:
+                self.spans.append(span)
+        for hook in self._hooks:
+            try:
+                hook(span)
+            except Exception as e:
+                logger.warning(f"Instrumentation hook failed: {e}")
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Aggregate the spans by category and name.
+
+        Returns:
+            One dictionary per (category, name) with 'count', 'errors',
+            'total', 'mean' and 'max' seconds, slowest total first
+        """
+        groups = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            group = groups.setdefault((span.category, span.name), {
+                'category': span.category, 'name': span.name,
+                'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0
+            })
+            group['count'] += 1
+            group['errors'] += span.error is not None
+            group['total'] += span.duration
+            group['max'] = max(group['max'], span.duration)
+        for group in groups.values():
+            group['mean'] = group['total'] / group['count']
+        return sorted(groups.values(), key=lambda group: (group['category'], -group['total']))
+
+    def slowest(self, category: str = QUERY, limit: int = 5) -> List[Span]:
+        """Return the slowest individual spans of a category."""
+        with self._lock:
+            spans = [span for span in self.spans if span.category == category]
+        return sorted(spans, key=lambda span: span.duration, reverse=True)[:limit]
+
+    def format_summary(self, slowest: int = 5) -> str:
+        """Format the summary and the slowest queries as a text table."""
+        lines = [f"{'category':<8}  {'name':<40}  {'count':>6}  {'errors':>6}  "
+                 f"{'total (s)':>10}  {'mean (ms)':>10}  {'max (ms)':>10}"]
+        for group in self.summary():
+            lines.append(f"{group['category']:<8}  {group['name']:<40}  {group['count']:>6}  {group['errors']:>6}  "
+                         f"{group['total']:>10.3f}  {group['mean'] * 1000:>10.1f}  {group['max'] * 1000:>10.1f}")
+
+        queries = self.slowest(QUERY, slowest)
+        if queries:
+            lines.append('')
+            lines.append('Slowest queries:')
+            for span in queries:
+                lines.append(f"{span.duration * 1000:>10.1f} ms  {span.args.get('query', span.name)}")
+        return '\n'.join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the spans as a Chrome trace event document."""
+        pid = os.getpid()
+        thread_numbers = {}
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            tid = thread_numbers.setdefault(span.thread_id, len(thread_numbers) + 1)
+            args = dict(span.args)
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round(span.start * 1e6, 3),
+                'dur': round(span.duration * 1e6, 3),
+                'pid': pid,
+                'tid': tid,
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, filename: str) -> None:
+        """Write the spans to a Chrome trace JSON file."""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        logger.info(f"Chrome trace saved to: {filename}")
+
+
+def instrumented(instrumentation: Optional[Instrumentation], name: str, category: str,
+                 **args: Any) -> ContextManager[None]:
+    """Return a span of the instrumentation, or a no-op context if there is none."""
+    if instrumentation is None:
+        return _NO_SPAN
+    return instrumentation.span(name, category, **args)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def query_span(instrumentation: Optional[Instrumentation], query: str) -> ContextManager[None]:
+    """Return a span timing a query, labelled with its command."""
+    if instrumentation is None:
+        return _NO_SPAN
+    return instrumentation.span(query_label(query), QUERY, query=normalize_query(query))
@@ -0,0 +1,152 @@
+"""
+Detect grant drift by comparing application manifests as sets of objects.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, NamedTuple, Set, Tuple
+
+import yaml
+
+from .yaml_formatter import FlowStyleList
+
+try:
+    # libyaml bindings, used to load large manifests when available
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # pragma: no cover - depends on the PyYAML build
+    _Loader = yaml.SafeLoader
+
+# Object kinds of a manifest, outermost first
+OBJECT_KINDS = ('databases', 'schemas', 'tables', 'views')
+
+# Sections of a diff: database roles, objects and role assignments
+DIFF_SECTIONS = ('roles',) + OBJECT_KINDS + ('role_assignments',)
+
+
+class ManifestDiff(NamedTuple):
+    """What a fresh manifest adds to and removes from an existing one, per section."""
+    added: Dict[str, List[Any]]
+    removed: Dict[str, List[Any]]
+
+    @property
+    def has_drift(self) -> bool:
+        """Whether anything was added or removed."""
+        return any(self.added.values()) or any(self.removed.values())
+
+
+def load_manifest(filename: str) -> Dict[str, Any]:
+    """
+    Load a manifest YAML file.
+
+    Raises:
+        ValueError: If the file is not an application manifest
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        manifest = yaml.load(f, Loader=_Loader)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('shared_content') or {}, dict):
+        raise ValueError(f"Not an application manifest: {filename}")
+    return manifest
+
+
+def _entries(items: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield the (name, content) pairs of a manifest list of single-key mappings."""
+    for item in items or []:
+        if not isinstance(item, dict):
+            raise ValueError(f"Expected a mapping in manifest list, got: {item!r}")
+        for name, content in item.items():
+            yield str(name), content if isinstance(content, dict) else {}
+
+
+def _role_names(content: Dict[str, Any]) -> List[str]:
+    roles = content.get('roles') or []
+    if isinstance(roles, FlowStyleList):
+        roles = roles.items
+    return [str(role) for role in roles]
+
+
+def index_manifest(manifest: Dict[str, Any]) -> Dict[str, Set[Any]]:
+    """
+    Index a manifest by fully-qualified object name.
+
+    Works on manifests loaded from YAML and on the dictionaries returned by
+    ShareManifestGenerator.analyze_share alike.
+
+    Returns:
+        One set per DIFF_SECTIONS entry: role names, qualified object names
+        per kind, and (kind, qualified name, role) role assignments
+    """
+    index = {section: set() for section in DIFF_SECTIONS}
+    assignments = index['role_assignments']
+
+    for role_name, _ in _entries(manifest.get('roles')):
+        index['roles'].add(role_name)
+
+    shared_content = manifest.get('shared_content') or {}
+    for db_name, db_content in _entries(shared_content.get('databases')):
+        index['databases'].add(db_name)
+        assignments.update(('database', db_name, role) for role in _role_names(db_content))
+
+        for schema_name, schema_content in _entries(db_content.get('schemas')):
+            schema_key = f"{db_name}.{schema_name}"
+            index['schemas'].add(schema_key)
+            assignments.update(('schema', schema_key, role) for role in _role_names(schema_content))
+
+            for kind in ('tables', 'views'):
+                for object_name, object_content in _entries(schema_content.get(kind)):
+                    object_key = f"{schema_key}.{object_name}"
+                    index[kind].add(object_key)
+                    assignments.update((kind[:-1], object_key, role) for role in _role_names(object_content))
+
+    return index
+
+
+def diff_manifests(existing: Dict[str, Any], current: Dict[str, Any]) -> ManifestDiff:
+    """
+    Compare two manifests.
+
+    Args:
+        existing: The manifest that was generated before
+        current: The manifest of the grants as they are now
+
+    Returns:
+        ManifestDiff with the sorted entries current adds and removes
+    """
+    existing_index = index_manifest(existing)
+    current_index = index_manifest(current)
+    return ManifestDiff(
+        added={section: sorted(current_index[section] - existing_index[section]) for section in DIFF_SECTIONS},
+        removed={section: sorted(existing_index[section] - current_index[section]) for section in DIFF_SECTIONS}
+    )
+
+
+def _describe(section: str, entry: Any) -> str:
+    if section == 'role_assignments':
+        kind, name, role = entry
+        return f"role {role} on {kind} {name}"
+    return f"{section[:-1]} {entry}"
+
+
+def format_diff(diff: ManifestDiff) -> str:
+    """Format a diff as one '+' or '-' line per change, followed by a summary line."""
+    lines = []
+    for section in DIFF_SECTIONS:
+        lines.extend(f"- {_describe(section, entry)}" for entry in diff.removed[section])
+        lines.extend(f"+ {_describe(section, entry)}" for entry in diff.added[section])
+
+    added = sum(len(entries) for entries in diff.added.values())
+    removed = sum(len(entries) for entries in diff.removed.values())
+    lines.append(f"{added} added, {removed} removed" if diff.has_drift else "No drift")
+    return '\n'.join(lines)
+
+
+def diff_to_json(diff: ManifestDiff) -> str:
+    """Format a diff as JSON with 'drift', 'added' and 'removed' keys."""
+    def sections(entries: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        result = {section: entries[section] for section in DIFF_SECTIONS if section != 'role_assignments'}
+        result['role_assignments'] = [
+            {'kind': kind, 'name': name, 'role': role} for kind, name, role in entries['role_assignments']
+        ]
+        return result
+
+    return json.dumps({'drift': diff.has_drift, 'added': sections(diff.added),
+                       'removed': sections(diff.removed)}, indent=2)
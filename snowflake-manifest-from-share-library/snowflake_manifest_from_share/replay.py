@@ -0,0 +1,289 @@
+"""
+Offline query backends: record the queries of a live connection and replay them.
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .connection import DEFAULT_FETCH_BATCH_SIZE
+from .instrumentation import QUERY, Instrumentation, instrumented, normalize_query, query_span
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+
+class RecordedQueryError(Exception):
+    """A query error that was recorded and is raised again on replay."""
+    pass
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _dict_entry(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Store dictionary rows compactly as one column list and value lists."""
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    return {'columns': columns, 'rows': [[row.get(column) for column in columns] for row in rows]}
+
+
+def _batch_query(queries: List[str]) -> str:
+    """Return the multi-statement text a batch of queries is recorded under."""
+    return ';\n'.join(query.strip() for query in queries)
+
+
+class RecordingConnection:
+    """
+    Wraps a SnowflakeConnection and records every query and its result.
+
+    The recording is written on save() or close() and can be served by
+    ReplayConnection. Failing queries are recorded with their error message.
+    Files ending in .gz are gzip-compressed.
+    """
+
+    def __init__(self, connection: Any, path: str):
+        """
+        Initialize the recording connection.
+
+        Args:
+            connection: The connection whose queries are recorded
+            path: File the recording is written to
+        """
+        self.connection = connection
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _store(self, query: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[normalize_query(query)] = entry
+
+    def connect(self) -> Any:
+        return self.connection.connect()
+
+    def execute_query(self, query: str) -> list:
+        """Execute a query on the wrapped connection and record its result."""
+        try:
+            results = self.connection.execute_query(query)
+        except Exception as e:
+            self._store(query, {'error': str(e)})
+            raise
+        self._store(query, {'columns': None, 'rows': [list(row) for row in results]})
+        return results
+
+    def execute_query_dict(self, query: str) -> list:
+        """Execute a query on the wrapped connection and record its result."""
+        try:
+            results = self.connection.execute_query_dict(query)
+        except Exception as e:
+            self._store(query, {'error': str(e)})
+            raise
+        self._store(query, _dict_entry(results))
+        return results
+
+    def iter_query_dict(self, query: str,
+                        batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """Stream a query from the wrapped connection, recording it once exhausted."""
+        rows = []
+        try:
+            for row in self.connection.iter_query_dict(query, batch_size=batch_size):
+                rows.append(row)
+                yield row
+        except Exception as e:
+            self._store(query, {'error': str(e)})
+            raise
+        self._store(query, _dict_entry(rows))
+
+    def execute_batch_dict(self, queries: List[str]) -> List[list]:
+        """
+        Execute a multi-statement request on the wrapped connection.
+        
+        Each statement is recorded on its own, so the recording can also be
+        replayed one query at a time. A failing request is recorded as a whole.
+        """
+        try:
+            results = self.connection.execute_batch_dict(queries)
+        except Exception as e:
+            self._store(_batch_query(queries), {'error': str(e)})
+            raise
+        for query, rows in zip(queries, results):
+            self._store(query, _dict_entry(rows))
+        return results
+
+    def save(self) -> None:
+        """Write the recorded queries to the recording file."""
+        with self._lock:
+            queries = [dict(entry, query=query) for query, entry in self._entries.items()]
+
+        with _open(self.path, 'w') as f:
+            json.dump({'version': RECORDING_VERSION, 'queries': queries}, f,
+                      separators=(',', ':'), default=str)
+        logger.info(f"Recorded {len(queries)} queries to: {self.path}")
+
+    def close(self) -> None:
+        """Save the recording and close the wrapped connection."""
+        try:
+            self.save()
+        finally:
+            self.connection.close()
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReplayConnection:
+    """
+    Serves recorded query results without a Snowflake account.
+
+    Implements the query methods of SnowflakeConnection. Queries are matched
+    after normalizing whitespace; a query that was not recorded raises
+    LookupError. Each query waits `latency` seconds to simulate the
+    round-trip to Snowflake, so concurrency behaves as it would live.
+    """
+
+    def __init__(self, path: Optional[str] = None, latency: float = 0.0,
+                 entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        """
+        Initialize the replay connection.
+
+        Args:
+            path: Recording written by RecordingConnection
+            latency: Simulated seconds per query
+            entries: Recorded entries keyed by normalized query, used
+                instead of a file (see from_results)
+            instrumentation: Optional instrumentation timing every query
+        """
+        if latency < 0:
+            raise ValueError("latency must not be negative")
+
+        self.path = path
+        self.latency = latency
+        self.queries_served = 0
+        self.instrumentation = instrumentation
+        self._lock = threading.Lock()
+
+        if entries is not None:
+            self._entries = entries
+        elif path is not None:
+            self._entries = self._load(path)
+        else:
+            raise ValueError("Either path or entries must be given")
+
+    @classmethod
+    def from_results(cls, results: Dict[str, Any], latency: float = 0.0,
+                     instrumentation: Optional[Instrumentation] = None) -> 'ReplayConnection':
+        """
+        Create a replay connection from in-memory results.
+
+        Args:
+            results: Query -> list of row dictionaries, or an exception
+                instance the query raises
+            latency: Simulated seconds per query
+            instrumentation: Optional instrumentation timing every query
+        """
+        entries = {}
+        for query, result in results.items():
+            if isinstance(result, Exception):
+                entries[normalize_query(query)] = {'error': str(result)}
+            else:
+                entries[normalize_query(query)] = _dict_entry(result)
+        return cls(latency=latency, entries=entries, instrumentation=instrumentation)
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, Dict[str, Any]]:
+        with _open(path, 'r') as f:
+            recording = json.load(f)
+
+        if recording.get('version') != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version in {path}")
+
+        return {normalize_query(entry.pop('query')): entry for entry in recording['queries']}
+
+    def _lookup(self, query: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.queries_served += 1
+        return self._find(query)
+
+    def _find(self, query: str) -> Dict[str, Any]:
+        entry = self._entries.get(normalize_query(query))
+        if entry is None:
+            raise LookupError(f"No recorded result for query: {normalize_query(query)}")
+        if 'error' in entry:
+            raise RecordedQueryError(entry['error'])
+        return entry
+
+    @staticmethod
+    def _rows(query: str, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        columns = entry['columns']
+        if columns is None:
+            raise LookupError(f"Query was recorded without column names: {normalize_query(query)}")
+        return (dict(zip(columns, row)) for row in entry['rows'])
+
+    def _dict_rows(self, query: str) -> Iterator[Dict[str, Any]]:
+        return self._rows(query, self._lookup(query))
+
+    def execute_batch_dict(self, queries: List[str]) -> List[list]:
+        """
+        Return the recorded rows of several queries as one multi-statement request.
+        
+        The batch counts as a single query and waits for the latency once.
+        """
+        if not queries:
+            return []
+        with instrumented(self.instrumentation, 'MULTI-STATEMENT BATCH', QUERY, statements=len(queries)):
+            return [list(rows) for rows in self._lookup_batch(queries)]
+
+    def _lookup_batch(self, queries: List[str]) -> List[Iterator[Dict[str, Any]]]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.queries_served += 1
+
+        batch_entry = self._entries.get(normalize_query(_batch_query(queries)))
+        if batch_entry is not None and 'error' in batch_entry:
+            raise RecordedQueryError(batch_entry['error'])
+        return [self._rows(query, self._find(query)) for query in queries]
+
+    def connect(self) -> 'ReplayConnection':
+        return self
+
+    def execute_query(self, query: str) -> list:
+        """Return the recorded rows of a query as tuples."""
+        with query_span(self.instrumentation, query):
+            return [tuple(row) for row in self._lookup(query)['rows']]
+
+    def execute_query_dict(self, query: str) -> list:
+        """Return the recorded rows of a query as dictionaries."""
+        with query_span(self.instrumentation, query):
+            return list(self._dict_rows(query))
+
+    def iter_query_dict(self, query: str,
+                        batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield the recorded rows of a query as dictionaries."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        with query_span(self.instrumentation, query):
+            yield from self._dict_rows(query)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -2,19 +2,87 @@
 Core functionality for generating application manifests from Snowflake data shares.
 """
 
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Any, NamedTuple, Optional
 import logging
 import re
+import threading
+import time
 from .connection import SnowflakeConnection
+from .instrumentation import PHASE, Instrumentation, instrumented
+from .snapshot_cache import GrantSnapshotCache
 from .yaml_formatter import EmptyValue, FlowStyleList
 
 logger = logging.getLogger(__name__)
 
 
+class _ObjectGrant(NamedTuple):
+    """A SELECT grant on a table or view, parsed once from its qualified name."""
+    kind: str
+    db_name: str
+    schema_name: str
+    object_name: str
+    role: Optional[str]
+
+
+# Number of database roles from which their grants are collected in
+# multi-statement requests instead of one query per role
+DEFAULT_BATCH_THRESHOLD = 10
+
+# Maximum number of statements sent in one multi-statement request
+_MAX_BATCH_STATEMENTS = 500
+
+# Snowflake max identifier length
+_MAX_IDENTIFIER_LENGTH = 255
+
+# SQL injection patterns: semicolon, quotes, backslash, SQL keywords, SQL
+# comments, SQL block comments, the common OR 1=1 pattern and union attacks
+_DANGEROUS_PATTERN = re.compile(
+    r"""[;'"\\]"""
+    r'|\b(?:DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE)\b'
+    r'|--'
+    r'|/\*'
+    r'|\bOR\b.*\b1\s*=\s*1\b'
+    r'|\bUNION\b',
+    re.IGNORECASE
+)
+
+# The subset of the dangerous patterns that can occur in an identifier made
+# of valid characters only
+_DANGEROUS_IN_VALID_PATTERN = re.compile(
+    r'--|\b(?:DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE|UNION)\b',
+    re.IGNORECASE
+)
+
+# Snowflake identifier rules (simplified): alphanumeric, underscore, dot (for
+# qualified names), dollar sign and hyphen
+_VALID_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z0-9_.$-]+')
+
+
+@lru_cache(maxsize=8192)
+def _identifier_error(identifier: str) -> Optional[str]:
+    """Return why a stripped identifier is invalid, or None if it is valid."""
+    if _VALID_IDENTIFIER_PATTERN.fullmatch(identifier):
+        if _DANGEROUS_IN_VALID_PATTERN.search(identifier):
+            return "contains dangerous characters or keywords"
+    elif _DANGEROUS_PATTERN.search(identifier):
+        return "contains dangerous characters or keywords"
+    else:
+        return "contains invalid characters"
+    
+    if len(identifier) > _MAX_IDENTIFIER_LENGTH:
+        return f"too long (max {_MAX_IDENTIFIER_LENGTH} characters)"
+    
+    return None
+
+
 def _validate_identifier(identifier: str, context: str = "identifier") -> str:
     """
     Validate and sanitize Snowflake identifiers to prevent SQL injection.
     
+    Results are cached per identifier, so repeated names are validated once.
+    
     Args:
         identifier: The identifier to validate
         context: Context for error messages
@@ -31,43 +99,83 @@ def _validate_identifier(identifier: str, context: str = "identifier") -> str:
     # Remove whitespace
     identifier = identifier.strip()
     
-    # Check for SQL injection patterns
-    dangerous_patterns = [
-        r'[;\'"\\]',  # Semicolon, quotes, backslash
-        r'\b(DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE)\b',  # SQL keywords
-        r'--',  # SQL comments
-        r'/\*',  # SQL block comments
-        r'\bOR\b.*\b1\s*=\s*1\b',  # Common injection pattern
-        r'\bUNION\b',  # Union attacks
-    ]
-    
-    for pattern in dangerous_patterns:
-        if re.search(pattern, identifier, re.IGNORECASE):
-            raise ValueError(f"Invalid {context}: contains dangerous characters or keywords")
-    
-    # Validate against Snowflake identifier rules (simplified)
-    # Allow alphanumeric, underscore, dot (for qualified names), and dollar sign
-    if not re.match(r'^[A-Za-z0-9_.$-]+$', identifier):
-        raise ValueError(f"Invalid {context}: contains invalid characters")
-    
-    # Length check (Snowflake max identifier length is 255)
-    if len(identifier) > 255:
-        raise ValueError(f"Invalid {context}: too long (max 255 characters)")
+    error = _identifier_error(identifier)
+    if error is not None:
+        raise ValueError(f"Invalid {context}: {error}")
     
     return identifier
 
 
+def validate_identifiers(identifiers: Iterable[str], context: str = "identifier") -> List[str]:
+    """
+    Validate several Snowflake identifiers at once.
+    
+    Args:
+        identifiers: The identifiers to validate
+        context: Context for error messages
+        
+    Returns:
+        Validated identifiers, in input order
+        
+    Raises:
+        ValueError: If any identifier is invalid
+    """
+    return [_validate_identifier(identifier, context) for identifier in identifiers]
+
+
+def _grant_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a SHOW GRANTS row to the columns the manifest needs."""
+    return {
+        'privilege': result.get('privilege'),
+        'granted_on': result.get('granted_on'),
+        'name': result.get('name')
+    }
+
+
 class ShareManifestGenerator:
     """Generates declarative application manifests from Snowflake data shares."""
     
-    def __init__(self, connection: 'SnowflakeConnection'):
+    def __init__(self, connection: 'SnowflakeConnection', max_workers: int = 1,
+                 snapshot_cache: Optional[GrantSnapshotCache] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 batch_threshold: int = DEFAULT_BATCH_THRESHOLD):
         """
         Initialize the manifest generator.
         
         Args:
             connection: SnowflakeConnection instance
+            max_workers: Maximum number of database roles to fetch concurrently
+                (1 fetches them sequentially)
+            snapshot_cache: Optional on-disk cache of collected grants; fresh
+                cached entries are used instead of querying Snowflake
+            instrumentation: Optional instrumentation timing each generation phase
+            batch_threshold: Number of database roles to fetch from which all
+                their grants are collected in multi-statement requests, a
+                constant number of round-trips (0 always fetches per role)
         """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if batch_threshold < 0:
+            raise ValueError("batch_threshold must not be negative")
+        
         self.connection = connection
+        self.max_workers = max_workers
+        self.snapshot_cache = snapshot_cache
+        self.instrumentation = instrumentation
+        self.batch_threshold = batch_threshold
+        
+        # Per-run cache of SHOW DATABASE ROLES results, keyed by database
+        self._role_index_lock = threading.Lock()
+        self.reset_role_cache()
+        
+        # Per-run snapshot state: the snapshot loaded from the cache and the
+        # share grant entry collected in this run
+        self._snapshot = None
+        self._share_entry = None
+        self._role_entries = {}
+        
+        # Whether the last analyze_share run read every grant without errors
+        self.complete = False
     
     def analyze_share(self, share_name: str) -> Dict[str, Any]:
         """
@@ -80,20 +188,39 @@ class ShareManifestGenerator:
             Dictionary containing application manifest data
         """
         logger.info(f"Starting manifest generation from data share: {share_name}")
+        with self._phase('analyze_share', share_name):
+            manifest_result = self._analyze_share(share_name)
+        
+        logger.debug(f"Database role cache: {self.role_cache_hits} hits, {self.role_cache_misses} misses")
+        logger.info(f"Completed manifest generation from data share: {share_name}")
+        return manifest_result
+    
+    def _analyze_share(self, share_name: str) -> Dict[str, Any]:
+        self.reset_role_cache()
+        if self.snapshot_cache:
+            with self._phase('load_snapshot', share_name):
+                self._snapshot = self.snapshot_cache.load(share_name)
+        else:
+            self._snapshot = None
+        self._share_entry = None
+        self._role_entries = {}
         
         # Get all grants to the share
-        grants = self._get_share_grants(share_name)
+        with self._phase('share_grants', share_name):
+            grants = self._get_share_grants(share_name)
         
         # Get additional grants from database roles with role tracking
-        role_grants, role_info = self._get_database_role_grants(grants)
+        with self._phase('database_role_grants', share_name):
+            role_grants, role_info = self._get_database_role_grants(grants)
         
         # Combine all grants (add role info to direct grants)
         direct_grants = [{'grant': g, 'role': None} for g in grants]
         all_grants = direct_grants + role_grants
         
         # Build the hierarchical structure with role mappings
-        shared_content, role_mappings = self._build_shared_content_structure(all_grants)
-        roles_section = self._build_roles_section(role_info)
+        with self._phase('build_structure', share_name):
+            shared_content, role_mappings = self._build_shared_content_structure(all_grants)
+            roles_section = self._build_roles_section(role_info)
         
         manifest_result = {
             'manifest_version': 2,
@@ -101,29 +228,72 @@ class ShareManifestGenerator:
             'shared_content': shared_content
         }
         
-        logger.info(f"Completed manifest generation from data share: {share_name}")
+        self.complete = self._share_entry is not None and all(
+            entry.get('complete', True) for entry in self._role_entries.values()
+        )
+        if self.snapshot_cache and self._share_entry is not None:
+            with self._phase('save_snapshot', share_name):
+                self._save_snapshot(share_name)
+        
         return manifest_result
     
+    def _phase(self, name: str, share_name: str):
+        """Return a span timing a generation phase (a no-op without instrumentation)."""
+        return instrumented(self.instrumentation, name, PHASE, share=share_name)
+    
+    def list_outbound_shares(self) -> List[str]:
+        """
+        List the outbound shares of the account.
+        
+        Returns:
+            Share names (without account prefix) in SHOW SHARES order
+        """
+        results = self.connection.execute_query_dict("SHOW SHARES")
+        shares = []
+        for result in results:
+            if result.get('kind') == 'OUTBOUND' and result.get('name'):
+                # Outbound share names are qualified with the owning account
+                shares.append(result.get('name').rsplit('.', 1)[-1])
+        return shares
+    
+    def _save_snapshot(self, share_name: str) -> None:
+        """Save the grants collected in this run, skipping incomplete roles."""
+        roles = {
+            role_name: {'info': entry['info'], 'rows': entry['rows'], 'fetched_at': entry['fetched_at']}
+            for role_name, entry in self._role_entries.items()
+            if entry.get('complete', True)
+        }
+        try:
+            self.snapshot_cache.save(share_name, self._share_entry, roles, previous=self._snapshot)
+        except Exception as e:
+            # A failing cache must never fail manifest generation
+            logger.warning(f"Could not save grant snapshot for share {share_name}: {e}")
+    
     def _get_share_grants(self, share_name: str) -> List[Dict[str, Any]]:
         """Get all grants to the data share."""
         # Validate share name to prevent SQL injection
         validated_share_name = _validate_identifier(share_name, "share name")
         
+        if self.snapshot_cache:
+            cached = self.snapshot_cache.share_grants(self._snapshot)
+            if cached is not None:
+                logger.info(f"Using cached grants for share: {share_name}")
+                self._share_entry = self._snapshot['share_grants']
+                return cached
+        
         query = f"""
         SHOW GRANTS TO SHARE {validated_share_name}
         """
         
         try:
-            results = self.connection.execute_query_dict(query)
+            fetched_at = time.time()
             grants = []
             
-            for result in results:
-                grants.append({
-                    'privilege': result.get('privilege'),
-                    'granted_on': result.get('granted_on'),
-                    'name': result.get('name')
-                })
+            # Stream the rows so only the reduced grants are kept in memory
+            for result in self.connection.iter_query_dict(query):
+                grants.append(_grant_row(result))
             
+            self._share_entry = {'rows': grants, 'fetched_at': fetched_at}
             return grants
         except Exception as e:
             logger.error(f"Error getting share grants: {e}")
@@ -142,7 +312,10 @@ class ShareManifestGenerator:
                 grant.get('name')):
                 database_roles.append(grant.get('name'))
         
-        # For each database role, get its grants and info
+        # For each database role, get its grants and info. Results are always
+        # merged in share grant order so the concurrent path matches the
+        # sequential one exactly.
+        role_entries = self._collect_database_roles(database_roles)
         for role_name in database_roles:
             # Extract role name without database prefix
             if '.' in role_name:
@@ -150,35 +323,144 @@ class ShareManifestGenerator:
             else:
                 role_short_name = role_name
             
-            # Get role information
-            role_info[role_short_name] = self._get_role_info(role_name)
-            
-            # Get role grants
-            # Validate role name to prevent SQL injection
-            validated_role_name = _validate_identifier(role_name, "database role name")
-            
-            query = f"""
-            SHOW GRANTS TO DATABASE ROLE {validated_role_name}
-            """
-            
+            entry = role_entries[role_name]
+            role_info[role_short_name] = entry['info']
+            for row in entry['rows']:
+                role_grants.append({'grant': row, 'role': role_short_name})
+        
+        return role_grants, role_info
+    
+    def _collect_database_roles(self, database_roles: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Collect the info and grant rows of each database role.
+        
+        Fresh entries from the snapshot cache are reused; only the remaining
+        roles are fetched from Snowflake.
+        
+        Returns:
+            Dictionary keyed by qualified role name with 'info', 'rows' and
+            'fetched_at' entries
+        """
+        role_entries = {}
+        to_fetch = []
+        for role_name in dict.fromkeys(database_roles):
+            cached = self.snapshot_cache.role(self._snapshot, role_name) if self.snapshot_cache else None
+            if cached is not None:
+                role_entries[role_name] = cached
+            else:
+                to_fetch.append(role_name)
+        
+        if role_entries:
+            logger.info(f"Using cached grants for {len(role_entries)} database roles, "
+                        f"fetching {len(to_fetch)}")
+        
+        # Fail before any role is fetched if a role name is invalid
+        validate_identifiers(to_fetch, "database role name")
+        role_entries.update(zip(to_fetch, self._fetch_database_roles(to_fetch)))
+        self._role_entries = role_entries
+        return role_entries
+    
+    def _fetch_database_roles(self, database_roles: List[str]) -> List[Dict[str, Any]]:
+        """Fetch info and grants for each database role, batched or concurrently if configured."""
+        if self._use_batch(database_roles):
             try:
-                logger.info(f"Getting grants for database role: {role_name}")
-                results = self.connection.execute_query_dict(query)
-                
-                for result in results:
-                    role_grants.append({
-                        'grant': {
-                            'privilege': result.get('privilege'),
-                            'granted_on': result.get('granted_on'),
-                            'name': result.get('name')
-                        },
-                        'role': role_short_name
-                    })
+                return self._fetch_database_roles_batched(database_roles)
             except Exception as e:
-                logger.error(f"Error getting grants for database role {role_name}: {e}")
-                continue
+                logger.warning(f"Batched grant collection failed, fetching database roles one by one: {e}")
         
-        return role_grants, role_info
+        if self.max_workers == 1 or len(database_roles) < 2:
+            return [self._fetch_database_role(role_name) for role_name in database_roles]
+        
+        workers = min(self.max_workers, len(database_roles))
+        logger.debug(f"Fetching {len(database_roles)} database roles with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map yields results in submission order
+            return list(executor.map(self._fetch_database_role, database_roles))
+    
+    def _use_batch(self, database_roles: List[str]) -> bool:
+        return (self.batch_threshold > 0 and len(database_roles) >= self.batch_threshold
+                and hasattr(self.connection, 'execute_batch_dict'))
+    
+    def _fetch_database_roles_batched(self, database_roles: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch the info and grants of all database roles in multi-statement requests.
+        
+        The requests carry SHOW DATABASE ROLES for every database missing from
+        the role index and SHOW GRANTS TO DATABASE ROLE for every role, so the
+        number of round-trips does not grow with the number of roles. The
+        entries match those of _fetch_database_role.
+        """
+        fetched_at = time.time()
+        
+        with self._role_index_lock:
+            databases = [db_name for db_name in dict.fromkeys(
+                role_name.split('.', 1)[0] for role_name in database_roles if '.' in role_name
+            ) if db_name not in self._role_index_cache]
+        
+        # Validate names to prevent SQL injection
+        queries = [f"SHOW DATABASE ROLES IN DATABASE {db_name}"
+                   for db_name in validate_identifiers(databases, "database name")]
+        queries += [f"SHOW GRANTS TO DATABASE ROLE {role_name}"
+                    for role_name in validate_identifiers(database_roles, "database role name")]
+        
+        results = []
+        for start in range(0, len(queries), _MAX_BATCH_STATEMENTS):
+            batch = queries[start:start + _MAX_BATCH_STATEMENTS]
+            batch_results = self.connection.execute_batch_dict(batch)
+            if len(batch_results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} statement results, got {len(batch_results)}")
+            results.extend(batch_results)
+        
+        logger.info(f"Collected grants of {len(database_roles)} database roles in "
+                    f"{-(-len(queries) // _MAX_BATCH_STATEMENTS)} multi-statement request(s)")
+        
+        with self._role_index_lock:
+            for db_name, rows in zip(databases, results):
+                self._role_index_cache[db_name] = self._role_comments(rows)
+            self.role_cache_misses += len(databases)
+        
+        return [
+            {'info': self._get_role_info(role_name), 'rows': [_grant_row(row) for row in rows],
+             'fetched_at': fetched_at, 'complete': True}
+            for role_name, rows in zip(database_roles, results[len(databases):])
+        ]
+    
+    def _fetch_database_role(self, role_name: str) -> Dict[str, Any]:
+        """
+        Fetch the info and grants of a single database role.
+        
+        Args:
+            role_name: Qualified database role name (e.g. DEMO_DB.DR1)
+            
+        Returns:
+            Dictionary with the role 'info', its grant 'rows', 'fetched_at' and
+            whether every lookup succeeded ('complete')
+        """
+        fetched_at = time.time()
+        
+        # Get role information
+        info = self._get_role_info(role_name)
+        complete = '.' not in role_name or role_name.split('.', 1)[0] in self._role_index_cache
+        
+        # Get role grants
+        # Validate role name to prevent SQL injection
+        validated_role_name = _validate_identifier(role_name, "database role name")
+        
+        query = f"""
+        SHOW GRANTS TO DATABASE ROLE {validated_role_name}
+        """
+        
+        rows = []
+        try:
+            logger.info(f"Getting grants for database role: {role_name}")
+            for result in self.connection.iter_query_dict(query):
+                rows.append(_grant_row(result))
+        except Exception as e:
+            logger.error(f"Error getting grants for database role {role_name}: {e}")
+            rows = []
+            complete = False
+        
+        return {'info': info, 'rows': rows, 'fetched_at': fetched_at, 'complete': complete}
     
     def _get_role_info(self, role_name: str) -> Dict[str, Any]:
         """Get information about a database role."""
@@ -188,26 +470,73 @@ class ShareManifestGenerator:
         else:
             return {}
         
-        # Validate database name to prevent SQL injection
-        validated_db_name = _validate_identifier(db_name, "database name")
-        
-        query = f"""
-        SHOW DATABASE ROLES IN DATABASE {validated_db_name}
-        """
-        
         try:
-            results = self.connection.execute_query_dict(query)
-            for result in results:
-                if result.get('name') == role_short_name:
-                    comment = result.get('comment', '').strip()
-                    if comment:
-                        return {'comment': comment}
-                    else:
-                        return {}
-            return {}
+            role_comments = self._get_database_role_index(db_name)
         except Exception as e:
             logger.error(f"Error getting role info for {role_name}: {e}")
             return {}
+        
+        comment = role_comments.get(role_short_name)
+        if comment:
+            return {'comment': comment}
+        return {}
+    
+    def _get_database_role_index(self, db_name: str) -> Dict[str, str]:
+        """
+        Get the name -> comment index of the database roles in a database.
+        
+        SHOW DATABASE ROLES runs at most once per database and run; every
+        further lookup is served from the cached index. Failed lookups are not
+        cached so a later role in the same database retries the query.
+        
+        Args:
+            db_name: Name of the database
+            
+        Returns:
+            Dictionary mapping role short names to their (stripped) comments
+        """
+        with self._role_index_lock:
+            db_lock = self._role_index_db_locks.setdefault(db_name, threading.Lock())
+        
+        # Serialize per database so concurrent role fetches share a single query
+        with db_lock:
+            role_comments = self._role_index_cache.get(db_name)
+            with self._role_index_lock:
+                if role_comments is not None:
+                    self.role_cache_hits += 1
+                else:
+                    self.role_cache_misses += 1
+            if role_comments is not None:
+                return role_comments
+            
+            # Validate database name to prevent SQL injection
+            validated_db_name = _validate_identifier(db_name, "database name")
+            
+            query = f"""
+            SHOW DATABASE ROLES IN DATABASE {validated_db_name}
+            """
+            
+            role_comments = self._role_comments(self.connection.iter_query_dict(query))
+            self._role_index_cache[db_name] = role_comments
+            return role_comments
+    
+    @staticmethod
+    def _role_comments(results: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+        """Index SHOW DATABASE ROLES rows by name (the first row of a name wins)."""
+        role_comments = {}
+        for result in results:
+            name = result.get('name')
+            if name is not None and name not in role_comments:
+                role_comments[name] = (result.get('comment') or '').strip()
+        return role_comments
+    
+    def reset_role_cache(self) -> None:
+        """Clear the database role index and its hit/miss counters."""
+        with self._role_index_lock:
+            self._role_index_cache = {}
+            self._role_index_db_locks = {}
+            self.role_cache_hits = 0
+            self.role_cache_misses = 0
     
     def _build_roles_section(self, role_info: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Build the roles section for the manifest."""
@@ -220,7 +549,21 @@ class ShareManifestGenerator:
         return roles
     
     def _build_shared_content_structure(self, grants: List[Dict[str, Any]]) -> tuple:
-        """Build the hierarchical shared content structure with role mappings."""
+        """
+        Build the hierarchical shared content structure with role mappings.
+        
+        The grant list is scanned once and every relevant grant is parsed into
+        a compact record in one of three buckets (databases, schemas, objects).
+        The buckets are then applied in that order, which keeps the semantics
+        of a database/schema being registered before the objects inside it
+        regardless of where its grant appears in the list.
+        
+        Role collections are insertion-ordered dictionaries, so roles are
+        listed in the order they were first granted and the output is
+        deterministic across runs.
+        """
+        database_grants, schema_grants, object_grants = self._bucket_grants(grants)
+        
         databases = {}
         role_mappings = {
             'databases': {},
@@ -229,144 +572,125 @@ class ShareManifestGenerator:
             'views': {}
         }
         
-        # First pass: collect databases with USAGE privilege
-        for grant_data in grants:
-            grant = grant_data['grant']
-            role = grant_data['role']
-            
-            if (grant.get('granted_on') == 'DATABASE' and 
-                grant.get('privilege') == 'USAGE' and 
-                grant.get('name')):
-                db_name = grant.get('name')
-                if db_name not in databases:
-                    databases[db_name] = {'schemas': {}}
-                    role_mappings['databases'][db_name] = set()
-                
-                if role:
-                    role_mappings['databases'][db_name].add(role)
-            
-            elif (grant.get('granted_on') == 'DATABASE_ROLE' and 
-                  grant.get('privilege') == 'USAGE' and 
-                  grant.get('name')):
-                full_name = grant.get('name')
-                if '.' in full_name:
-                    db_name = full_name.split('.')[0]
-                    if db_name not in databases:
-                        databases[db_name] = {'schemas': {}}
-                        role_mappings['databases'][db_name] = set()
-                    # The role being granted to the share provides access to this database
-                    if role is None:  # This is a direct grant to the share
-                        role_name = full_name.split('.', 1)[1]
-                        role_mappings['databases'][db_name].add(role_name)
-        
-        # Second pass: collect schemas with USAGE privilege
-        for grant_data in grants:
-            grant = grant_data['grant']
-            role = grant_data['role']
-            
-            if (grant.get('granted_on') == 'SCHEMA' and 
-                grant.get('privilege') == 'USAGE' and 
-                grant.get('name')):
-                full_name = grant.get('name')
-                if '.' in full_name:
-                    db_name, schema_name = full_name.split('.', 1)
-                    if db_name in databases:
-                        schema_key = f"{db_name}.{schema_name}"
-                        if schema_name not in databases[db_name]['schemas']:
-                            databases[db_name]['schemas'][schema_name] = {
-                                'tables': {},
-                                'views': {}
-                            }
-                            role_mappings['schemas'][schema_key] = set()
-                        
-                        if role:
-                            role_mappings['schemas'][schema_key].add(role)
-        
-        # Third pass: collect tables and views with SELECT privilege
-        for grant_data in grants:
-            grant = grant_data['grant']
-            role = grant_data['role']
-            
-            if (grant.get('privilege') == 'SELECT' and grant.get('name')):
-                granted_on = grant.get('granted_on')
-                full_name = grant.get('name')
-                
-                if granted_on in ['TABLE', 'VIEW'] and full_name.count('.') >= 2:
-                    parts = full_name.split('.')
-                    db_name = parts[0]
-                    schema_name = parts[1]
-                    object_name = '.'.join(parts[2:])  # Handle names with dots
-                    object_key = f"{db_name}.{schema_name}.{object_name}"
-                    
-                    if (db_name in databases and 
-                        schema_name in databases[db_name]['schemas']):
-                        if granted_on == 'TABLE':
-                            if object_name not in databases[db_name]['schemas'][schema_name]['tables']:
-                                databases[db_name]['schemas'][schema_name]['tables'][object_name] = set()
-                                role_mappings['tables'][object_key] = set()
-                            
-                            if role:
-                                databases[db_name]['schemas'][schema_name]['tables'][object_name].add(role)
-                                role_mappings['tables'][object_key].add(role)
-                                
-                        elif granted_on == 'VIEW':
-                            if object_name not in databases[db_name]['schemas'][schema_name]['views']:
-                                databases[db_name]['schemas'][schema_name]['views'][object_name] = set()
-                                role_mappings['views'][object_key] = set()
-                            
-                            if role:
-                                databases[db_name]['schemas'][schema_name]['views'][object_name].add(role)
-                                role_mappings['views'][object_key].add(role)
+        for db_name, role in database_grants:
+            db_roles = role_mappings['databases'].get(db_name)
+            if db_roles is None:
+                databases[db_name] = {}
+                db_roles = role_mappings['databases'][db_name] = {}
+            if role:
+                db_roles[role] = None
+        
+        for db_name, schema_name, role in schema_grants:
+            schemas = databases.get(db_name)
+            if schemas is None:
+                continue
+            schema_key = f"{db_name}.{schema_name}"
+            schema_roles = role_mappings['schemas'].get(schema_key)
+            if schema_roles is None:
+                schemas[schema_name] = ({}, {})
+                schema_roles = role_mappings['schemas'][schema_key] = {}
+            if role:
+                schema_roles[role] = None
+        
+        for grant in object_grants:
+            schemas = databases.get(grant.db_name)
+            if schemas is None:
+                continue
+            schema_objects = schemas.get(grant.schema_name)
+            if schema_objects is None:
+                continue
+            objects = schema_objects[0] if grant.kind == 'tables' else schema_objects[1]
+            object_roles = objects.get(grant.object_name)
+            if object_roles is None:
+                object_key = f"{grant.db_name}.{grant.schema_name}.{grant.object_name}"
+                object_roles = objects[grant.object_name] = {}
+                role_mappings[grant.kind][object_key] = object_roles
+            if grant.role:
+                object_roles[grant.role] = None
         
         # Convert to the required list format with roles
         database_list = []
-        for db_name, db_content in databases.items():
+        for db_name, schemas in databases.items():
             schema_list = []
-            db_roles = list(role_mappings['databases'].get(db_name, set()))
-            
-            for schema_name, schema_content in db_content['schemas'].items():
-                schema_key = f"{db_name}.{schema_name}"
-                schema_roles = list(role_mappings['schemas'].get(schema_key, set()))
-                
-                schema_dict = {schema_name: {}}
+            for schema_name, (tables, views) in schemas.items():
+                schema_roles = role_mappings['schemas'][f"{db_name}.{schema_name}"]
+                schema_content = {}
                 
                 # Add roles only if there are any
                 if schema_roles:
-                    schema_dict[schema_name]['roles'] = FlowStyleList(schema_roles)
+                    schema_content['roles'] = FlowStyleList(list(schema_roles))
+                if tables:
+                    schema_content['tables'] = self._build_object_list(tables)
+                if views:
+                    schema_content['views'] = self._build_object_list(views)
                 
-                # Add tables with roles
-                if schema_content['tables']:
-                    table_list = []
-                    for table_name, table_roles in schema_content['tables'].items():
-                        table_role_list = list(table_roles)
-                        if table_role_list:
-                            table_item = {table_name: {'roles': FlowStyleList(table_role_list)}}
-                        else:
-                            table_item = {table_name: EmptyValue()}
-                        table_list.append(table_item)
-                    schema_dict[schema_name]['tables'] = table_list
-                
-                # Add views with roles
-                if schema_content['views']:
-                    view_list = []
-                    for view_name, view_roles in schema_content['views'].items():
-                        view_role_list = list(view_roles)
-                        if view_role_list:
-                            view_item = {view_name: {'roles': FlowStyleList(view_role_list)}}
-                        else:
-                            view_item = {view_name: EmptyValue()}
-                        view_list.append(view_item)
-                    schema_dict[schema_name]['views'] = view_list
-                
-                schema_list.append(schema_dict)
+                schema_list.append({schema_name: schema_content})
             
-            db_dict = {db_name: {}}
+            db_content = {}
             
             # Add database roles if there are any
+            db_roles = role_mappings['databases'][db_name]
             if db_roles:
-                db_dict[db_name]['roles'] = FlowStyleList(db_roles)
-                
-            db_dict[db_name]['schemas'] = schema_list
-            database_list.append(db_dict)
+                db_content['roles'] = FlowStyleList(list(db_roles))
+            
+            db_content['schemas'] = schema_list
+            database_list.append({db_name: db_content})
         
         return {'databases': database_list}, role_mappings
+    
+    @staticmethod
+    def _bucket_grants(grants: List[Dict[str, Any]]) -> tuple:
+        """
+        Split grants into database, schema and object buckets in a single pass.
+        
+        Returns:
+            Tuple of (database grants as (db, role) pairs, schema grants as
+            (db, schema, role) triples, object grants as _ObjectGrant records)
+        """
+        database_grants = []
+        schema_grants = []
+        object_grants = []
+        
+        for grant_data in grants:
+            grant = grant_data['grant']
+            full_name = grant.get('name')
+            if not full_name:
+                continue
+            privilege = grant.get('privilege')
+            granted_on = grant.get('granted_on')
+            role = grant_data['role']
+            
+            if privilege == 'SELECT':
+                if granted_on == 'TABLE' or granted_on == 'VIEW':
+                    parts = full_name.split('.', 2)
+                    if len(parts) == 3:
+                        object_grants.append(_ObjectGrant(
+                            'tables' if granted_on == 'TABLE' else 'views',
+                            parts[0], parts[1], parts[2], role
+                        ))
+            elif privilege == 'USAGE':
+                if granted_on == 'SCHEMA':
+                    db_name, dot, schema_name = full_name.partition('.')
+                    if dot:
+                        schema_grants.append((db_name, schema_name, role))
+                elif granted_on == 'DATABASE':
+                    database_grants.append((full_name, role))
+                elif granted_on == 'DATABASE_ROLE':
+                    db_name, dot, role_name = full_name.partition('.')
+                    if dot:
+                        # The role being granted to the share provides access to
+                        # this database; only direct grants to the share count
+                        database_grants.append((db_name, role_name if role is None else None))
+        
+        return database_grants, schema_grants, object_grants
+    
+    @staticmethod
+    def _build_object_list(objects: Dict[str, Dict[str, None]]) -> List[Dict[str, Any]]:
+        """Build the tables or views list of a schema."""
+        object_list = []
+        for object_name, object_roles in objects.items():
+            if object_roles:
+                object_list.append({object_name: {'roles': FlowStyleList(list(object_roles))}})
+            else:
+                object_list.append({object_name: EmptyValue()})
+        return object_list
@@ -0,0 +1,196 @@
+"""
+On-disk snapshot cache of the grants collected for a share.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+DEFAULT_CACHE_TTL = 3600
+
+
+def default_cache_dir() -> str:
+    """Return the default snapshot directory (honours XDG_CACHE_HOME)."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'snowflake-manifest-from-share')
+
+
+def content_hash(rows: Any) -> str:
+    """Return a stable SHA-256 hash of JSON-serializable grant rows."""
+    payload = json.dumps(rows, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GrantSnapshotCache:
+    """
+    Stores the raw share and database role grant rows of each share on disk.
+
+    Every share is kept in its own JSON file. The share grants and each
+    database role carry their own fetch timestamp and content hash, so only
+    the roles that are new to the share or whose entry is older than the TTL
+    need to be re-fetched.
+
+    Shares of the same name seen through different accounts or roles hold
+    different grants, so snapshots are kept apart per scope: a string
+    identifying the account and role the grants were read with.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: float = DEFAULT_CACHE_TTL,
+                 refresh: bool = False, scope: Optional[str] = None):
+        """
+        Initialize the snapshot cache.
+
+        Args:
+            cache_dir: Directory holding the snapshots (default: see default_cache_dir)
+            ttl: Number of seconds a cached entry is served without re-fetching it
+            refresh: Never reuse cached entries; everything is re-fetched and
+                the snapshot rewritten
+            scope: Account and role the grants are read with; snapshots of
+                other scopes are never reused
+        """
+        if ttl < 0:
+            raise ValueError("ttl must not be negative")
+
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl
+        self.refresh = refresh
+        self.scope = scope
+
+    def _dir(self) -> str:
+        if self.scope is None:
+            return self.cache_dir
+        # scopes contain URLs and user names, so name their directories by hash
+        return os.path.join(self.cache_dir, hashlib.sha256(self.scope.encode('utf-8')).hexdigest()[:16])
+
+    def _path(self, share_name: str) -> str:
+        return os.path.join(self._dir(), f"{share_name}.json")
+
+    def _is_fresh(self, entry: Optional[Dict[str, Any]], now: Optional[float] = None) -> bool:
+        if not entry:
+            return False
+        now = time.time() if now is None else now
+        return now - entry.get('fetched_at', 0) < self.ttl
+
+    def load(self, share_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the snapshot of a share.
+
+        Args:
+            share_name: Name of the data share
+
+        Returns:
+            Snapshot dictionary, or None if there is no usable snapshot
+        """
+        path = self._path(share_name)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable grant snapshot {path}: {e}")
+            return None
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            logger.info(f"Ignoring grant snapshot {path} with unsupported version")
+            return None
+
+        if snapshot.get('scope') != self.scope:
+            logger.info(f"Ignoring grant snapshot {path} taken with another account or role")
+            return None
+
+        return snapshot
+
+    def share_grants(self, snapshot: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached share grants if they can be reused, otherwise None."""
+        if snapshot is None or self.refresh:
+            return None
+        entry = snapshot.get('share_grants')
+        return entry['rows'] if self._is_fresh(entry) else None
+
+    def role(self, snapshot: Optional[Dict[str, Any]], role_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry of a database role if it can be reused, otherwise None.
+
+        The entry holds the role 'info' and its grant 'rows'.
+        """
+        if snapshot is None or self.refresh:
+            return None
+        entry = snapshot.get('roles', {}).get(role_name)
+        return entry if self._is_fresh(entry) else None
+
+    def save(self, share_name: str, share_grants: Dict[str, Any],
+             roles: Dict[str, Dict[str, Any]],
+             previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Write the snapshot of a share.
+
+        Args:
+            share_name: Name of the data share
+            share_grants: Entry with the share grant 'rows' and their 'fetched_at'
+            roles: Entries keyed by qualified role name, each with 'info',
+                'rows' and 'fetched_at'
+            previous: The snapshot this one replaces, used to log what changed
+
+        Returns:
+            The snapshot that was written
+        """
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'share': share_name,
+            'scope': self.scope,
+            'created_at': time.time(),
+            'share_grants': dict(share_grants, content_hash=content_hash(share_grants['rows'])),
+            'roles': {
+                role_name: dict(entry, content_hash=content_hash([entry['info'], entry['rows']]))
+                for role_name, entry in roles.items()
+            }
+        }
+        snapshot['content_hash'] = content_hash([
+            snapshot['share_grants']['content_hash'],
+            sorted((name, entry['content_hash']) for name, entry in snapshot['roles'].items())
+        ])
+
+        if previous is not None:
+            self._log_changes(previous, snapshot)
+
+        os.makedirs(self._dir(), exist_ok=True)
+        path = self._path(share_name)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir(), prefix=f".{share_name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(',', ':'), default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving grant snapshot {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        logger.debug(f"Grant snapshot saved to: {path}")
+        return snapshot
+
+    @staticmethod
+    def _log_changes(previous: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+        if previous.get('content_hash') == snapshot['content_hash']:
+            logger.info("Grant snapshot unchanged since the previous run")
+            return
+
+        previous_roles = previous.get('roles', {})
+        for role_name, entry in snapshot['roles'].items():
+            old = previous_roles.get(role_name)
+            if old is None:
+                logger.info(f"Database role added to share: {role_name}")
+            elif old.get('content_hash') != entry['content_hash']:
+                logger.info(f"Database role grants changed: {role_name}")
+        for role_name in previous_roles:
+            if role_name not in snapshot['roles']:
+                logger.info(f"Database role removed from share: {role_name}")
@@ -3,8 +3,17 @@ YAML formatter for Snowflake application manifests.
 """
 
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, IO, Iterator, Optional
 import logging
+import re
+
+from .instrumentation import YAML, Instrumentation, instrumented
+
+try:
+    # libyaml bindings, used for streaming when available
+    from yaml import CSafeDumper as _StreamingBaseDumper
+except ImportError:  # pragma: no cover - depends on the PyYAML build
+    _StreamingBaseDumper = yaml.SafeDumper
 
 class EmptyValue:
     """Represents an empty value that should render as just a key with colon in YAML."""
@@ -27,26 +36,71 @@ def represent_flow_style_list(dumper, data):
     """Custom YAML representer for flow style lists."""
     return dumper.represent_sequence('tag:yaml.org,2002:seq', data.items, flow_style=True)
 
-# Register representers on custom dumper class (thread-safe)
-CustomYAMLDumper.add_representer(EmptyValue, represent_empty_value)
-CustomYAMLDumper.add_representer(FlowStyleList, represent_flow_style_list)
+class StreamingYAMLDumper(_StreamingBaseDumper):
+    """Dumper used to stream manifests (C-accelerated when libyaml is present)."""
+    pass
+
+class PurePythonStreamingYAMLDumper(yaml.SafeDumper):
+    """Dumper used to stream manifests the libyaml emitter would write differently."""
+    pass
+
+# Register representers on custom dumper classes (thread-safe)
+for _dumper in (CustomYAMLDumper, StreamingYAMLDumper, PurePythonStreamingYAMLDumper):
+    _dumper.add_representer(EmptyValue, represent_empty_value)
+    _dumper.add_representer(FlowStyleList, represent_flow_style_list)
 
 logger = logging.getLogger(__name__)
 
+ENGINES = ('pyyaml', 'fast')
+
+# Line width passed to PyYAML; longer flow lists would be wrapped
+_WIDTH = 1000
+
+# Strings the fast engine writes as plain scalars: identifiers and simple
+# comments that PyYAML neither quotes nor resolves to another type (bool,
+# null, int, float, ...). Commas are only plain outside of flow lists.
+_PLAIN_SCALAR_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_.$()/'&+-]*(?: [A-Za-z0-9_.$()/'&+-]+)*")
+_PLAIN_BLOCK_SCALAR_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_.$()/'&+,-]*(?: [A-Za-z0-9_.$()/'&+,-]+)*")
+_RESERVED_WORDS = frozenset(['yes', 'no', 'true', 'false', 'on', 'off', 'null'])
+
+# libyaml escapes characters outside the Basic Multilingual Plane even with
+# allow_unicode, where PyYAML's emitter writes them as they are
+_NON_BMP_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+
+# PyYAML writes keys of 128 or more characters, counting their tag (e.g.
+# !!str), as complex keys ("? key"), where libyaml counts UTF-8 bytes and
+# not the tag; longer keys are left to PyYAML
+_MAX_SIMPLE_KEY_LENGTH = 120
+
+
+class _FastPathUnsupported(Exception):
+    """Raised when the fast engine cannot write a value exactly like PyYAML."""
+    pass
+
 
 class YAMLFormatter:
     """Formats application manifest data into YAML output."""
     
-    def __init__(self, indent: int = 2, sort_keys: bool = True):
+    def __init__(self, indent: int = 2, sort_keys: bool = True, engine: str = 'pyyaml',
+                 instrumentation: Optional[Instrumentation] = None):
         """
         Initialize YAML formatter.
         
         Args:
             indent: Number of spaces for indentation
             sort_keys: Whether to sort dictionary keys
+            engine: 'pyyaml', or 'fast' to write manifests directly, without
+                PyYAML's representers (documents the fast engine cannot write
+                byte-for-byte like PyYAML fall back to it)
+            instrumentation: Optional instrumentation timing each formatted manifest
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown YAML engine: {engine} (expected one of {', '.join(ENGINES)})")
+        
         self.indent = indent
         self.sort_keys = sort_keys
+        self.engine = engine
+        self.instrumentation = instrumentation
     
     def format_manifest(self, manifest_data: Dict[str, Any]) -> str:
         """
@@ -58,6 +112,16 @@ class YAMLFormatter:
         Returns:
             YAML formatted string
         """
+        with instrumented(self.instrumentation, 'format_manifest', YAML, engine=self.engine):
+            return self._format_manifest(manifest_data)
+    
+    def _format_manifest(self, manifest_data: Dict[str, Any]) -> str:
+        if self.engine == 'fast':
+            try:
+                return ''.join(self._fast_lines(manifest_data))
+            except _FastPathUnsupported as e:
+                logger.debug(f"Fast YAML engine falling back to PyYAML: {e}")
+        
         try:
             # Use custom dumper with thread-safe representers
             yaml_output = yaml.dump(
@@ -75,21 +139,246 @@ class YAMLFormatter:
             logger.error(f"Error formatting to YAML: {e}")
             raise
     
+    def write_manifest(self, manifest_data: Dict[str, Any], stream: IO[str]) -> None:
+        """
+        Stream the application manifest as YAML to a file handle.
+        
+        The document is emitted node by node while walking the manifest, so
+        the YAML text is never held in memory as a whole. The output matches
+        format_manifest, except that objects referenced more than once are
+        written out in full rather than as YAML aliases. libyaml is used when
+        it is installed, unless the manifest holds strings it would write
+        differently from PyYAML's emitter (characters outside the Basic
+        Multilingual Plane, such as emoji, and keys that are long, non-ASCII
+        or need quoting).
+        
+        Args:
+            manifest_data: Dictionary containing application manifest data
+            stream: Text stream to write to
+        """
+        with instrumented(self.instrumentation, 'write_manifest', YAML, engine=self.engine):
+            self._write_manifest(manifest_data, stream)
+    
+    def _write_manifest(self, manifest_data: Dict[str, Any], stream: IO[str]) -> None:
+        if self.engine == 'fast':
+            # Rendered in full before writing, so nothing is written before a fallback
+            try:
+                lines = list(self._fast_lines(manifest_data))
+            except _FastPathUnsupported as e:
+                logger.debug(f"Fast YAML engine falling back to PyYAML: {e}")
+            else:
+                stream.writelines(lines)
+                return
+        
+        dumper_class = StreamingYAMLDumper
+        if dumper_class is not PurePythonStreamingYAMLDumper and _differs_in_libyaml(manifest_data):
+            dumper_class = PurePythonStreamingYAMLDumper
+        dumper = dumper_class(
+            stream,
+            default_flow_style=False,
+            indent=self.indent,
+            sort_keys=self.sort_keys,
+            allow_unicode=True,
+            default_style=None,
+            width=1000  # Prevent line wrapping
+        )
+        try:
+            dumper.emit(yaml.StreamStartEvent())
+            dumper.emit(yaml.DocumentStartEvent(explicit=False))
+            self._emit_data(dumper, manifest_data)
+            dumper.emit(yaml.DocumentEndEvent(explicit=False))
+            dumper.emit(yaml.StreamEndEvent())
+        except Exception as e:
+            logger.error(f"Error writing YAML: {e}")
+            raise
+        finally:
+            dumper.dispose()
+    
+    def _emit_data(self, dumper: yaml.SafeDumper, data: Any) -> None:
+        """Emit the events of a manifest value, walking dicts and lists lazily."""
+        if isinstance(data, dict):
+            items = list(data.items())
+            if self.sort_keys:
+                try:
+                    items = sorted(items)
+                except TypeError:
+                    pass
+            dumper.emit(yaml.MappingStartEvent(None, 'tag:yaml.org,2002:map', True, flow_style=False))
+            for key, value in items:
+                self._emit_data(dumper, key)
+                self._emit_data(dumper, value)
+            dumper.emit(yaml.MappingEndEvent())
+        elif isinstance(data, (list, FlowStyleList)):
+            flow_style = isinstance(data, FlowStyleList)
+            dumper.emit(yaml.SequenceStartEvent(None, 'tag:yaml.org,2002:seq', True, flow_style=flow_style))
+            for item in (data.items if flow_style else data):
+                self._emit_data(dumper, item)
+            dumper.emit(yaml.SequenceEndEvent())
+        else:
+            self._emit_node(dumper, dumper.represent_data(data))
+    
+    @staticmethod
+    def _emit_node(dumper: yaml.SafeDumper, node: yaml.Node) -> None:
+        """Emit the events of a represented node, as the YAML serializer does."""
+        if isinstance(node, yaml.ScalarNode):
+            detected_tag = dumper.resolve(yaml.ScalarNode, node.value, (True, False))
+            default_tag = dumper.resolve(yaml.ScalarNode, node.value, (False, True))
+            implicit = (node.tag == detected_tag), (node.tag == default_tag)
+            dumper.emit(yaml.ScalarEvent(None, node.tag, implicit, node.value, style=node.style))
+        elif isinstance(node, yaml.SequenceNode):
+            implicit = node.tag == dumper.resolve(yaml.SequenceNode, node.value, True)
+            dumper.emit(yaml.SequenceStartEvent(None, node.tag, implicit, flow_style=node.flow_style))
+            for item in node.value:
+                YAMLFormatter._emit_node(dumper, item)
+            dumper.emit(yaml.SequenceEndEvent())
+        else:
+            implicit = node.tag == dumper.resolve(yaml.MappingNode, node.value, True)
+            dumper.emit(yaml.MappingStartEvent(None, node.tag, implicit, flow_style=node.flow_style))
+            for key, value in node.value:
+                YAMLFormatter._emit_node(dumper, key)
+                YAMLFormatter._emit_node(dumper, value)
+            dumper.emit(yaml.MappingEndEvent())
+    
+    def _fast_lines(self, data: Any) -> Iterator[str]:
+        """
+        Yield the YAML lines of a manifest without going through PyYAML.
+        
+        Supports the values found in manifests: dicts, lists, FlowStyleList,
+        EmptyValue as a mapping value, and identifier-like strings, ints,
+        bools and None. Raises _FastPathUnsupported for anything else.
+        """
+        if type(data) is not dict or not data:
+            raise _FastPathUnsupported("document is not a non-empty mapping")
+        # PyYAML ignores indentation outside of 2..9
+        indent = self.indent if 1 < self.indent < 10 else 2
+        return self._fast_mapping(data, 0, None, indent)
+    
+    def _fast_mapping(self, data: Dict[Any, Any], column: int, lead: Optional[str],
+                      indent: int) -> Iterator[str]:
+        """Yield a block mapping at column; lead replaces the first key's indentation."""
+        items = list(data.items())
+        if self.sort_keys:
+            try:
+                items = sorted(items)
+            except TypeError:
+                pass
+        
+        spaces = ' ' * column
+        for key, value in items:
+            prefix = spaces if lead is None else lead
+            lead = None
+            key_text = _fast_scalar(key)
+            if len(key_text) > _MAX_SIMPLE_KEY_LENGTH:
+                raise _FastPathUnsupported(f"key too long for a simple key: {key_text[:20]}...")
+            if key_text == "''":
+                # PyYAML writes empty keys as complex keys
+                raise _FastPathUnsupported("empty key")
+            
+            if type(value) is dict and value:
+                yield f"{prefix}{key_text}:\n"
+                yield from self._fast_mapping(value, column + indent, None, indent)
+            elif type(value) is list and value:
+                # Sequences in mappings are not indented
+                yield f"{prefix}{key_text}:\n"
+                yield from self._fast_sequence(value, column, None, indent)
+            elif type(value) is EmptyValue:
+                yield f"{prefix}{key_text}:\n"
+            else:
+                yield _fast_line(f"{prefix}{key_text}: {_fast_inline(value)}\n")
+    
+    def _fast_sequence(self, data: list, column: int, lead: Optional[str],
+                       indent: int) -> Iterator[str]:
+        """Yield a block sequence at column; lead replaces the first item's indentation."""
+        spaces = ' ' * column
+        for item in data:
+            prefix = spaces if lead is None else lead
+            lead = None
+            if type(item) is dict and item:
+                item_lead = f"{prefix}-{' ' * (indent - 1)}"
+                yield from self._fast_mapping(item, column + indent, item_lead, indent)
+            elif type(item) is list and item:
+                item_lead = f"{prefix}-{' ' * (indent - 1)}"
+                yield from self._fast_sequence(item, column + indent, item_lead, indent)
+            else:
+                yield _fast_line(f"{prefix}- {_fast_inline(item)}\n")
+    
     def save_to_file(self, manifest_data: Dict[str, Any], filename: str) -> None:
         """
         Save application manifest to a YAML file.
         
+        The manifest is streamed to the file (see write_manifest).
+        
         Args:
             manifest_data: Dictionary containing application manifest data
             filename: Output filename
         """
-        yaml_content = self.format_manifest(manifest_data)
-        
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write(yaml_content)
+                self.write_manifest(manifest_data, f)
             logger.info(f"Application manifest saved to: {filename}")
         except Exception as e:
             logger.error(f"Error saving to file {filename}: {e}")
             raise
     
+
+
+def _differs_in_libyaml(data: Any, key: bool = False) -> bool:
+    """Whether libyaml would write a value differently from PyYAML's emitter."""
+    if isinstance(data, str):
+        if key and _key_differs_in_libyaml(data):
+            return True
+        return _NON_BMP_PATTERN.search(data) is not None
+    if isinstance(data, dict):
+        return any(_differs_in_libyaml(k, key=True) or _differs_in_libyaml(v) for k, v in data.items())
+    if isinstance(data, list):
+        return any(_differs_in_libyaml(item) for item in data)
+    if isinstance(data, FlowStyleList):
+        return _differs_in_libyaml(data.items)
+    return False
+
+
+def _key_differs_in_libyaml(key: str) -> bool:
+    """Whether PyYAML and libyaml may disagree on writing a key as a simple key."""
+    if len(key.encode('utf-8')) >= _MAX_SIMPLE_KEY_LENGTH:
+        return True
+    # Quoted keys are measured differently once escaped; empty keys are complex in PyYAML
+    return not _PLAIN_BLOCK_SCALAR_PATTERN.fullmatch(key) or key.lower() in _RESERVED_WORDS
+
+
+def _fast_scalar(value: Any, flow: bool = False) -> str:
+    """Return the plain YAML text of a scalar, as PyYAML would write it."""
+    value_type = type(value)
+    if value_type is str:
+        pattern = _PLAIN_SCALAR_PATTERN if flow else _PLAIN_BLOCK_SCALAR_PATTERN
+        if pattern.fullmatch(value) and value.lower() not in _RESERVED_WORDS:
+            return value
+        if not value:
+            return "''"
+        raise _FastPathUnsupported(f"string needs quoting or is not plain: {value!r}")
+    if value_type is bool:
+        return 'true' if value else 'false'
+    if value_type is int:
+        return str(value)
+    if value is None:
+        return 'null'
+    raise _FastPathUnsupported(f"unsupported type: {value_type.__name__}")
+
+
+def _fast_inline(value: Any) -> str:
+    """Return the YAML text of a value written on its key's or item's line."""
+    if type(value) is FlowStyleList:
+        return '[' + ', '.join(_fast_scalar(item, flow=True) for item in value.items) + ']'
+    if type(value) is dict:
+        return '{}'
+    if type(value) is list:
+        return '[]'
+    if type(value) is EmptyValue:
+        raise _FastPathUnsupported("empty value outside of a mapping")
+    return _fast_scalar(value)
+
+
+def _fast_line(line: str) -> str:
+    """Reject lines PyYAML would wrap."""
+    if len(line) > _WIDTH:
+        raise _FastPathUnsupported("line exceeds the YAML width")
+    return line
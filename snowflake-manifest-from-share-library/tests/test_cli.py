@@ -2,8 +2,18 @@
 
 import pytest
 from unittest.mock import Mock, patch, mock_open
-from snowflake_manifest_from_share.cli import get_connection_from_args, main
+from snowflake_manifest_from_share.cli import (
+    generate_manifests,
+    get_cache_scope_from_args,
+    get_connection_from_args,
+    get_pool_size_from_args,
+    get_share_names_from_args,
+    get_snapshot_cache_from_args,
+    main,
+)
+from snowflake_manifest_from_share.snapshot_cache import DEFAULT_CACHE_TTL
 import argparse
+import os
 import sys
 import io
 
@@ -203,7 +213,10 @@ class TestCLI:
                     main()
 
         # Verify calls
-        mock_generator_class.assert_called_once_with(mock_connection)
+        mock_generator_class.assert_called_once_with(mock_connection, max_workers=1, snapshot_cache=None,
+                                                     instrumentation=None, batch_threshold=10)
+        mock_formatter_class.assert_called_once_with(indent=2, sort_keys=True, engine='pyyaml',
+                                                     instrumentation=None)
         mock_generator.analyze_share.assert_called_once_with('TEST_SHARE')
         mock_formatter.format_manifest.assert_called_once_with(test_result)
         mock_connection.close.assert_called_once()
@@ -296,4 +309,186 @@ class TestCLI:
         with patch('snowflake_manifest_from_share.cli.get_connection_from_args', side_effect=KeyboardInterrupt()):
             with patch.object(sys, 'argv', test_args):
                 with pytest.raises(SystemExit):
-                    main()
\ No newline at end of file
+                    main()
+    def test_get_snapshot_cache_from_args(self):
+        """Test that the snapshot cache is only enabled by the cache options."""
+        connection_args = dict(account='myaccount', host=None, user='me', role=None, replay=None)
+        args = argparse.Namespace(cache_dir=None, cache_ttl=None, refresh=False, **connection_args)
+        assert get_snapshot_cache_from_args(args) is None
+
+        args = argparse.Namespace(cache_dir='/tmp/cache', cache_ttl=None, refresh=False, **connection_args)
+        cache = get_snapshot_cache_from_args(args)
+        assert cache.cache_dir == '/tmp/cache'
+        assert cache.ttl == DEFAULT_CACHE_TTL
+        assert cache.refresh is False
+        assert cache.scope == 'account:myaccount;user:me;role:'
+
+        args = argparse.Namespace(cache_dir=None, cache_ttl=60.0, refresh=True, **connection_args)
+        cache = get_snapshot_cache_from_args(args)
+        assert cache.ttl == 60.0
+        assert cache.refresh is True
+
+    def test_get_cache_scope_from_args(self):
+        """Test that the cache scope identifies the account, user and role."""
+        args = argparse.Namespace(account='MyAccount', host=None, user='Me', role='analyst', replay=None)
+        assert get_cache_scope_from_args(args) == 'account:myaccount;user:me;role:ANALYST'
+
+        args.host = 'https://MyAccount.snowflakecomputing.com/'
+        assert get_cache_scope_from_args(args) == 'account:myaccount.snowflakecomputing.com;user:me;role:ANALYST'
+
+        args.replay = 'recording.json'
+        assert get_cache_scope_from_args(args) == f"replay:{os.path.abspath('recording.json')}"
+
+    def test_get_pool_size_from_args(self):
+        """Test that the pool is sized to the number of concurrent queries."""
+        args = argparse.Namespace(pool_size=None, max_workers=1, share_workers=4, share=['SHARE_A'],
+                                  shares_file=None, all_shares=False, output_dir=None)
+        assert get_pool_size_from_args(args) == 1
+
+        args.max_workers = 4
+        assert get_pool_size_from_args(args) == 4
+
+        args.output_dir = 'manifests'
+        assert get_pool_size_from_args(args) == 8
+
+        args.pool_size = 3
+        assert get_pool_size_from_args(args) == 3
+
+    def test_get_share_names_from_args(self, tmp_path):
+        """Test combining --share, --shares-file and --all-shares."""
+        shares_file = tmp_path / 'shares.txt'
+        shares_file.write_text('# nightly shares\nSHARE_B\n\n  SHARE_C  \nSHARE_A\n')
+        args = argparse.Namespace(share=['SHARE_A', 'SHARE_B'], shares_file=str(shares_file), all_shares=True)
+        connection = Mock()
+        connection.execute_query_dict.return_value = [
+            {'kind': 'OUTBOUND', 'name': 'MYORG.MYACCOUNT.SHARE_D'},
+            {'kind': 'INBOUND', 'name': 'OTHERACCOUNT.SHARE_E'},
+        ]
+
+        share_names = get_share_names_from_args(args, connection)
+
+        assert share_names == ['SHARE_A', 'SHARE_B', 'SHARE_C', 'SHARE_D']
+
+    def test_get_share_names_from_args_empty(self):
+        """Test that an empty share list is an error."""
+        args = argparse.Namespace(share=None, shares_file=None, all_shares=True)
+        connection = Mock()
+        connection.execute_query_dict.return_value = []
+
+        with pytest.raises(ValueError, match="No shares"):
+            get_share_names_from_args(args, connection)
+
+    @patch('snowflake_manifest_from_share.cli.ShareManifestGenerator')
+    def test_generate_manifests(self, mock_generator_class, tmp_path):
+        """Test generating several manifests over one shared connection."""
+        connection = Mock()
+        formatter = Mock()
+
+        def analyze_share(share_name):
+            if share_name == 'BROKEN':
+                raise Exception("Share does not exist")
+            return {'share': share_name}
+
+        mock_generator_class.return_value.analyze_share.side_effect = analyze_share
+
+        summary = generate_manifests(connection, ['SHARE_A', 'BROKEN', 'SHARE_B'], str(tmp_path / 'out'),
+                                     formatter, share_workers=2, max_workers=3)
+
+        assert [item['share'] for item in summary] == ['SHARE_A', 'BROKEN', 'SHARE_B']
+        assert [item['status'] for item in summary] == ['ok', 'failed', 'ok']
+        assert summary[1]['error'] == 'Share does not exist'
+        assert summary[0]['output'] == str(tmp_path / 'out' / 'SHARE_A.yml')
+        assert (tmp_path / 'out').is_dir()
+        for call in mock_generator_class.call_args_list:
+            assert call.args == (connection,)
+            assert call.kwargs == {'max_workers': 3}
+        formatter.save_to_file.assert_any_call({'share': 'SHARE_B'}, str(tmp_path / 'out' / 'SHARE_B.yml'))
+        assert formatter.save_to_file.call_count == 2
+
+    @patch('snowflake_manifest_from_share.cli.generate_manifests')
+    @patch('snowflake_manifest_from_share.cli.get_connection_from_args')
+    def test_main_several_shares(self, mock_get_connection, mock_generate_manifests):
+        """Test that several shares are generated in one batch and summarized."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--account', 'myaccount',
+            '--user', 'testuser',
+            '--password', 'testpass',
+            '--share', 'SHARE_A',
+            '--share', 'SHARE_B',
+            '--output-dir', 'manifests',
+            '--share-workers', '8'
+        ]
+        mock_connection = Mock()
+        mock_get_connection.return_value = mock_connection
+        mock_generate_manifests.return_value = [
+            {'share': 'SHARE_A', 'status': 'ok', 'seconds': 1.5, 'output': 'manifests/SHARE_A.yml'},
+            {'share': 'SHARE_B', 'status': 'ok', 'seconds': 2.0, 'output': 'manifests/SHARE_B.yml'},
+        ]
+        captured_err = io.StringIO()
+
+        with patch.object(sys, 'argv', test_args):
+            with patch('sys.stderr', captured_err):
+                main()
+
+        args, kwargs = mock_generate_manifests.call_args
+        assert args[0] is mock_connection
+        assert args[1] == ['SHARE_A', 'SHARE_B']
+        assert args[2] == 'manifests'
+        assert kwargs['share_workers'] == 8
+        assert mock_get_connection.call_args.kwargs == {'pool_size': 8, 'instrumentation': None}
+        mock_connection.close.assert_called_once()
+        assert 'SHARE_B  ok' in captured_err.getvalue()
+        assert '2 shares, 0 failed' in captured_err.getvalue()
+
+    @patch('snowflake_manifest_from_share.cli.get_connection_from_args')
+    def test_main_several_shares_require_output_dir(self, mock_get_connection):
+        """Test that several shares cannot be printed to stdout."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--account', 'myaccount',
+            '--user', 'testuser',
+            '--password', 'testpass',
+            '--share', 'SHARE_A',
+            '--share', 'SHARE_B'
+        ]
+
+        with patch.object(sys, 'argv', test_args):
+            with pytest.raises(SystemExit):
+                main()
+
+        mock_get_connection.assert_not_called()
+
+    @patch('snowflake_manifest_from_share.cli.ShareManifestGenerator')
+    @patch('snowflake_manifest_from_share.cli.get_connection_from_args')
+    def test_main_all_shares_require_output_dir(self, mock_get_connection, mock_generator_class):
+        """Test that the connection is closed when --all-shares finds several shares without --output-dir."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--account', 'myaccount',
+            '--user', 'testuser',
+            '--password', 'testpass',
+            '--all-shares'
+        ]
+        mock_connection = Mock()
+        mock_get_connection.return_value = mock_connection
+        mock_generator_class.return_value.list_outbound_shares.return_value = ['SHARE_A', 'SHARE_B']
+
+        with patch.object(sys, 'argv', test_args):
+            with pytest.raises(SystemExit):
+                main()
+
+        mock_connection.close.assert_called_once()
+
+    def test_main_missing_share(self):
+        """Test main without any share option."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--account', 'myaccount',
+            '--user', 'testuser',
+            '--password', 'testpass'
+        ]
+
+        with patch.object(sys, 'argv', test_args):
+            with pytest.raises(SystemExit):
+                main()
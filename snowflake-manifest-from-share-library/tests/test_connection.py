@@ -1,8 +1,11 @@
 """Tests for SnowflakeConnection class."""
 
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
-from snowflake_manifest_from_share.connection import SnowflakeConnection
+from snowflake_manifest_from_share.connection import ConnectionPool, SnowflakeConnection
 
 
 class TestSnowflakeConnection:
@@ -179,6 +182,80 @@ class TestSnowflakeConnection:
         assert result == [{"col1": "val1"}, {"col1": "val2"}]
         mock_connection.cursor.assert_called_with(mock_snowflake.connector.DictCursor)
 
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_iter_query_dict(self, mock_snowflake):
+        """Test that rows are streamed in batches and the cursor is closed."""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[{"col1": 1}, {"col1": 2}], [{"col1": 3}], []]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass")
+        rows = conn.iter_query_dict("SELECT * FROM test_table", batch_size=2)
+
+        mock_cursor.execute.assert_not_called()
+        assert list(rows) == [{"col1": 1}, {"col1": 2}, {"col1": 3}]
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.fetchall.assert_not_called()
+        mock_cursor.close.assert_called_once()
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_iter_query_dict_closed_early(self, mock_snowflake):
+        """Test that abandoning the iterator still closes the cursor."""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.return_value = [{"col1": 1}, {"col1": 2}]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass")
+        rows = conn.iter_query_dict("SELECT * FROM test_table")
+        assert next(rows) == {"col1": 1}
+        rows.close()
+
+        mock_cursor.close.assert_called_once()
+
+    def test_iter_query_dict_invalid_batch_size(self):
+        """Test that the batch size must be positive."""
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass")
+        with pytest.raises(ValueError, match="batch_size"):
+            list(conn.iter_query_dict("SELECT 1", batch_size=0))
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_execute_batch_dict(self, mock_snowflake):
+        """Test that several statements are sent as one multi-statement request."""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.fetchall.side_effect = [[{"col1": 1}], [], [{"col1": 3}]]
+        mock_cursor.nextset.return_value = True
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass")
+        results = conn.execute_batch_dict(["SELECT 1", " SELECT 2\n", "SELECT 3"])
+
+        assert results == [[{"col1": 1}], [], [{"col1": 3}]]
+        mock_cursor.execute.assert_called_once_with("SELECT 1;\nSELECT 2;\nSELECT 3", num_statements=3)
+        assert mock_cursor.nextset.call_count == 2
+        mock_cursor.close.assert_called_once()
+        assert conn.execute_batch_dict([]) == []
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_execute_batch_dict_missing_results(self, mock_snowflake):
+        """Test that a request returning fewer result sets than statements fails."""
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.fetchall.return_value = []
+        mock_cursor.nextset.return_value = None
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass")
+        with pytest.raises(RuntimeError, match="1 of 2 results"):
+            conn.execute_batch_dict(["SELECT 1", "SELECT 2"])
+        mock_cursor.close.assert_called_once()
+
     def test_context_manager(self):
         """Test context manager functionality."""
         conn = SnowflakeConnection(
@@ -195,4 +272,174 @@ class TestSnowflakeConnection:
                     assert context_conn == conn
                     mock_connect.assert_called_once()
                 
-                mock_close.assert_called_once()
\ No newline at end of file
+                mock_close.assert_called_once()
+
+
+def _mock_sf_connection():
+    """Return a mock Snowflake connection that reports itself as open."""
+    connection = Mock()
+    connection.is_closed.return_value = False
+    connection.is_valid.return_value = True
+    return connection
+
+
+class TestConnectionPool:
+    """Test cases for ConnectionPool and pooled SnowflakeConnection."""
+
+    def test_invalid_size(self):
+        """Test that the pool needs at least one connection."""
+        with pytest.raises(ValueError):
+            ConnectionPool(Mock(), 0)
+        with pytest.raises(ValueError):
+            SnowflakeConnection(account="myaccount", user="testuser", password="testpass", pool_size=0)
+
+    def test_reuses_released_session(self):
+        """Test that a released session is handed out again."""
+        connect = Mock(side_effect=lambda: _mock_sf_connection())
+        pool = ConnectionPool(connect, 2)
+
+        with pool.session() as first:
+            pass
+        with pool.session() as second:
+            pass
+
+        assert first is second
+        assert connect.call_count == 1
+
+    def test_replaces_closed_session(self):
+        """Test that a session whose connection was closed is replaced."""
+        connect = Mock(side_effect=lambda: _mock_sf_connection())
+        pool = ConnectionPool(connect, 2)
+
+        with pool.session() as first:
+            pass
+        first.connection.is_closed.return_value = True
+        with pool.session() as second:
+            pass
+
+        assert second is not first
+        assert connect.call_count == 2
+
+    def test_validates_session_after_health_check_interval(self):
+        """Test that long idle sessions are validated before reuse."""
+        pool = ConnectionPool(lambda: _mock_sf_connection(), 2, health_check_interval=0)
+
+        with pool.session() as first:
+            pass
+        first.connection.is_valid.return_value = False
+        with pool.session() as second:
+            pass
+
+        assert second is not first
+        first.connection.close.assert_called_once()
+
+    def test_evicts_idle_sessions(self):
+        """Test that sessions idle beyond the timeout are closed."""
+        pool = ConnectionPool(lambda: _mock_sf_connection(), 2, idle_timeout=0.01)
+
+        with pool.session() as session:
+            pass
+        time.sleep(0.02)
+        pool.acquire()
+
+        session.connection.close.assert_called_once()
+        assert pool.idle_count() == 0
+
+    def test_limits_open_connections(self):
+        """Test that no more than size sessions are checked out at once."""
+        pool = ConnectionPool(lambda: _mock_sf_connection(), 2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def work():
+            with pool.session():
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) == 2
+        assert pool.idle_count() == 2
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_pooled_execute_reuses_cursor(self, mock_snowflake):
+        """Test that pooled queries reuse one connection and cursor."""
+        mock_connection = _mock_sf_connection()
+        mock_cursor = Mock()
+        mock_cursor.fetchall.side_effect = [[("a",)], [("b",)]]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass", pool_size=4)
+
+        assert conn.execute_query("SELECT 1") == [("a",)]
+        assert conn.execute_query("SELECT 2") == [("b",)]
+        assert 'pool_size' not in conn.connection_params
+        mock_snowflake.connector.connect.assert_called_once()
+        mock_connection.cursor.assert_called_once_with()
+        mock_cursor.close.assert_not_called()
+
+        conn.close()
+        mock_cursor.close.assert_called_once()
+        mock_connection.close.assert_called_once()
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_pooled_execute_drops_failed_cursor(self, mock_snowflake):
+        """Test that a failing query closes its cursor but keeps the connection."""
+        mock_connection = _mock_sf_connection()
+        failing_cursor = Mock()
+        failing_cursor.execute.side_effect = Exception("Query failed")
+        good_cursor = Mock()
+        good_cursor.fetchall.return_value = [{"col1": "val1"}]
+        mock_connection.cursor.side_effect = [failing_cursor, good_cursor]
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass", pool_size=2)
+
+        with pytest.raises(Exception, match="Query failed"):
+            conn.execute_query_dict("SELECT 1")
+        assert conn.execute_query_dict("SELECT 1") == [{"col1": "val1"}]
+
+        failing_cursor.close.assert_called_once()
+        mock_snowflake.connector.connect.assert_called_once()
+        mock_connection.cursor.assert_called_with(mock_snowflake.connector.DictCursor)
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_pooled_iter_query_dict_releases_session(self, mock_snowflake):
+        """Test that a streamed query returns its session to the pool."""
+        mock_connection = _mock_sf_connection()
+        mock_cursor = Mock()
+        mock_cursor.fetchmany.side_effect = [[{"col1": 1}], []]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass", pool_size=2)
+
+        assert list(conn.iter_query_dict("SELECT 1")) == [{"col1": 1}]
+        assert conn._pool.idle_count() == 1
+        mock_cursor.close.assert_not_called()
+
+    @patch('snowflake_manifest_from_share.connection.snowflake')
+    def test_pooled_execute_batch_dict(self, mock_snowflake):
+        """Test that a multi-statement request runs on a pooled session."""
+        mock_connection = _mock_sf_connection()
+        mock_cursor = Mock()
+        mock_cursor.fetchall.side_effect = [[{"col1": 1}], [{"col1": 2}]]
+        mock_cursor.nextset.return_value = True
+        mock_connection.cursor.return_value = mock_cursor
+        mock_snowflake.connector.connect.return_value = mock_connection
+
+        conn = SnowflakeConnection(account="myaccount", user="testuser", password="testpass", pool_size=2)
+
+        assert conn.execute_batch_dict(["SELECT 1", "SELECT 2"]) == [[{"col1": 1}], [{"col1": 2}]]
+        assert conn._pool.idle_count() == 1
+        mock_cursor.close.assert_not_called()
@@ -0,0 +1,73 @@
+"""Tests for the lazy imports of the package."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+import snowflake_manifest_from_share
+from snowflake_manifest_from_share import connection
+
+from .test_replay import DEMO_SHARE_MANIFEST, DEMO_SHARE_RECORDING
+
+LIBRARY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code):
+    """Run code in a fresh interpreter (that can import the package) and return its stdout."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [LIBRARY_ROOT, env.get('PYTHONPATH')]))
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+    return result.stdout
+
+
+class TestLazyImports:
+    """Test cases for deferring heavy imports until they are needed."""
+
+    def test_cli_import_does_not_load_connector(self):
+        """Test that importing the CLI does not import snowflake.connector."""
+        output = run_python(
+            "import sys, snowflake_manifest_from_share.cli\n"
+            "print('snowflake.connector' in sys.modules)"
+        )
+
+        assert output == 'False\n'
+
+    def test_package_import_is_lazy(self):
+        """Test that importing the package does not import its modules."""
+        output = run_python(
+            "import sys, snowflake_manifest_from_share\n"
+            "print(sorted(m for m in sys.modules if m.startswith('snowflake_manifest_from_share.')))\n"
+            "print('yaml' in sys.modules)"
+        )
+
+        assert output == '[]\nFalse\n'
+
+    def test_replay_run_does_not_load_connector(self):
+        """Test that a replayed run never imports snowflake.connector."""
+        output = run_python(
+            "import sys\n"
+            "from snowflake_manifest_from_share.cli import main\n"
+            f"sys.argv = ['snowflake-manifest-from-share', '--replay', {DEMO_SHARE_RECORDING!r}, "
+            "'--share', 'DEMO_SHARE']\n"
+            "main()\n"
+            "print('snowflake.connector' in sys.modules)"
+        )
+
+        assert output == DEMO_SHARE_MANIFEST + '\nFalse\n'
+
+    def test_exports(self):
+        """Test that the public names resolve on first access."""
+        from snowflake_manifest_from_share.replay import ReplayConnection
+
+        assert snowflake_manifest_from_share.ReplayConnection is ReplayConnection
+        assert set(snowflake_manifest_from_share.__all__) <= set(dir(snowflake_manifest_from_share))
+        with pytest.raises(AttributeError, match="no attribute 'Missing'"):
+            snowflake_manifest_from_share.Missing
+
+    def test_connector_loaded_on_first_use(self):
+        """Test that the connector stand-in resolves to the real snowflake package."""
+        import snowflake.connector
+
+        assert connection.snowflake.connector is snowflake.connector
+        assert connection.snowflake.connector.DictCursor is snowflake.connector.DictCursor
@@ -0,0 +1,186 @@
+"""Tests for the pipeline instrumentation."""
+
+import io
+import json
+import sys
+import threading
+
+import pytest
+from unittest.mock import patch
+from snowflake_manifest_from_share.cli import main
+from snowflake_manifest_from_share.instrumentation import (
+    PHASE,
+    QUERY,
+    YAML,
+    Instrumentation,
+    instrumented,
+    query_label,
+    query_span,
+)
+from snowflake_manifest_from_share.replay import ReplayConnection
+from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
+from snowflake_manifest_from_share.yaml_formatter import YAMLFormatter
+
+from .test_replay import DEMO_SHARE_MANIFEST, DEMO_SHARE_RECORDING
+
+
+class TestInstrumentation:
+    """Test cases for Instrumentation."""
+
+    def test_span_records_duration_and_args(self):
+        """Test that a span is recorded with its category and arguments."""
+        instrumentation = Instrumentation()
+
+        with instrumentation.span('build_structure', PHASE, share='S'):
+            pass
+
+        span, = instrumentation.spans
+        assert (span.name, span.category, span.args, span.error) == ('build_structure', PHASE, {'share': 'S'}, None)
+        assert span.duration >= 0
+        assert span.thread_id == threading.get_ident()
+
+    def test_span_records_errors(self):
+        """Test that a failing block is recorded with its exception type and re-raised."""
+        instrumentation = Instrumentation()
+
+        with pytest.raises(KeyError):
+            with instrumentation.span('SHOW SHARES', QUERY):
+                raise KeyError('boom')
+
+        assert instrumentation.spans[0].error == 'KeyError'
+        assert instrumentation.summary()[0]['errors'] == 1
+
+    def test_hooks(self):
+        """Test that hooks receive finished spans and failing hooks are ignored."""
+        instrumentation = Instrumentation(keep_spans=False)
+        received = []
+
+        def failing_hook(span):
+            raise RuntimeError("hook failed")
+
+        instrumentation.add_hook(failing_hook)
+        instrumentation.add_hook(received.append)
+        with instrumentation.span('a', PHASE):
+            pass
+        instrumentation.remove_hook(received.append)
+        with instrumentation.span('b', PHASE):
+            pass
+
+        assert [span.name for span in received] == ['a']
+        assert instrumentation.spans == []
+
+    def test_summary(self):
+        """Test that spans are aggregated by category and name."""
+        with patch('snowflake_manifest_from_share.instrumentation.time.perf_counter',
+                   side_effect=[0.0, 1.0, 1.5, 2.0, 2.25, 3.0, 4.0]):
+            instrumentation = Instrumentation()
+            for name in ('q1', 'q1', 'q2'):
+                with instrumentation.span(name, QUERY):
+                    pass
+
+        summary = instrumentation.summary()
+        assert [(group['name'], group['count']) for group in summary] == [('q2', 1), ('q1', 2)]
+        assert summary[1]['total'] == pytest.approx(0.75)
+        assert summary[1]['mean'] == pytest.approx(0.375)
+        assert summary[1]['max'] == pytest.approx(0.5)
+        assert [span.name for span in instrumentation.slowest(QUERY, 1)] == ['q2']
+
+    def test_format_summary(self):
+        """Test the text table lists every group and the slowest queries."""
+        instrumentation = Instrumentation()
+        with query_span(instrumentation, 'SHOW GRANTS TO SHARE MY_SHARE'):
+            pass
+        with instrumented(instrumentation, 'analyze_share', PHASE):
+            pass
+
+        table = instrumentation.format_summary()
+        assert 'SHOW GRANTS TO SHARE ' in table
+        assert 'analyze_share' in table
+        assert 'Slowest queries:' in table
+        assert 'SHOW GRANTS TO SHARE MY_SHARE' in table
+
+    def test_chrome_trace(self, tmp_path):
+        """Test that spans are exported as complete Chrome trace events."""
+        instrumentation = Instrumentation()
+        with instrumentation.span('format_manifest', YAML, engine='fast'):
+            pass
+        with query_span(instrumentation, 'SHOW SHARES'):
+            pass
+
+        path = tmp_path / 'trace.json'
+        instrumentation.write_chrome_trace(str(path))
+        trace = json.loads(path.read_text())
+
+        events = trace['traceEvents']
+        assert [(event['name'], event['cat'], event['ph']) for event in events] == [
+            ('format_manifest', YAML, 'X'), ('SHOW SHARES', QUERY, 'X')
+        ]
+        assert events[0]['args'] == {'engine': 'fast'}
+        assert events[1]['args'] == {'query': 'SHOW SHARES'}
+        assert {event['tid'] for event in events} == {1}
+        assert events[1]['ts'] >= events[0]['ts']
+
+    def test_no_instrumentation(self):
+        """Test that the helpers are no-ops without instrumentation."""
+        with instrumented(None, 'analyze_share', PHASE):
+            pass
+        with pytest.raises(ValueError):
+            with query_span(None, 'SHOW SHARES'):
+                raise ValueError("passes through")
+
+    @pytest.mark.parametrize('query, label', [
+        ('SHOW SHARES', 'SHOW SHARES'),
+        ('SHOW GRANTS TO SHARE MY_SHARE', 'SHOW GRANTS TO SHARE'),
+        ('SHOW  GRANTS TO\n DATABASE ROLE DB.R1', 'SHOW GRANTS TO DATABASE ROLE'),
+        ('SHOW DATABASE ROLES IN DATABASE DB', 'SHOW DATABASE ROLES IN DATABASE'),
+        ('SELECT ' + 'X' * 100, 'SELECT ' + 'X' * 50 + '...'),
+    ])
+    def test_query_label(self, query, label):
+        """Test that query labels drop the object name so queries group together."""
+        assert query_label(query) == label
+
+
+class TestPipelineInstrumentation:
+    """Test cases for instrumenting manifest generation."""
+
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    def test_generator_phases_and_queries(self, max_workers):
+        """Test that the generator phases and every replayed query are timed."""
+        instrumentation = Instrumentation()
+        connection = ReplayConnection(DEMO_SHARE_RECORDING, instrumentation=instrumentation)
+        generator = ShareManifestGenerator(connection, max_workers=max_workers,
+                                           instrumentation=instrumentation)
+        formatter = YAMLFormatter(instrumentation=instrumentation)
+
+        assert formatter.format_manifest(generator.analyze_share('DEMO_SHARE')) == DEMO_SHARE_MANIFEST
+
+        phases = {span.name for span in instrumentation.spans if span.category == PHASE}
+        assert phases == {'analyze_share', 'share_grants', 'database_role_grants', 'build_structure'}
+        queries = [span for span in instrumentation.spans if span.category == QUERY]
+        assert len(queries) == connection.queries_served
+        assert all(span.args['share'] == 'DEMO_SHARE' for span in instrumentation.spans
+                   if span.category == PHASE)
+        assert [span.name for span in instrumentation.spans if span.category == YAML] == ['format_manifest']
+
+    def test_cli_profile(self, tmp_path):
+        """Test that --profile prints the timing table and --profile-trace writes a trace."""
+        trace_path = tmp_path / 'trace.json'
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--replay', DEMO_SHARE_RECORDING,
+            '--share', 'DEMO_SHARE',
+            '--profile',
+            '--profile-trace', str(trace_path)
+        ]
+        captured_output = io.StringIO()
+        captured_error = io.StringIO()
+
+        with patch.object(sys, 'argv', test_args):
+            with patch('sys.stdout', captured_output), patch('sys.stderr', captured_error):
+                main()
+
+        assert captured_output.getvalue() == DEMO_SHARE_MANIFEST + '\n'
+        assert 'analyze_share' in captured_error.getvalue()
+        assert 'Slowest queries:' in captured_error.getvalue()
+        categories = {event['cat'] for event in json.loads(trace_path.read_text())['traceEvents']}
+        assert categories == {PHASE, QUERY, YAML}
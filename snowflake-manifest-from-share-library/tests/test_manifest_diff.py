@@ -0,0 +1,188 @@
+"""Tests for manifest drift detection."""
+
+import io
+import json
+import sys
+
+import pytest
+from unittest.mock import patch
+from snowflake_manifest_from_share.cli import DIFF_EXIT_DRIFT, DIFF_EXIT_ERROR, main
+from snowflake_manifest_from_share.manifest_diff import (
+    diff_manifests,
+    diff_to_json,
+    format_diff,
+    index_manifest,
+    load_manifest,
+)
+from snowflake_manifest_from_share.replay import ReplayConnection
+from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
+
+from .test_replay import DEMO_SHARE_MANIFEST, DEMO_SHARE_RECORDING
+
+# The demo share manifest before CUSTOMERS was shared and with DR_VIEWER
+# instead of DR_ANALYST on ORDERS, plus a view that was dropped since
+OUTDATED_MANIFEST = DEMO_SHARE_MANIFEST.replace(
+    """          - CUSTOMERS:
+              roles: [DR_ANALYST]
+""", ""
+).replace(
+    """          - ORDERS:
+              roles: [DR_ANALYST]
+""", """          - ORDERS:
+              roles: [DR_VIEWER]
+"""
+).replace(
+    """          views:
+          - PRODUCT_CATALOG:
+""", """          views:
+          - PRODUCT_CATALOG:
+          - OLD_VIEW:
+"""
+)
+
+
+@pytest.fixture
+def demo_manifest():
+    """The manifest generated from the recorded demo share."""
+    return ShareManifestGenerator(ReplayConnection(DEMO_SHARE_RECORDING)).analyze_share('DEMO_SHARE')
+
+
+@pytest.fixture
+def manifest_file(tmp_path):
+    """Return a function writing manifest YAML to a file."""
+    def write(text):
+        path = tmp_path / 'manifest.yml'
+        path.write_text(text)
+        return str(path)
+    return write
+
+
+class TestManifestDiff:
+    """Test cases for indexing and comparing manifests."""
+
+    def test_index_generated_and_loaded_manifest(self, demo_manifest, manifest_file):
+        """Test that a generated manifest and its YAML index identically."""
+        index = index_manifest(demo_manifest)
+
+        assert index == index_manifest(load_manifest(manifest_file(DEMO_SHARE_MANIFEST)))
+        assert index['roles'] == {'DR_VIEWER', 'DR_ANALYST'}
+        assert index['schemas'] == {'DEMO_DB.PUBLIC', 'DEMO_DB.SALES'}
+        assert index['tables'] == {'DEMO_DB.SALES.ORDERS', 'DEMO_DB.SALES.CUSTOMERS'}
+        assert ('table', 'DEMO_DB.SALES.ORDERS', 'DR_ANALYST') in index['role_assignments']
+        assert ('database', 'DEMO_DB', 'DR_VIEWER') in index['role_assignments']
+
+    def test_no_drift(self, demo_manifest, manifest_file):
+        """Test that an up-to-date manifest has no drift."""
+        diff = diff_manifests(load_manifest(manifest_file(DEMO_SHARE_MANIFEST)), demo_manifest)
+
+        assert not diff.has_drift
+        assert format_diff(diff) == 'No drift'
+
+    def test_drift(self, demo_manifest, manifest_file):
+        """Test that added and removed objects and role assignments are reported."""
+        diff = diff_manifests(load_manifest(manifest_file(OUTDATED_MANIFEST)), demo_manifest)
+
+        assert diff.has_drift
+        assert diff.added['tables'] == ['DEMO_DB.SALES.CUSTOMERS']
+        assert diff.removed['views'] == ['DEMO_DB.PUBLIC.OLD_VIEW']
+        assert diff.added['role_assignments'] == [
+            ('table', 'DEMO_DB.SALES.CUSTOMERS', 'DR_ANALYST'),
+            ('table', 'DEMO_DB.SALES.ORDERS', 'DR_ANALYST'),
+        ]
+        assert diff.removed['role_assignments'] == [('table', 'DEMO_DB.SALES.ORDERS', 'DR_VIEWER')]
+        assert format_diff(diff).splitlines() == [
+            '+ table DEMO_DB.SALES.CUSTOMERS',
+            '- view DEMO_DB.PUBLIC.OLD_VIEW',
+            '- role DR_VIEWER on table DEMO_DB.SALES.ORDERS',
+            '+ role DR_ANALYST on table DEMO_DB.SALES.CUSTOMERS',
+            '+ role DR_ANALYST on table DEMO_DB.SALES.ORDERS',
+            '3 added, 2 removed',
+        ]
+
+    def test_diff_to_json(self, demo_manifest, manifest_file):
+        """Test the JSON report."""
+        diff = diff_manifests(load_manifest(manifest_file(OUTDATED_MANIFEST)), demo_manifest)
+
+        report = json.loads(diff_to_json(diff))
+
+        assert report['drift'] is True
+        assert report['removed']['views'] == ['DEMO_DB.PUBLIC.OLD_VIEW']
+        assert report['removed']['role_assignments'] == [
+            {'kind': 'table', 'name': 'DEMO_DB.SALES.ORDERS', 'role': 'DR_VIEWER'}
+        ]
+
+    def test_empty_manifest(self, demo_manifest):
+        """Test that a manifest without shared content reports everything as added."""
+        diff = diff_manifests({'manifest_version': 2, 'roles': [], 'shared_content': {}}, demo_manifest)
+
+        assert diff.added['databases'] == ['DEMO_DB']
+        assert diff.added['roles'] == ['DR_ANALYST', 'DR_VIEWER']
+        assert not any(diff.removed.values())
+
+    @pytest.mark.parametrize('text', ['', '- not a manifest', 'shared_content: [1, 2]'])
+    def test_load_invalid_manifest(self, manifest_file, text):
+        """Test that files that are not manifests are rejected."""
+        with pytest.raises(ValueError, match="Not an application manifest"):
+            load_manifest(manifest_file(text))
+
+
+class TestDiffCommand:
+    """Test cases for the diff subcommand."""
+
+    @staticmethod
+    def _run(*args):
+        test_args = ['snowflake-manifest-from-share', 'diff', '--replay', DEMO_SHARE_RECORDING,
+                     '--share', 'DEMO_SHARE'] + list(args)
+        captured_output = io.StringIO()
+        with patch.object(sys, 'argv', test_args):
+            with patch('sys.stdout', captured_output):
+                try:
+                    main()
+                    code = 0
+                except SystemExit as e:
+                    code = e.code
+        return code, captured_output.getvalue()
+
+    def test_no_drift(self, manifest_file):
+        """Test that an up-to-date manifest exits with 0."""
+        code, output = self._run('--manifest', manifest_file(DEMO_SHARE_MANIFEST))
+
+        assert code == 0
+        assert output == 'No drift\n'
+
+    def test_drift(self, manifest_file):
+        """Test that drift is reported and exits with DIFF_EXIT_DRIFT."""
+        code, output = self._run('--manifest', manifest_file(OUTDATED_MANIFEST), '--format', 'json')
+
+        assert code == DIFF_EXIT_DRIFT
+        assert json.loads(output)['added']['tables'] == ['DEMO_DB.SALES.CUSTOMERS']
+
+    def test_missing_manifest(self, tmp_path):
+        """Test that errors exit with DIFF_EXIT_ERROR."""
+        code, output = self._run('--manifest', str(tmp_path / 'missing.yml'))
+
+        assert code == DIFF_EXIT_ERROR
+        assert output == ''
+
+    @patch('snowflake_manifest_from_share.cli.open_connection_from_args')
+    def test_unreadable_grants(self, mock_open_connection, manifest_file):
+        """Test that failing grant queries are errors rather than drift."""
+        mock_open_connection.return_value = ReplayConnection.from_results({
+            'SHOW GRANTS TO SHARE DEMO_SHARE': Exception("Insufficient privileges")
+        })
+
+        code, output = self._run('--manifest', manifest_file(DEMO_SHARE_MANIFEST))
+
+        assert code == DIFF_EXIT_ERROR
+        assert output == ''
+
+    def test_connection_options_are_validated(self, manifest_file):
+        """Test that incomplete connection options exit with DIFF_EXIT_ERROR."""
+        test_args = ['snowflake-manifest-from-share', 'diff', '--account', 'myaccount',
+                     '--share', 'DEMO_SHARE', '--manifest', manifest_file(DEMO_SHARE_MANIFEST)]
+
+        with patch.object(sys, 'argv', test_args):
+            with pytest.raises(SystemExit) as e:
+                main()
+
+        assert e.value.code == DIFF_EXIT_ERROR
@@ -0,0 +1,262 @@
+"""Tests for the record/replay query backends."""
+
+import gzip
+import io
+import json
+import os
+import sys
+
+import pytest
+from unittest.mock import Mock, patch
+from snowflake_manifest_from_share.cli import main
+from snowflake_manifest_from_share.connection import SnowflakeConnection
+from snowflake_manifest_from_share.replay import (
+    RecordedQueryError,
+    RecordingConnection,
+    ReplayConnection,
+    normalize_query,
+)
+from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
+from snowflake_manifest_from_share.yaml_formatter import YAMLFormatter
+
+DEMO_SHARE_RECORDING = os.path.join(os.path.dirname(__file__), 'fixtures', 'demo_share.json')
+
+DEMO_SHARE_MANIFEST = """\
+manifest_version: 2
+roles:
+- DR_VIEWER:
+    comment: Read-only access to sales
+- DR_ANALYST:
+shared_content:
+  databases:
+  - DEMO_DB:
+      roles: [DR_VIEWER, DR_ANALYST]
+      schemas:
+      - PUBLIC:
+          views:
+          - PRODUCT_CATALOG:
+      - SALES:
+          roles: [DR_VIEWER, DR_ANALYST]
+          tables:
+          - ORDERS:
+              roles: [DR_ANALYST]
+          - CUSTOMERS:
+              roles: [DR_ANALYST]
+          views:
+          - DAILY_SUMMARY:
+              roles: [DR_VIEWER, DR_ANALYST]
+"""
+
+
+def live_connection():
+    """Create a mock live connection answering two queries."""
+    connection = Mock(spec=SnowflakeConnection)
+    answers = {
+        'SHOW SHARES': [{'kind': 'OUTBOUND', 'name': 'ORG.ACCOUNT.SHARE_A', 'created_on': 1}],
+        'SELECT 1': [(1, 'one')],
+    }
+    connection.execute_query_dict.side_effect = lambda query: answers[normalize_query(query)]
+    connection.iter_query_dict.side_effect = lambda query, **kwargs: iter(answers[normalize_query(query)])
+    connection.execute_query.side_effect = lambda query: answers[normalize_query(query)]
+    return connection
+
+
+class TestRecordAndReplay:
+    """Test cases for RecordingConnection and ReplayConnection."""
+
+    @pytest.mark.parametrize('filename', ['recording.json', 'recording.json.gz'])
+    def test_round_trip(self, tmp_path, filename):
+        """Test that recorded results are replayed identically."""
+        path = str(tmp_path / filename)
+        live = live_connection()
+        recorder = RecordingConnection(live, path)
+
+        shares = recorder.execute_query_dict('SHOW SHARES')
+        rows = recorder.execute_query('SELECT 1')
+        recorder.close()
+
+        live.close.assert_called_once()
+        replay = ReplayConnection(path)
+        assert replay.execute_query_dict('  SHOW\n  SHARES ') == shares
+        assert list(replay.iter_query_dict('SHOW SHARES')) == shares
+        assert replay.execute_query('SELECT 1') == rows
+        assert replay.queries_served == 3
+
+    def test_gzip_recording_is_compressed(self, tmp_path):
+        """Test that .gz recordings are gzip files."""
+        path = str(tmp_path / 'recording.json.gz')
+        recorder = RecordingConnection(live_connection(), path)
+        recorder.execute_query_dict('SHOW SHARES')
+        recorder.save()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            recording = json.load(f)
+        assert recording['queries'] == [{
+            'query': 'SHOW SHARES',
+            'columns': ['kind', 'name', 'created_on'],
+            'rows': [['OUTBOUND', 'ORG.ACCOUNT.SHARE_A', 1]]
+        }]
+
+    def test_streamed_query_is_recorded(self, tmp_path):
+        """Test that iter_query_dict results are recorded once consumed."""
+        path = str(tmp_path / 'recording.json')
+        recorder = RecordingConnection(live_connection(), path)
+
+        assert [row['name'] for row in recorder.iter_query_dict('SHOW SHARES')] == ['ORG.ACCOUNT.SHARE_A']
+        recorder.save()
+
+        assert ReplayConnection(path).execute_query_dict('SHOW SHARES')[0]['kind'] == 'OUTBOUND'
+
+    def test_errors_are_replayed(self, tmp_path):
+        """Test that a failing query fails again on replay."""
+        path = str(tmp_path / 'recording.json')
+        live = Mock(spec=SnowflakeConnection)
+        live.iter_query_dict.side_effect = Exception("Insufficient privileges")
+        recorder = RecordingConnection(live, path)
+
+        with pytest.raises(Exception, match="Insufficient privileges"):
+            list(recorder.iter_query_dict('SHOW GRANTS TO SHARE S'))
+        recorder.save()
+
+        with pytest.raises(RecordedQueryError, match="Insufficient privileges"):
+            ReplayConnection(path).execute_query_dict('SHOW GRANTS TO SHARE S')
+
+    def test_batch_round_trip(self, tmp_path):
+        """Test that batched statements are recorded one by one and replayed as one query."""
+        path = str(tmp_path / 'recording.json')
+        live = live_connection()
+        live.execute_batch_dict.side_effect = lambda queries: [live.execute_query_dict(q) for q in queries]
+        recorder = RecordingConnection(live, path)
+
+        results = recorder.execute_batch_dict(['SHOW SHARES', 'SHOW SHARES'])
+        recorder.save()
+
+        replay = ReplayConnection(path, latency=0.25)
+        with patch('snowflake_manifest_from_share.replay.time.sleep') as mock_sleep:
+            assert replay.execute_batch_dict(['SHOW SHARES', ' SHOW  SHARES']) == results
+        mock_sleep.assert_called_once_with(0.25)
+        assert replay.queries_served == 1
+        assert replay.execute_query_dict('SHOW SHARES') == results[0]
+
+    def test_batch_errors_are_replayed(self, tmp_path):
+        """Test that a failing multi-statement request fails again on replay."""
+        path = str(tmp_path / 'recording.json')
+        live = Mock(spec=SnowflakeConnection)
+        live.execute_batch_dict.side_effect = Exception("Multi-statement requests are disabled")
+        recorder = RecordingConnection(live, path)
+
+        with pytest.raises(Exception, match="disabled"):
+            recorder.execute_batch_dict(['SHOW SHARES', 'SELECT 1'])
+        recorder.save()
+
+        replay = ReplayConnection(path)
+        with pytest.raises(RecordedQueryError, match="disabled"):
+            replay.execute_batch_dict(['SHOW SHARES', 'SELECT 1'])
+        with pytest.raises(LookupError):
+            replay.execute_batch_dict(['SHOW SHARES'])
+
+    def test_unknown_query(self):
+        """Test that queries that were not recorded raise LookupError."""
+        replay = ReplayConnection.from_results({'SHOW SHARES': []})
+
+        with pytest.raises(LookupError, match="SHOW GRANTS TO SHARE S"):
+            replay.execute_query_dict('SHOW GRANTS TO SHARE S')
+
+    def test_unsupported_version(self, tmp_path):
+        """Test that recordings of another version are rejected."""
+        path = tmp_path / 'recording.json'
+        path.write_text(json.dumps({'version': 99, 'queries': []}))
+
+        with pytest.raises(ValueError, match="Unsupported recording version"):
+            ReplayConnection(str(path))
+
+    def test_latency(self):
+        """Test that every replayed query waits for the simulated latency."""
+        replay = ReplayConnection.from_results({'SHOW SHARES': [], 'SELECT 1': ValueError("boom")}, latency=0.25)
+
+        with patch('snowflake_manifest_from_share.replay.time.sleep') as mock_sleep:
+            replay.execute_query_dict('SHOW SHARES')
+            with pytest.raises(RecordedQueryError, match="boom"):
+                replay.execute_query_dict('SELECT 1')
+
+        assert mock_sleep.call_count == 2
+        mock_sleep.assert_called_with(0.25)
+
+    def test_invalid_arguments(self):
+        """Test argument validation."""
+        with pytest.raises(ValueError):
+            ReplayConnection()
+        with pytest.raises(ValueError):
+            ReplayConnection.from_results({}, latency=-1)
+
+
+class TestReplayManifestGeneration:
+    """Test cases for generating manifests from the recorded demo share."""
+
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    def test_analyze_recorded_share(self, max_workers):
+        """Test generating a manifest from a recording, without an account."""
+        generator = ShareManifestGenerator(ReplayConnection(DEMO_SHARE_RECORDING), max_workers=max_workers)
+
+        manifest = generator.analyze_share('DEMO_SHARE')
+
+        assert YAMLFormatter().format_manifest(manifest) == DEMO_SHARE_MANIFEST
+
+    def test_analyze_recorded_share_batched(self):
+        """Test that batching the role grants needs fewer round-trips for the same manifest."""
+        connection = ReplayConnection(DEMO_SHARE_RECORDING)
+        generator = ShareManifestGenerator(connection, batch_threshold=1)
+
+        manifest = generator.analyze_share('DEMO_SHARE')
+
+        assert YAMLFormatter().format_manifest(manifest) == DEMO_SHARE_MANIFEST
+        assert connection.queries_served == 2
+
+    def test_cli_replay(self):
+        """Test that --replay needs no credentials."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--replay', DEMO_SHARE_RECORDING,
+            '--share', 'DEMO_SHARE'
+        ]
+        captured_output = io.StringIO()
+
+        with patch.object(sys, 'argv', test_args):
+            with patch('sys.stdout', captured_output):
+                main()
+
+        assert captured_output.getvalue() == DEMO_SHARE_MANIFEST + '\n'
+
+    @patch('snowflake_manifest_from_share.cli.get_connection_from_args')
+    def test_cli_record(self, mock_get_connection, tmp_path):
+        """Test that --record writes the queries of a live run."""
+        path = str(tmp_path / 'recording.json.gz')
+        mock_get_connection.return_value = ReplayConnection(DEMO_SHARE_RECORDING)
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--account', 'myaccount',
+            '--user', 'testuser',
+            '--password', 'testpass',
+            '--share', 'DEMO_SHARE',
+            '--record', path,
+            '--output', str(tmp_path / 'manifest.yml')
+        ]
+
+        with patch.object(sys, 'argv', test_args):
+            main()
+
+        manifest = ShareManifestGenerator(ReplayConnection(path)).analyze_share('DEMO_SHARE')
+        assert YAMLFormatter().format_manifest(manifest) == DEMO_SHARE_MANIFEST
+
+    def test_cli_record_and_replay_exclusive(self):
+        """Test that --record and --replay cannot be combined."""
+        test_args = [
+            'snowflake-manifest-from-share',
+            '--replay', DEMO_SHARE_RECORDING,
+            '--record', 'out.json',
+            '--share', 'DEMO_SHARE'
+        ]
+
+        with patch.object(sys, 'argv', test_args):
+            with pytest.raises(SystemExit):
+                main()
@@ -2,8 +2,21 @@
 
 import pytest
 from unittest.mock import Mock, patch
-from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
+from snowflake_manifest_from_share.share_manifest_generator import (
+    ShareManifestGenerator,
+    _identifier_error,
+    _validate_identifier,
+    validate_identifiers,
+)
 from snowflake_manifest_from_share.connection import SnowflakeConnection
+from snowflake_manifest_from_share.yaml_formatter import YAMLFormatter, EmptyValue
+
+
+def mock_snowflake_connection():
+    """Create a mock SnowflakeConnection whose streamed rows come from execute_query_dict."""
+    connection = Mock(spec=SnowflakeConnection)
+    connection.iter_query_dict.side_effect = lambda query, **kwargs: iter(connection.execute_query_dict(query))
+    return connection
 
 
 class TestShareManifestGenerator:
@@ -12,7 +25,7 @@ class TestShareManifestGenerator:
     @pytest.fixture
     def mock_connection(self):
         """Create a mock SnowflakeConnection."""
-        return Mock(spec=SnowflakeConnection)
+        return mock_snowflake_connection()
 
     @pytest.fixture
     def generator(self, mock_connection):
@@ -311,4 +324,340 @@ class TestShareManifestGenerator:
 
         # Verify table has DR1 role
         table = schema['tables'][0]['EMPLOYEES']
-        assert 'DR1' in table['roles'].items
\ No newline at end of file
+        assert 'DR1' in table['roles'].items
+
+class TestConcurrentRoleFetching:
+    """Test cases for fetching database roles concurrently."""
+
+    ROLE_COUNT = 12
+
+    @staticmethod
+    def _answer(query):
+        """Answer SHOW commands for a share granting ROLE_COUNT database roles."""
+        query = ' '.join(query.split())
+        if query.startswith('SHOW GRANTS TO SHARE'):
+            return [
+                {'privilege': 'USAGE', 'granted_on': 'DATABASE_ROLE', 'name': f'TEST_DB.ROLE_{i}'}
+                for i in range(TestConcurrentRoleFetching.ROLE_COUNT)
+            ]
+        if query.startswith('SHOW DATABASE ROLES IN DATABASE'):
+            return [
+                {'name': f'ROLE_{i}', 'comment': f'Role {i}' if i % 2 else ''}
+                for i in range(TestConcurrentRoleFetching.ROLE_COUNT)
+            ]
+        if query.startswith('SHOW GRANTS TO DATABASE ROLE'):
+            role = query.rsplit('.', 1)[1]
+            return [
+                {'privilege': 'USAGE', 'granted_on': 'DATABASE', 'name': 'TEST_DB'},
+                {'privilege': 'USAGE', 'granted_on': 'SCHEMA', 'name': 'TEST_DB.PUBLIC'},
+                {'privilege': 'SELECT', 'granted_on': 'TABLE', 'name': f'TEST_DB.PUBLIC.{role}_TABLE'},
+                {'privilege': 'SELECT', 'granted_on': 'VIEW', 'name': 'TEST_DB.PUBLIC.SHARED_VIEW'},
+            ]
+        raise AssertionError(f"Unexpected query: {query}")
+
+    def _analyze(self, max_workers):
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = self._answer
+        generator = ShareManifestGenerator(connection, max_workers=max_workers, batch_threshold=0)
+        return generator._get_database_role_grants(
+            self._answer('SHOW GRANTS TO SHARE TEST_SHARE')
+        )
+
+    def test_invalid_max_workers(self):
+        """Test that max_workers must be positive."""
+        with pytest.raises(ValueError, match="max_workers"):
+            ShareManifestGenerator(mock_snowflake_connection(), max_workers=0)
+
+    def test_concurrent_matches_sequential(self):
+        """Test that concurrent fetching returns exactly the sequential result, in order."""
+        sequential = self._analyze(max_workers=1)
+        concurrent = self._analyze(max_workers=8)
+
+        assert concurrent == sequential
+        assert list(concurrent[1]) == [f'ROLE_{i}' for i in range(self.ROLE_COUNT)]
+
+    def test_concurrent_role_failure_is_isolated(self):
+        """Test that one failing role does not affect the other roles."""
+        def answer(query):
+            if 'ROLE_3' in query and 'SHOW GRANTS TO DATABASE ROLE' in query:
+                raise Exception("Insufficient privileges")
+            return self._answer(query)
+
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = answer
+        generator = ShareManifestGenerator(connection, max_workers=4, batch_threshold=0)
+
+        role_grants, role_info = generator._get_database_role_grants(
+            self._answer('SHOW GRANTS TO SHARE TEST_SHARE')
+        )
+
+        assert 'ROLE_3' in role_info
+        assert not [g for g in role_grants if g['role'] == 'ROLE_3']
+        assert len(role_grants) == 4 * (self.ROLE_COUNT - 1)
+
+
+class TestBatchedRoleFetching:
+    """Test cases for collecting database role grants in multi-statement requests."""
+
+    @staticmethod
+    def _connection():
+        """Create a mock connection answering batches statement by statement."""
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = TestConcurrentRoleFetching._answer
+        connection.execute_batch_dict.side_effect = lambda queries: [
+            TestConcurrentRoleFetching._answer(query) for query in queries
+        ]
+        return connection
+
+    @staticmethod
+    def _share_grants():
+        return TestConcurrentRoleFetching._answer('SHOW GRANTS TO SHARE TEST_SHARE')
+
+    def test_batch_matches_per_role(self):
+        """Test that the batch returns exactly the per-role result in one request."""
+        connection = self._connection()
+        generator = ShareManifestGenerator(connection)
+
+        batched = generator._get_database_role_grants(self._share_grants())
+
+        assert batched == TestConcurrentRoleFetching()._analyze(max_workers=1)
+        connection.execute_batch_dict.assert_called_once()
+        connection.iter_query_dict.assert_not_called()
+        queries = connection.execute_batch_dict.call_args.args[0]
+        assert queries[0] == 'SHOW DATABASE ROLES IN DATABASE TEST_DB'
+        assert len(queries) == TestConcurrentRoleFetching.ROLE_COUNT + 1
+        assert (generator.role_cache_hits, generator.role_cache_misses) == (TestConcurrentRoleFetching.ROLE_COUNT, 1)
+
+    def test_below_threshold_fetches_per_role(self):
+        """Test that batching only starts at the threshold."""
+        connection = self._connection()
+        generator = ShareManifestGenerator(connection, batch_threshold=TestConcurrentRoleFetching.ROLE_COUNT + 1)
+
+        generator._get_database_role_grants(self._share_grants())
+
+        connection.execute_batch_dict.assert_not_called()
+
+    def test_large_batches_are_split(self):
+        """Test that batches are split into requests of at most _MAX_BATCH_STATEMENTS."""
+        connection = self._connection()
+        generator = ShareManifestGenerator(connection)
+
+        with patch('snowflake_manifest_from_share.share_manifest_generator._MAX_BATCH_STATEMENTS', 5):
+            batched = generator._get_database_role_grants(self._share_grants())
+
+        assert [len(c.args[0]) for c in connection.execute_batch_dict.call_args_list] == [5, 5, 3]
+        assert batched == TestConcurrentRoleFetching()._analyze(max_workers=1)
+
+    def test_failed_batch_falls_back_to_per_role(self):
+        """Test that a failing batch is retried one role at a time."""
+        connection = self._connection()
+        connection.execute_batch_dict.side_effect = Exception("Multi-statement requests are disabled")
+        generator = ShareManifestGenerator(connection, max_workers=4)
+
+        batched = generator._get_database_role_grants(self._share_grants())
+
+        assert batched == TestConcurrentRoleFetching()._analyze(max_workers=1)
+        assert connection.iter_query_dict.call_count == TestConcurrentRoleFetching.ROLE_COUNT + 1
+
+    def test_invalid_batch_threshold(self):
+        """Test that batch_threshold must not be negative."""
+        with pytest.raises(ValueError, match="batch_threshold"):
+            ShareManifestGenerator(mock_snowflake_connection(), batch_threshold=-1)
+
+
+class TestDatabaseRoleCache:
+    """Test cases for the per-database SHOW DATABASE ROLES cache."""
+
+    @pytest.fixture
+    def mock_connection(self):
+        """Create a mock SnowflakeConnection."""
+        return mock_snowflake_connection()
+
+    def test_role_info_served_from_cache(self, mock_connection):
+        """Test that roles in the same database share a single SHOW DATABASE ROLES."""
+        mock_connection.execute_query_dict.return_value = [
+            {'name': 'DR1', 'comment': ' First role '},
+            {'name': 'DR2', 'comment': ''},
+            {'name': 'DR3', 'comment': None},
+        ]
+        generator = ShareManifestGenerator(mock_connection)
+
+        assert generator._get_role_info('DB1.DR1') == {'comment': 'First role'}
+        assert generator._get_role_info('DB1.DR2') == {}
+        assert generator._get_role_info('DB1.DR3') == {}
+        assert generator._get_role_info('DB1.MISSING') == {}
+
+        assert mock_connection.execute_query_dict.call_count == 1
+        assert generator.role_cache_misses == 1
+        assert generator.role_cache_hits == 3
+
+    def test_role_info_cached_per_database(self, mock_connection):
+        """Test that each database is queried once."""
+        mock_connection.execute_query_dict.return_value = [{'name': 'DR1', 'comment': 'Role'}]
+        generator = ShareManifestGenerator(mock_connection)
+
+        generator._get_role_info('DB1.DR1')
+        generator._get_role_info('DB2.DR1')
+        generator._get_role_info('DB1.DR1')
+
+        queries = [' '.join(c.args[0].split()) for c in mock_connection.execute_query_dict.call_args_list]
+        assert queries == [
+            'SHOW DATABASE ROLES IN DATABASE DB1',
+            'SHOW DATABASE ROLES IN DATABASE DB2',
+        ]
+        assert (generator.role_cache_hits, generator.role_cache_misses) == (1, 2)
+
+    def test_failed_lookup_not_cached(self, mock_connection):
+        """Test that a failed SHOW DATABASE ROLES is retried on the next lookup."""
+        mock_connection.execute_query_dict.side_effect = [
+            Exception("Database error"),
+            [{'name': 'DR1', 'comment': 'Role'}],
+        ]
+        generator = ShareManifestGenerator(mock_connection)
+
+        assert generator._get_role_info('DB1.DR1') == {}
+        assert generator._get_role_info('DB1.DR1') == {'comment': 'Role'}
+        assert generator.role_cache_misses == 2
+
+    def test_cache_reset_per_run(self, mock_connection):
+        """Test that every analyze_share run starts with an empty cache."""
+        mock_connection.execute_query_dict.side_effect = lambda query: (
+            [{'privilege': 'USAGE', 'granted_on': 'DATABASE_ROLE', 'name': f'DB1.DR{i}'} for i in range(3)]
+            if 'SHOW GRANTS TO SHARE' in query
+            else [{'name': f'DR{i}', 'comment': f'Role {i}'} for i in range(3)]
+            if 'SHOW DATABASE ROLES' in query
+            else []
+        )
+        generator = ShareManifestGenerator(mock_connection)
+
+        for _ in range(2):
+            result = generator.analyze_share('TEST_SHARE')
+            assert result['roles'] == [{f'DR{i}': {'comment': f'Role {i}'}} for i in range(3)]
+            assert (generator.role_cache_hits, generator.role_cache_misses) == (2, 1)
+
+
+class TestSharedContentStructure:
+    """Test cases for the single-pass shared content builder."""
+
+    @staticmethod
+    def _grant(privilege, granted_on, name, role=None):
+        return {'grant': {'privilege': privilege, 'granted_on': granted_on, 'name': name}, 'role': role}
+
+    def test_roles_in_first_granted_order(self):
+        """Test that role lists follow the order in which roles were first granted."""
+        grants = [
+            self._grant('USAGE', 'DATABASE', 'DB1', 'ROLE_B'),
+            self._grant('USAGE', 'DATABASE', 'DB1', 'ROLE_A'),
+            self._grant('USAGE', 'SCHEMA', 'DB1.S1', 'ROLE_C'),
+            self._grant('USAGE', 'SCHEMA', 'DB1.S1', 'ROLE_A'),
+            self._grant('SELECT', 'TABLE', 'DB1.S1.T1', 'ROLE_Z'),
+            self._grant('SELECT', 'TABLE', 'DB1.S1.T1', 'ROLE_A'),
+            self._grant('SELECT', 'TABLE', 'DB1.S1.T1', 'ROLE_Z'),
+        ]
+
+        result, mappings = ShareManifestGenerator(None)._build_shared_content_structure(grants)
+
+        db = result['databases'][0]['DB1']
+        schema = db['schemas'][0]['S1']
+        assert db['roles'].items == ['ROLE_B', 'ROLE_A']
+        assert schema['roles'].items == ['ROLE_C', 'ROLE_A']
+        assert schema['tables'][0]['T1']['roles'].items == ['ROLE_Z', 'ROLE_A']
+        assert list(mappings['tables']['DB1.S1.T1']) == ['ROLE_Z', 'ROLE_A']
+
+    def test_objects_registered_regardless_of_grant_order(self):
+        """Test that objects granted before their schema/database are still included."""
+        grants = [
+            self._grant('SELECT', 'VIEW', 'DB1.S1.V1', 'ROLE_A'),
+            self._grant('SELECT', 'TABLE', 'DB1.S1.MY.DOTTED.TABLE'),
+            self._grant('USAGE', 'SCHEMA', 'DB1.S1'),
+            self._grant('USAGE', 'DATABASE_ROLE', 'DB1.ROLE_A'),
+            self._grant('SELECT', 'TABLE', 'DB2.S1.T1'),
+            self._grant('USAGE', 'SCHEMA', 'DB2.S1'),
+        ]
+
+        result, _ = ShareManifestGenerator(None)._build_shared_content_structure(grants)
+
+        assert len(result['databases']) == 1
+        db = result['databases'][0]['DB1']
+        assert db['roles'].items == ['ROLE_A']
+        schema = db['schemas'][0]['S1']
+        assert 'roles' not in schema
+        assert list(schema['tables'][0]) == ['MY.DOTTED.TABLE']
+        assert isinstance(schema['tables'][0]['MY.DOTTED.TABLE'], EmptyValue)
+        assert schema['views'][0]['V1']['roles'].items == ['ROLE_A']
+
+    def test_output_is_deterministic(self):
+        """Test that the formatted manifest does not depend on set ordering."""
+        grants = [self._grant('USAGE', 'DATABASE', 'DB1')]
+        grants += [self._grant('USAGE', 'SCHEMA', 'DB1.S1', f'ROLE_{i}') for i in range(20, 0, -1)]
+        grants += [self._grant('SELECT', 'TABLE', f'DB1.S1.T{i % 3}', f'ROLE_{i}') for i in range(20)]
+        generator = ShareManifestGenerator(None)
+        formatter = YAMLFormatter()
+
+        first = formatter.format_manifest(generator._build_shared_content_structure(grants)[0])
+        second = formatter.format_manifest(generator._build_shared_content_structure(list(grants))[0])
+
+        assert first == second
+        assert 'roles: [ROLE_20, ROLE_19, ROLE_18' in first
+
+
+class TestIdentifierValidation:
+    """Test cases for identifier validation."""
+
+    @pytest.mark.parametrize('identifier', [
+        'TEST_DB', 'TEST_DB.PUBLIC.MY_TABLE', 'db$1', 'my-share', '  PADDED  ', 'A' * 255,
+    ])
+    def test_valid_identifiers(self, identifier):
+        """Test that valid identifiers are returned stripped."""
+        assert _validate_identifier(identifier) == identifier.strip()
+
+    @pytest.mark.parametrize('identifier, reason', [
+        ('DB; DROP TABLE X', 'dangerous characters or keywords'),
+        ("DB'", 'dangerous characters or keywords'),
+        ('DB.DROP', 'dangerous characters or keywords'),
+        ('DB--comment', 'dangerous characters or keywords'),
+        ('DB/*', 'dangerous characters or keywords'),
+        ('x OR 1=1', 'dangerous characters or keywords'),
+        ('a.union.b', 'dangerous characters or keywords'),
+        ('MY DB', 'invalid characters'),
+        ('DB@1', 'invalid characters'),
+        ('A' * 256, 'too long'),
+    ])
+    def test_invalid_identifiers(self, identifier, reason):
+        """Test that invalid identifiers are rejected with the reason."""
+        with pytest.raises(ValueError, match=f"Invalid share name: .*{reason}"):
+            _validate_identifier(identifier, "share name")
+
+    @pytest.mark.parametrize('identifier', ['', None, 42])
+    def test_empty_or_non_string(self, identifier):
+        """Test that empty and non-string identifiers are rejected."""
+        with pytest.raises(ValueError, match="must be a non-empty string"):
+            _validate_identifier(identifier)
+
+    def test_results_are_cached(self):
+        """Test that a repeated identifier is only checked once."""
+        _identifier_error.cache_clear()
+        for _ in range(3):
+            _validate_identifier('CACHED_DB.ROLE')
+            with pytest.raises(ValueError):
+                _validate_identifier('CACHED DB')
+
+        info = _identifier_error.cache_info()
+        assert info.misses == 2
+        assert info.hits == 4
+
+    def test_validate_identifiers(self):
+        """Test bulk validation."""
+        assert validate_identifiers([' DB.R1', 'DB.R2 '], "database role name") == ['DB.R1', 'DB.R2']
+        with pytest.raises(ValueError, match="Invalid database role name"):
+            validate_identifiers(['DB.R1', 'DB.R1;'], "database role name")
+
+    def test_invalid_role_fails_before_fetching(self):
+        """Test that an invalid database role name stops generation before any role is fetched."""
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.return_value = []
+        generator = ShareManifestGenerator(connection)
+
+        with pytest.raises(ValueError, match="Invalid database role name"):
+            generator._collect_database_roles(['DB.R1', 'DB.R2; DROP TABLE X'])
+        connection.execute_query_dict.assert_not_called()
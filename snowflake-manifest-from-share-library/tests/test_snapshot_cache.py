@@ -0,0 +1,186 @@
+"""Tests for the grant snapshot cache."""
+
+import json
+import os
+import pytest
+from unittest.mock import Mock, patch
+from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
+from snowflake_manifest_from_share.snapshot_cache import GrantSnapshotCache, content_hash, default_cache_dir
+from snowflake_manifest_from_share.yaml_formatter import YAMLFormatter
+from .test_share_manifest_generator import mock_snowflake_connection
+
+
+def share_answer(roles):
+    """Build a query handler for a share granting the given database roles of TEST_DB."""
+    def answer(query):
+        query = ' '.join(query.split())
+        if query.startswith('SHOW GRANTS TO SHARE'):
+            return [{'privilege': 'USAGE', 'granted_on': 'DATABASE', 'name': 'TEST_DB'}] + [
+                {'privilege': 'USAGE', 'granted_on': 'DATABASE_ROLE', 'name': f'TEST_DB.{role}'}
+                for role in roles
+            ]
+        if query.startswith('SHOW DATABASE ROLES IN DATABASE'):
+            return [{'name': role, 'comment': f'{role} comment'} for role in roles]
+        if query.startswith('SHOW GRANTS TO DATABASE ROLE'):
+            role = query.rsplit('.', 1)[1]
+            return [
+                {'privilege': 'USAGE', 'granted_on': 'SCHEMA', 'name': 'TEST_DB.PUBLIC'},
+                {'privilege': 'SELECT', 'granted_on': 'TABLE', 'name': f'TEST_DB.PUBLIC.{role}_TABLE'},
+            ]
+        raise AssertionError(f"Unexpected query: {query}")
+    return answer
+
+
+def executed_queries(connection):
+    return [' '.join(c.args[0].split()) for c in connection.execute_query_dict.call_args_list]
+
+
+class TestGrantSnapshotCache:
+    """Test cases for GrantSnapshotCache."""
+
+    def test_default_cache_dir_honours_xdg(self):
+        """Test that XDG_CACHE_HOME is used for the default directory."""
+        with patch.dict(os.environ, {'XDG_CACHE_HOME': '/tmp/xdg'}):
+            assert default_cache_dir() == os.path.join('/tmp/xdg', 'snowflake-manifest-from-share')
+
+    def test_negative_ttl(self, tmp_path):
+        """Test that the TTL cannot be negative."""
+        with pytest.raises(ValueError, match="ttl"):
+            GrantSnapshotCache(str(tmp_path), ttl=-1)
+
+    def test_load_missing(self, tmp_path):
+        """Test loading a share without snapshot."""
+        assert GrantSnapshotCache(str(tmp_path)).load('TEST_SHARE') is None
+
+    def test_save_and_load(self, tmp_path):
+        """Test a snapshot round trip including content hashes."""
+        cache = GrantSnapshotCache(str(tmp_path))
+        rows = [{'privilege': 'USAGE', 'granted_on': 'DATABASE', 'name': 'TEST_DB'}]
+        role = {'info': {'comment': 'c'}, 'rows': rows, 'fetched_at': 1.0}
+
+        saved = cache.save('TEST_SHARE', {'rows': rows, 'fetched_at': 2.0}, {'TEST_DB.DR1': role})
+        loaded = cache.load('TEST_SHARE')
+
+        assert loaded == saved
+        assert loaded['share_grants']['content_hash'] == content_hash(rows)
+        assert loaded['roles']['TEST_DB.DR1']['rows'] == rows
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    def test_freshness(self, tmp_path):
+        """Test that entries are only served within the TTL."""
+        cache = GrantSnapshotCache(str(tmp_path), ttl=60)
+        snapshot = {
+            'share_grants': {'rows': ['share'], 'fetched_at': 1000.0},
+            'roles': {'DB.OLD': {'fetched_at': 900.0}, 'DB.NEW': {'fetched_at': 1000.0}}
+        }
+
+        with patch('snowflake_manifest_from_share.snapshot_cache.time.time', return_value=1030.0):
+            assert cache.share_grants(snapshot) == ['share']
+            assert cache.role(snapshot, 'DB.OLD') is None
+            assert cache.role(snapshot, 'DB.NEW') == {'fetched_at': 1000.0}
+            assert cache.role(snapshot, 'DB.MISSING') is None
+
+        with patch('snowflake_manifest_from_share.snapshot_cache.time.time', return_value=1090.0):
+            assert cache.share_grants(snapshot) is None
+
+    def test_refresh_ignores_cache(self, tmp_path):
+        """Test that refresh ignores fresh share grants and roles."""
+        cache = GrantSnapshotCache(str(tmp_path), refresh=True)
+        snapshot = {
+            'share_grants': {'rows': [], 'fetched_at': 10 ** 12},
+            'roles': {'DB.DR1': {'fetched_at': 10 ** 12}}
+        }
+
+        assert cache.share_grants(snapshot) is None
+        assert cache.role(snapshot, 'DB.DR1') is None
+
+    def test_scopes_kept_apart(self, tmp_path):
+        """Test that snapshots are only reused by the account and role that took them."""
+        GrantSnapshotCache(str(tmp_path), scope='account:a;role:R1').save('SHARE', {'rows': []}, {})
+
+        assert GrantSnapshotCache(str(tmp_path), scope='account:a;role:R1').load('SHARE') is not None
+        assert GrantSnapshotCache(str(tmp_path), scope='account:a;role:R2').load('SHARE') is None
+        assert GrantSnapshotCache(str(tmp_path), scope='account:b;role:R1').load('SHARE') is None
+        assert GrantSnapshotCache(str(tmp_path)).load('SHARE') is None
+
+    def test_unreadable_or_old_snapshots_ignored(self, tmp_path):
+        """Test that corrupt and other-version snapshots are ignored."""
+        cache = GrantSnapshotCache(str(tmp_path))
+        (tmp_path / 'BROKEN.json').write_text('{not json')
+        (tmp_path / 'OLD.json').write_text(json.dumps({'version': 0}))
+
+        assert cache.load('BROKEN') is None
+        assert cache.load('OLD') is None
+
+
+class TestGeneratorWithSnapshotCache:
+    """Test cases for manifest generation backed by the snapshot cache."""
+
+    def _generator(self, cache, roles):
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = share_answer(roles)
+        return ShareManifestGenerator(connection, snapshot_cache=cache), connection
+
+    def test_cached_run_skips_queries(self, tmp_path):
+        """Test that a repeat run within the TTL does not query Snowflake."""
+        cache = GrantSnapshotCache(str(tmp_path))
+        generator, connection = self._generator(cache, ['DR1', 'DR2'])
+        first = generator.analyze_share('TEST_SHARE')
+        assert len(executed_queries(connection)) == 4
+
+        generator, connection = self._generator(cache, ['DR1', 'DR2'])
+        second = generator.analyze_share('TEST_SHARE')
+
+        assert executed_queries(connection) == []
+        assert YAMLFormatter().format_manifest(second) == YAMLFormatter().format_manifest(first)
+        assert second['roles'] == [{'DR1': {'comment': 'DR1 comment'}}, {'DR2': {'comment': 'DR2 comment'}}]
+
+    def test_refresh_fetches_everything(self, tmp_path):
+        """Test that a refresh re-reads the share grants and every role."""
+        generator, _ = self._generator(GrantSnapshotCache(str(tmp_path)), ['DR1', 'DR2'])
+        generator.analyze_share('TEST_SHARE')
+
+        generator, connection = self._generator(GrantSnapshotCache(str(tmp_path), refresh=True), ['DR1', 'DR3'])
+        result = generator.analyze_share('TEST_SHARE')
+
+        assert executed_queries(connection) == [
+            'SHOW GRANTS TO SHARE TEST_SHARE',
+            'SHOW DATABASE ROLES IN DATABASE TEST_DB',
+            'SHOW GRANTS TO DATABASE ROLE TEST_DB.DR1',
+            'SHOW GRANTS TO DATABASE ROLE TEST_DB.DR3',
+        ]
+        assert [list(role)[0] for role in result['roles']] == ['DR1', 'DR3']
+        assert set(GrantSnapshotCache(str(tmp_path)).load('TEST_SHARE')['roles']) == {'TEST_DB.DR1', 'TEST_DB.DR3'}
+
+    def test_zero_ttl_fetches_everything(self, tmp_path):
+        """Test that a TTL of zero always queries Snowflake."""
+        generator, _ = self._generator(GrantSnapshotCache(str(tmp_path)), ['DR1'])
+        generator.analyze_share('TEST_SHARE')
+
+        generator, connection = self._generator(GrantSnapshotCache(str(tmp_path), ttl=0), ['DR1'])
+        generator.analyze_share('TEST_SHARE')
+
+        assert len(executed_queries(connection)) == 3
+
+    def test_failed_role_not_cached(self, tmp_path):
+        """Test that roles whose grants could not be read are not stored."""
+        answer = share_answer(['DR1', 'DR2'])
+
+        def failing(query):
+            if 'SHOW GRANTS TO DATABASE ROLE' in query and query.strip().endswith('DR2'):
+                raise Exception("Insufficient privileges")
+            return answer(query)
+
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = failing
+        ShareManifestGenerator(connection, snapshot_cache=GrantSnapshotCache(str(tmp_path))).analyze_share('TEST_SHARE')
+
+        assert set(GrantSnapshotCache(str(tmp_path)).load('TEST_SHARE')['roles']) == {'TEST_DB.DR1'}
+
+    def test_failed_share_grants_not_cached(self, tmp_path):
+        """Test that no snapshot is written when the share grants could not be read."""
+        connection = mock_snowflake_connection()
+        connection.execute_query_dict.side_effect = Exception("Share does not exist")
+        ShareManifestGenerator(connection, snapshot_cache=GrantSnapshotCache(str(tmp_path))).analyze_share('TEST_SHARE')
+
+        assert GrantSnapshotCache(str(tmp_path)).load('TEST_SHARE') is None
@@ -3,8 +3,12 @@
 import pytest
 import yaml
 import tempfile
+import io
 import os
+import random
 from unittest.mock import patch
+from snowflake_manifest_from_share import yaml_formatter
+from snowflake_manifest_from_share.share_manifest_generator import ShareManifestGenerator
 from snowflake_manifest_from_share.yaml_formatter import YAMLFormatter, EmptyValue, FlowStyleList
 
 
@@ -280,6 +284,263 @@ class TestYAMLFormatter:
         assert 'PUBLIC_VIEW:' in result
 
 
+class TestStreamingWriter:
+    """Test cases for YAMLFormatter.write_manifest."""
+
+    @staticmethod
+    def _manifest():
+        return {
+            'manifest_version': 2,
+            'roles': [
+                {'VIEWER': {'comment': 'Read-only: access'}},
+                {'ANALYST': EmptyValue()}
+            ],
+            'shared_content': {
+                'databases': [
+                    {
+                        'DEMO_DB': {
+                            'roles': FlowStyleList(['ANALYST']),
+                            'schemas': [
+                                {
+                                    'ANALYTICS': {
+                                        'roles': FlowStyleList(['VIEWER', 'ANALYST']),
+                                        'tables': [{'EMPLOYEES': {'roles': FlowStyleList(['ANALYST'])}}],
+                                        'views': [{'PUBLIC_VIEW': EmptyValue()}, {'YES': {}}, {'123': []}]
+                                    }
+                                }
+                            ]
+                        }
+                    }
+                ]
+            },
+            'z_flags': [True, None, 1.5, 'null', 'multi\nline', 'ünïcödé']
+        }
+
+    @pytest.mark.parametrize('dumper', [
+        yaml_formatter.StreamingYAMLDumper,
+        yaml_formatter.CustomYAMLDumper,
+    ], ids=['default', 'pure-python'])
+    @pytest.mark.parametrize('indent, sort_keys', [(2, True), (4, False)])
+    def test_matches_format_manifest(self, dumper, indent, sort_keys):
+        """Test that streaming produces exactly the format_manifest output, with or without libyaml."""
+        formatter = YAMLFormatter(indent=indent, sort_keys=sort_keys)
+        stream = io.StringIO()
+
+        with patch.object(yaml_formatter, 'StreamingYAMLDumper', dumper):
+            formatter.write_manifest(self._manifest(), stream)
+
+        assert stream.getvalue() == formatter.format_manifest(self._manifest())
+        assert 'roles: [VIEWER, ANALYST]' in stream.getvalue()
+        assert 'PUBLIC_VIEW:\n' in stream.getvalue()
+
+    def test_uses_libyaml_when_available(self):
+        """Test that the streaming dumper is C-accelerated if libyaml is present."""
+        if yaml.__with_libyaml__:
+            assert issubclass(yaml_formatter.StreamingYAMLDumper, yaml.CSafeDumper)
+        else:
+            assert issubclass(yaml_formatter.StreamingYAMLDumper, yaml.SafeDumper)
+
+    @pytest.mark.parametrize('data', [
+        {'roles': [{'VIEWER': {'comment': 'Sales \U0001F4C8 dashboards \U0001F600'}}]},
+        {'shared_content': {'databases': [{'': EmptyValue()}]}, 'roles': FlowStyleList(['\U0001F512'])},
+        {'': {'comment': 'empty key'}},
+    ], ids=['emoji-comment', 'emoji-flow-list', 'empty-key'])
+    def test_matches_format_manifest_where_libyaml_differs(self, data):
+        """Test that non-BMP text and empty keys are written like format_manifest and round-trip."""
+        formatter = YAMLFormatter()
+        stream = io.StringIO()
+
+        formatter.write_manifest(data, stream)
+
+        assert stream.getvalue() == formatter.format_manifest(data)
+        assert '\\U' not in stream.getvalue()
+        assert yaml.safe_load(stream.getvalue()) == yaml.safe_load(formatter.format_manifest(data))
+
+    @pytest.mark.parametrize('key', [
+        'T' * 125,
+        'É' * 65,
+        'TABLE\tNAME',
+        '\x07' * 125,
+    ], ids=['long-key', 'multibyte-key', 'escaped-key', 'long-escaped-key'])
+    def test_save_to_file_matches_format_manifest_for_keys(self, key, tmp_path):
+        """Test that keys libyaml measures or quotes differently are saved like format_manifest."""
+        formatter = YAMLFormatter()
+        data = {'roles': [{'R': {'tables': {key: {'privileges': ['SELECT']}}}}]}
+        filename = tmp_path / 'manifest.yml'
+
+        formatter.save_to_file(data, str(filename))
+
+        assert filename.read_text(encoding='utf-8') == formatter.format_manifest(data)
+        assert yaml.safe_load(filename.read_text(encoding='utf-8')) == data
+
+    def test_writes_incrementally(self):
+        """Test that a large manifest is written in many chunks, not one string."""
+        data = {'views': [{f'VIEW_{i}': {'roles': FlowStyleList(['VIEWER'])}} for i in range(2000)]}
+        stream = io.StringIO()
+        writes = []
+        write = stream.write
+        stream.write = lambda text: writes.append(len(text)) or write(text)
+
+        YAMLFormatter().write_manifest(data, stream)
+
+        assert len(writes) > 1
+        assert max(writes) < len(stream.getvalue())
+        assert yaml.safe_load(stream.getvalue())['views'][1999] == {'VIEW_1999': {'roles': ['VIEWER']}}
+
+    def test_unsupported_value(self):
+        """Test that values the safe dumper cannot represent raise."""
+        with pytest.raises(yaml.representer.RepresenterError):
+            YAMLFormatter().write_manifest({'value': object()}, io.StringIO())
+
+
+# Scalars that exercise quoting, implicit type resolution and width limits
+DIFFERENTIAL_SCALARS = [
+    'DEMO_DB', 'DB.SCHEMA.TABLE$1', 'my-view', '_x', 'a', 'E1', 'e5', 'yes', 'Yes', 'YEs', 'NO', 'on', 'Off',
+    'y', 'null', 'Null', '~', '', '1', '1.5', '1e5', '0x1F', '.inf', '2024-01-01', '-', ': x', 'x:y', 'x #y',
+    'Read only', 'Sales data, by region', "Analyst's view (v2)", 'a  b', 'R&D / ops', 'a, b', '{x}', '[x]', 'x?',
+    '- y', "it's", '"q"', ' lead', 'trail ', 'multi\nline', 'ünïcödé', 'A' * 120, 'A' * 121, 'B' * 1200,
+    0, 7, -3, 10 ** 30, 2.5, True, False, None,
+]
+
+
+def random_manifest_value(rng, depth=0):
+    """Build a random manifest-like value for the differential tests."""
+    choice = rng.random()
+    if depth > 4 or choice < 0.3:
+        return EmptyValue() if rng.random() < 0.1 else rng.choice(DIFFERENTIAL_SCALARS)
+    if choice < 0.6:
+        return {rng.choice(DIFFERENTIAL_SCALARS): random_manifest_value(rng, depth + 1)
+                for _ in range(rng.randint(0, 4))}
+    if choice < 0.8:
+        return [random_manifest_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return FlowStyleList([rng.choice(DIFFERENTIAL_SCALARS) for _ in range(rng.randint(0, 3))])
+
+
+def fast_path_supported(formatter, data):
+    try:
+        list(formatter._fast_lines(data))
+        return True
+    except yaml_formatter._FastPathUnsupported:
+        return False
+
+
+def format_or_error(formatter, data):
+    try:
+        return formatter.format_manifest(data)
+    except Exception as e:
+        return type(e).__name__
+
+
+class TestFastEngine:
+    """Differential tests: the fast engine must match PyYAML byte for byte."""
+
+    @staticmethod
+    def _generated_manifest():
+        grants = [
+            {'grant': {'privilege': 'USAGE', 'granted_on': 'DATABASE', 'name': 'DEMO_DB'}, 'role': None},
+            {'grant': {'privilege': 'USAGE', 'granted_on': 'SCHEMA', 'name': 'DEMO_DB.ANALYTICS'}, 'role': 'VIEWER'},
+            {'grant': {'privilege': 'USAGE', 'granted_on': 'SCHEMA', 'name': 'DEMO_DB.ANALYTICS'}, 'role': 'ANALYST'},
+            {'grant': {'privilege': 'SELECT', 'granted_on': 'TABLE', 'name': 'DEMO_DB.ANALYTICS.EMPLOYEES'},
+             'role': 'ANALYST'},
+            {'grant': {'privilege': 'SELECT', 'granted_on': 'VIEW', 'name': 'DEMO_DB.ANALYTICS.SUMMARY'},
+             'role': 'VIEWER'},
+            {'grant': {'privilege': 'SELECT', 'granted_on': 'VIEW', 'name': 'DEMO_DB.ANALYTICS.SUMMARY'},
+             'role': 'ANALYST'},
+            {'grant': {'privilege': 'SELECT', 'granted_on': 'VIEW', 'name': 'DEMO_DB.PUBLIC.PUBLIC_VIEW'},
+             'role': None},
+        ]
+        generator = ShareManifestGenerator(connection=None)
+        shared_content, _ = generator._build_shared_content_structure(grants)
+        return {
+            'manifest_version': 2,
+            'roles': generator._build_roles_section({'VIEWER': {'comment': 'Read only'}, 'ANALYST': {}}),
+            'shared_content': shared_content
+        }
+
+    def test_invalid_engine(self):
+        """Test that unknown engines are rejected."""
+        with pytest.raises(ValueError, match="Unknown YAML engine"):
+            YAMLFormatter(engine='libyaml')
+
+    @pytest.mark.parametrize('indent', [1, 2, 3, 4, 11])
+    @pytest.mark.parametrize('sort_keys', [True, False])
+    def test_generated_manifest(self, indent, sort_keys):
+        """Test a manifest built by ShareManifestGenerator."""
+        data = self._generated_manifest()
+        fast = YAMLFormatter(indent=indent, sort_keys=sort_keys, engine='fast')
+
+        assert fast_path_supported(fast, data)
+        assert fast.format_manifest(data) == YAMLFormatter(indent=indent, sort_keys=sort_keys).format_manifest(data)
+
+    @pytest.mark.parametrize('data', [
+        {'a': [{'X': {'c': 1}}, 's', [], {}, [1, [2, 3]], FlowStyleList([]), {'k': EmptyValue(), 'j': [1]}]},
+        {'b': {'c': {}}, 'e': EmptyValue(), 'n': None, 't': True, 1: 'mixed key types, sorted', 'f': FlowStyleList(['x y'])},
+        {'roles': FlowStyleList(['R_%d' % i for i in range(100)])},
+    ])
+    def test_supported_shapes(self, data):
+        """Test nested shapes the fast engine writes itself."""
+        for indent in (2, 4):
+            fast = YAMLFormatter(indent=indent, engine='fast')
+            assert fast_path_supported(fast, data)
+            assert fast.format_manifest(data) == YAMLFormatter(indent=indent).format_manifest(data)
+
+    @pytest.mark.parametrize('data', [
+        {'quoted': 'yes'},
+        {'float': 2.5},
+        {'spaces': 'two  spaces'},
+        {'roles': FlowStyleList(['A, B'])},
+        {'A' * 121: 'long key'},
+        {'roles': FlowStyleList(['ROLE_%04d' % i for i in range(200)])},
+        {'list': [EmptyValue()]},
+        {'nested': FlowStyleList([[1]])},
+        {'unicode': 'ünïcödé'},
+        ['not', 'a', 'mapping'],
+        {},
+    ])
+    def test_fallback_to_pyyaml(self, data):
+        """Test that values the fast engine cannot write exactly are left to PyYAML."""
+        fast = YAMLFormatter(engine='fast')
+
+        assert not fast_path_supported(fast, data)
+        assert fast.format_manifest(data) == YAMLFormatter().format_manifest(data)
+
+    def test_unsupported_type_still_raises(self):
+        """Test that values PyYAML cannot represent still raise with the fast engine."""
+        with pytest.raises(yaml.representer.RepresenterError):
+            YAMLFormatter(engine='fast').format_manifest({'value': object()})
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_random_documents(self, seed):
+        """Test random manifest-like documents against PyYAML."""
+        rng = random.Random(seed)
+        for _ in range(100):
+            data = {rng.choice(DIFFERENTIAL_SCALARS): random_manifest_value(rng) for _ in range(rng.randint(1, 3))}
+            for indent, sort_keys in ((2, True), (4, False)):
+                expected = format_or_error(YAMLFormatter(indent=indent, sort_keys=sort_keys), data)
+                fast = YAMLFormatter(indent=indent, sort_keys=sort_keys, engine='fast')
+                assert format_or_error(fast, data) == expected
+
+    @pytest.mark.parametrize('data', [_generated_manifest.__func__(), {'quoted': 'yes'}])
+    def test_write_manifest(self, data):
+        """Test streaming with the fast engine, including the fallback."""
+        stream = io.StringIO()
+        YAMLFormatter(engine='fast').write_manifest(data, stream)
+
+        assert stream.getvalue() == YAMLFormatter().format_manifest(data)
+
+    def test_write_manifest_renders_once(self):
+        """Test that the fast engine renders a document once when writing it."""
+        data = self._generated_manifest()
+        fast = YAMLFormatter(engine='fast')
+        stream = io.StringIO()
+
+        with patch.object(fast, '_fast_lines', wraps=fast._fast_lines) as fast_lines:
+            fast.write_manifest(data, stream)
+
+        assert fast_lines.call_count == 1
+        assert stream.getvalue() == YAMLFormatter().format_manifest(data)
+
+
 class TestEmptyValue:
     """Test the EmptyValue class."""
 